@@ -6,6 +6,11 @@ let chartForecastOnly = null;
 let chartForecastSummary = null;  // Indicadores (mín/méd/máx)
 let chartForecastChange = null;   // Variação %
 
+// Backend de forecast (jobs assíncronos)
+const FORECAST_API_BASE = "http://127.0.0.1:8000/api/forecast";
+const FORECAST_POLL_INTERVAL_MS = 1500;
+const HISTORY_MAX_POINTS = 400;  // histórico já vem reduzido (LTTB) do backend
+
 // Estado de fullscreen
 let fullscreenOverlay = null;
 let fullscreenInner = null;
@@ -44,7 +49,8 @@ async function runLstmForecast() {
     appendToTerminal("Iniciando treino do modelo LSTM...");
 
     try {
-        const resp = await fetch("http://127.0.0.1:8000/api/forecast/lstm", {
+        // 1) Enfileira o job – a API devolve o job_id na hora
+        const resp = await fetch(`${FORECAST_API_BASE}/jobs`, {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
@@ -52,6 +58,7 @@ async function runLstmForecast() {
             body: JSON.stringify({
                 filename: filenameForForecast,
                 user_email: email,
+                max_points: HISTORY_MAX_POINTS,
             }),
         });
 
@@ -62,7 +69,41 @@ async function runLstmForecast() {
             return;
         }
 
-        const data = await resp.json();
+        const job = await resp.json();
+        appendToTerminal(`Job ${job.job_id} enfileirado.`);
+
+        // 2) Acompanha o progresso até terminar (stream; polling se não houver EventSource).
+        //    Sair da página cancela o treino; uma queda do stream, não
+        const cancelOnLeave = () => cancelForecastJobOnLeave(job.job_id);
+        window.addEventListener("pagehide", cancelOnLeave);
+        let finalJob;
+        try {
+            finalJob = typeof EventSource === "function"
+                ? await streamForecastJob(job.job_id)
+                : await waitForForecastJob(job.job_id);
+        } finally {
+            window.removeEventListener("pagehide", cancelOnLeave);
+        }
+        if (finalJob.status === "cancelled") {
+            appendToTerminal("Treino cancelado.");
+            return;
+        }
+        if (finalJob.status !== "done") {
+            appendToTerminal(`Erro no treino: ${finalJob.error || "falha desconhecida"}`);
+            showToast("Erro ao rodar o modelo no backend.");
+            return;
+        }
+
+        // 3) Busca o resultado
+        const resultResp = await fetch(`${FORECAST_API_BASE}/jobs/${job.job_id}/result`);
+        if (!resultResp.ok) {
+            const msg = await resultResp.text();
+            appendToTerminal(`Erro HTTP: ${resultResp.status} - ${msg}`);
+            showToast("Erro ao buscar o resultado do forecast.");
+            return;
+        }
+
+        const data = await resultResp.json();
         appendToTerminal("Treino concluído. Atualizando dashboard...");
         updateDashboardFromForecast(data);
         showToast("Forecast LSTM concluído com sucesso.");
@@ -73,6 +114,71 @@ async function runLstmForecast() {
     }
 }
 
+function formatEpoch(progress) {
+    const parts = [`Época ${progress.epoch}/${progress.epochs ?? "?"}`];
+    if (progress.loss != null) parts.push(`loss ${Number(progress.loss).toFixed(4)}`);
+    if (progress.val_loss != null) parts.push(`val_loss ${Number(progress.val_loss).toFixed(4)}`);
+    return parts.join(" - ");
+}
+
+// Fechar a aba / sair da página: POST /forecast/jobs/{id}/cancel. sendBeacon é
+// entregue mesmo com a página sendo descarregada (um fetch comum seria abortado)
+function cancelForecastJobOnLeave(jobId) {
+    if (navigator.sendBeacon) {
+        navigator.sendBeacon(`${FORECAST_API_BASE}/jobs/${jobId}/cancel`);
+    }
+}
+
+// Acompanha o job por GET /forecast/jobs/{id}/events (SSE), mostrando a perda de
+// cada época no terminal. O stream é aberto com cancel_on_disconnect=false: se ele
+// cair antes do fim (rede, proxy), o treino continua e o progresso segue por polling.
+function streamForecastJob(jobId) {
+    return new Promise((resolve) => {
+        const source = new EventSource(`${FORECAST_API_BASE}/jobs/${jobId}/events?cancel_on_disconnect=false`);
+        let lastEpoch = 0;
+
+        source.addEventListener("epoch", (ev) => {
+            const progress = JSON.parse(ev.data);
+            lastEpoch = progress.epoch;
+            appendToTerminal(formatEpoch(progress));
+        });
+
+        source.addEventListener("end", (ev) => {
+            source.close();
+            resolve(JSON.parse(ev.data));
+        });
+
+        source.onerror = () => {
+            source.close();
+            waitForForecastJob(jobId, lastEpoch).then(resolve);
+        };
+    });
+}
+
+// Consulta GET /forecast/jobs/{id} até o job terminar, mostrando as épocas no terminal
+async function waitForForecastJob(jobId, lastEpoch = 0) {
+    while (true) {
+        const resp = await fetch(`${FORECAST_API_BASE}/jobs/${jobId}`);
+        if (!resp.ok) {
+            const msg = await resp.text();
+            return { status: "failed", error: `HTTP ${resp.status} - ${msg}` };
+        }
+
+        const job = await resp.json();
+        const progress = job.progress || {};
+        if (progress.epoch && progress.epoch !== lastEpoch) {
+            lastEpoch = progress.epoch;
+            appendToTerminal(formatEpoch(progress));
+        }
+
+        if (job.status === "done" || job.status === "failed" || job.status === "cancelled") {
+            return job;
+        }
+
+        await new Promise((resolve) => setTimeout(resolve, FORECAST_POLL_INTERVAL_MS));
+    }
+}
+
 function updateDashboardFromForecast(payload) {
     if (!payload || !payload.ok) {
         showToast("Resposta inválida do backend de forecast.");
@@ -141,7 +247,7 @@ function renderForecastCharts(history, forecast) {
     const ctx2 = ctx2El.getContext("2d");
 
     // Downsample – deixa no máximo 400 pontos de histórico e 60 de forecast
-    history = downsamplePoints(history || [], 400);
+    history = downsamplePoints(history || [], HISTORY_MAX_POINTS);
     forecast = downsamplePoints(forecast || [], 60);
 
     const historyLabels = history.map((p) =>
@@ -1,9 +1,43 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from app.routers import contact, auth, upload, cleaning, datasets, forecast
+from app.services.database import database
+from app.services.metrics import http_duration, http_requests, registry
+from app.services.passwords import password_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recarrega jobs de forecast salvos em disco (resultados sobrevivem a restart)
+    forecast.forecast_jobs.restore()
 
-from app.routers import contact, auth, upload, cleaning, forecast
+    # Config do modelo LSTM: lida e validada uma vez; erro aparece já no startup
+    try:
+        forecast.load_base_config()
+    except HTTPException as e:
+        print("Config do modelo LSTM indisponível:", e.detail)
 
-app = FastAPI(title="VORA API")
+    # Pool Oracle + criação das tabelas (antes era feito na importação do auth.py).
+    # Se o banco estiver fora do ar a API sobe mesmo assim; o pool é reaberto
+    # na primeira rota que precisar dele.
+    try:
+        await database.open()
+    except Exception as e:
+        print("Não foi possível abrir o pool Oracle no startup:", repr(e))
+
+    yield
+    await database.close()
+    password_executor.shutdown()
+    forecast.forecast_jobs.shutdown()
+    forecast.training_pool.shutdown()
+
+
+app = FastAPI(title="VORA API", lifespan=lifespan)
 
 # CORS – libera o front rodando em localhost:5500 etc.
 app.add_middleware(
@@ -15,14 +49,57 @@ app.add_middleware(
 )
 
 
+def route_template(request: Request) -> str:
+    """
+    Caminho da rota com os parâmetros no lugar dos valores
+    (/api/forecast/jobs/abc -> /api/forecast/jobs/{job_id}), para não criar
+    uma série de métricas por id. Rota inexistente vira "unmatched".
+    """
+    if request.scope.get("route") is None:
+        return "unmatched"
+    values = {str(v): k for k, v in request.path_params.items()}
+    return "/".join(
+        "{" + values[part] + "}" if part in values else part
+        for part in request.url.path.split("/")
+    )
+
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    # Contagem e duração de cada requisição, por rota
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        path = route_template(request)
+        http_requests.inc(method=request.method, route=path, status=str(status))
+        http_duration.observe(time.perf_counter() - started, method=request.method, route=path)
+
+
 @app.get("/")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/health/db")
+async def health_db():
+    ok = await database.ping()
+    return {"status": "ok" if ok else "unavailable"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas no formato do Prometheus (requisições, etapas, treinos, uploads)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Rotas principais
 app.include_router(contact.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(upload.router, prefix="/api")
 app.include_router(cleaning.router, prefix="/api")
+app.include_router(datasets.router, prefix="/api")
 app.include_router(forecast.router, prefix="/api")
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from app.ml.config import ForecastConfig
+from app.ml.timeseries import future_dates
+
+# Bundle de modelo: tudo que é preciso para prever SEM TensorFlow e sem fit.
+#
+#   <pasta>/
+#     manifest.json    versão, colunas, última data, frequência
+#     config.json      ForecastConfig usada no treino
+#     weights.npz      pesos do Keras (model.get_weights(), na ordem das camadas)
+#     scaler.json      parâmetros do MinMax/Standard scaler
+#     last_window.npy  últimas HISTORY_WINDOW linhas (sem escala) do treino;
+#                      com GROUP_BY_COLUMN, uma janela por grupo [grupos, janela, colunas]
+#
+# A inferência refaz o forward da LSTM em NumPy (ver BundleModel.predict),
+# então a API responde em milissegundos sem carregar TensorFlow.
+
+BUNDLE_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+CONFIG_FILE = "config.json"
+WEIGHTS_FILE = "weights.npz"
+SCALER_FILE = "scaler.json"
+LAST_WINDOW_FILE = "last_window.npy"
+
+
+# =========================
+# Scaler (só parâmetros)
+# =========================
+
+def scaler_params(scaler: Any) -> Dict[str, Any]:
+    """MinMaxScaler / StandardScaler do sklearn (ou ScalerParams) -> dict JSON."""
+    if scaler is None:
+        return {"kind": "none"}
+    if isinstance(scaler, ScalerParams):
+        return dict(scaler.params)
+    name = type(scaler).__name__
+    if name == "MinMaxScaler":
+        return {"kind": "minmax", "scale": scaler.scale_.tolist(), "min": scaler.min_.tolist()}
+    if name == "StandardScaler":
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(scaler.n_features_in_)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(scaler.n_features_in_)
+        return {"kind": "standard", "mean": mean.tolist(), "scale": scale.tolist()}
+    raise ValueError(f"Scaler não suportado no bundle: {name}")
+
+
+class ScalerParams:
+    """
+    Scaler do bundle. Tem transform / inverse_transform como os do sklearn,
+    então serve também para retreinar em cima de um bundle (WARM_START).
+    """
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.kind = params.get("kind", "none")
+        if self.kind == "minmax":
+            self.scale = np.asarray(params["scale"], dtype="float64")
+            self.offset = np.asarray(params["min"], dtype="float64")
+        elif self.kind == "standard":
+            self.mean = np.asarray(params["mean"], dtype="float64")
+            self.scale = np.asarray(params["scale"], dtype="float64")
+
+    def transform(self, data: np.ndarray) -> np.ndarray:
+        if self.kind == "minmax":
+            return data * self.scale + self.offset
+        if self.kind == "standard":
+            return (data - self.mean) / self.scale
+        return data
+
+    def inverse_transform(self, data: np.ndarray) -> np.ndarray:
+        if self.kind == "minmax":
+            return (data - self.offset) / self.scale
+        if self.kind == "standard":
+            return data * self.scale + self.mean
+        return data
+
+    def inverse_target(self, values: np.ndarray) -> np.ndarray:
+        """Desfaz a escala só da coluna 0 (target)."""
+        if self.kind == "minmax":
+            return (values - self.offset[0]) / self.scale[0]
+        if self.kind == "standard":
+            return values * self.scale[0] + self.mean[0]
+        return values
+
+
+# =========================
+# Forward da rede em NumPy
+# =========================
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _lstm(
+    x: np.ndarray,
+    kernel: np.ndarray,
+    recurrent: np.ndarray,
+    bias: np.ndarray,
+    return_sequences: bool,
+    reverse: bool = False,
+) -> np.ndarray:
+    """LSTM do Keras (gates i, f, c, o; tanh + sigmoid) em lote: x [batch, tempo, features]."""
+    batch, steps, _ = x.shape
+    units = recurrent.shape[0]
+    projected = x @ kernel + bias  # projeção da entrada de todos os passos de uma vez
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros((batch, units), dtype=x.dtype)
+    outputs = np.empty((batch, steps, units), dtype=x.dtype) if return_sequences else None
+
+    order = range(steps - 1, -1, -1) if reverse else range(steps)
+    for t in order:
+        z = projected[:, t] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if outputs is not None:
+            outputs[:, t] = h
+
+    return outputs if return_sequences else h
+
+
+def forward(
+    weights: Sequence[np.ndarray],
+    config: ForecastConfig,
+    x: np.ndarray,
+    group_ids: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Mesmo cálculo do modelo montado em build_lstm_from_config, em modo inferência
+    (dropout desligado). weights segue a ordem de model_weights() do forecaster;
+    com GROUP_EMBEDDING_DIM, group_ids diz o grupo de cada janela.
+    """
+    it = iter(weights)
+
+    def take(n: int) -> List[np.ndarray]:
+        return [next(it) for _ in range(n)]
+
+    h = x
+    for i, _units in enumerate(config.lstm_layers):
+        return_sequences = i < len(config.lstm_layers) - 1
+        if config.bidirectional:
+            fw = _lstm(h, *take(3), return_sequences=return_sequences)
+            bw = _lstm(h, *take(3), return_sequences=return_sequences, reverse=True)
+            h = np.concatenate([fw, bw], axis=-1)
+        else:
+            h = _lstm(h, *take(3), return_sequences=return_sequences)
+
+    if config.group_embedding_dim > 0:
+        (table,) = take(1)
+        if group_ids is None:
+            raise ValueError("Modelo com embedding de grupo: informe o grupo de cada janela.")
+        h = np.concatenate([h, table[np.asarray(group_ids, dtype="int64")].astype(h.dtype)], axis=-1)
+
+    for _units in config.dense_layers:
+        kernel, bias = take(2)
+        h = np.maximum(h @ kernel + bias, 0.0)
+
+    kernel, bias = take(2)
+    return h @ kernel + bias
+
+
+# =========================
+# Gravação / leitura
+# =========================
+
+def write_bundle(
+    path: Union[str, Path],
+    weights: Sequence[np.ndarray],
+    scaler: Any,
+    config: ForecastConfig,
+    last_window: np.ndarray,
+    last_date: pd.Timestamp,
+    frequency: str,
+    groups: Optional[Sequence[str]] = None,
+    last_dates: Optional[Sequence[pd.Timestamp]] = None,
+) -> Path:
+    """
+    Grava o bundle em `path` (a pasta precisa existir ou é criada).
+    Multi-série: `groups` e `last_dates` seguem a ordem das janelas em last_window.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "datetime_column": config.datetime_column,
+        "target_column": config.target_column,
+        "columns": config.numeric_columns,
+        "forecast_column": f"forecast_{config.target_column}",
+        "history_window": config.history_window,
+        "forecast_horizon": config.forecast_horizon,
+        "frequency": frequency,
+        "last_date": pd.Timestamp(last_date).isoformat(),
+    }
+    if groups is not None:
+        manifest["group_column"] = config.group_by_column
+        manifest["groups"] = [str(g) for g in groups]
+        manifest["last_dates"] = [pd.Timestamp(d).isoformat() for d in last_dates]
+
+    np.savez(path / WEIGHTS_FILE, *[np.asarray(w, dtype="float32") for w in weights])
+    np.save(path / LAST_WINDOW_FILE, np.asarray(last_window, dtype="float32"))
+    (path / SCALER_FILE).write_text(json.dumps(scaler_params(scaler)), encoding="utf-8")
+    (path / CONFIG_FILE).write_text(json.dumps(dataclasses.asdict(config)), encoding="utf-8")
+    # manifest por último: é ele que marca o bundle como completo
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+    return path
+
+
+def bundle_exists(path: Union[str, Path]) -> bool:
+    return (Path(path) / MANIFEST_FILE).exists()
+
+
+class BundleModel:
+    """Bundle carregado em memória, pronto para prever."""
+
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        self.path = path
+        self.manifest: Dict[str, Any] = json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if self.manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Versão de bundle não suportada: {self.manifest.get('version')}")
+
+        self.config = ForecastConfig.from_dict(json.loads((path / CONFIG_FILE).read_text(encoding="utf-8")))
+        self.scaler = ScalerParams(json.loads((path / SCALER_FILE).read_text(encoding="utf-8")))
+        with np.load(path / WEIGHTS_FILE) as npz:
+            self.weights = [npz[f"arr_{i}"] for i in range(len(npz.files))]
+        self.last_window = np.load(path / LAST_WINDOW_FILE)
+        self.last_date = pd.Timestamp(self.manifest["last_date"])
+        self.groups: Optional[List[str]] = self.manifest.get("groups")
+        self.last_dates = [pd.Timestamp(d) for d in self.manifest.get("last_dates", [])]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.manifest["columns"])
+
+    def group_index(self, group: str) -> int:
+        """Posição do grupo no bundle (KeyError se o modelo não conhece o grupo)."""
+        if self.groups is None or str(group) not in self.groups:
+            raise KeyError(group)
+        return self.groups.index(str(group))
+
+    def predict(
+        self,
+        windows: Optional[np.ndarray] = None,
+        last_dates: Optional[Sequence[pd.Timestamp]] = None,
+        group_ids: Optional[Sequence[int]] = None,
+    ) -> List[pd.DataFrame]:
+        """
+        Previsão para uma ou mais janelas (sem escala) [lote, HISTORY_WINDOW, colunas].
+        Sem `windows`, usa a última janela do treino (multi-série: a de cada grupo
+        em group_ids, ou de todos os grupos). Devolve um forecast_df por janela.
+        """
+        cfg = self.config
+        if windows is None:
+            if self.groups is None:
+                windows = self.last_window[None, ...]
+                last_dates = [self.last_date]
+            else:
+                if group_ids is None:
+                    group_ids = range(len(self.groups))
+                group_ids = list(group_ids)
+                windows = self.last_window[group_ids]
+                last_dates = [self.last_dates[i] for i in group_ids]
+        windows = np.asarray(windows, dtype="float64")
+        if windows.ndim != 3 or windows.shape[1:] != (cfg.history_window, len(self.columns)):
+            raise ValueError(
+                f"Janela deve ter formato [n, {cfg.history_window}, {len(self.columns)}] "
+                f"(colunas: {', '.join(self.columns)})."
+            )
+        if last_dates is None or len(last_dates) != len(windows):
+            raise ValueError("Informe a última data de cada janela.")
+
+        scaled = self.scaler.transform(windows).astype("float32")
+        if cfg.group_embedding_dim > 0 and group_ids is not None and len(group_ids) != len(windows):
+            raise ValueError("Informe o grupo de cada janela.")
+        ids = None if group_ids is None else np.asarray(group_ids)
+        output = forward(self.weights, cfg, scaled, group_ids=ids)
+        values = self.scaler.inverse_target(output.astype("float64"))
+
+        return [
+            pd.DataFrame(
+                {
+                    cfg.datetime_column: future_dates(pd.Timestamp(d), self.manifest["frequency"], cfg.forecast_horizon),
+                    self.manifest["forecast_column"]: row,
+                }
+            )
+            for d, row in zip(last_dates, values)
+        ]
+
+
+class BundleLRU:
+    """Bundles carregados, limitados a `max_entries` (o menos usado sai primeiro)."""
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max(1, max_entries)
+        self._items: "OrderedDict[str, BundleModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Union[str, Path]) -> Optional[BundleModel]:
+        key = str(Path(path).resolve())
+        if not bundle_exists(path):
+            with self._lock:
+                self._items.pop(key, None)
+            return None
+
+        with self._lock:
+            model = self._items.get(key)
+            if model is not None:
+                self._items.move_to_end(key)
+                return model
+
+        model = BundleModel(path)
+        with self._lock:
+            self._items[key] = model
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+bundle_lru = BundleLRU(max_entries=int(os.getenv("VORA_BUNDLE_LRU_SIZE", 8)))
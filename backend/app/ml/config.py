@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Leitura da config do modelo (.env). Fica separada do vora_lstm_forecaster para
+# que a API consiga ler a config sem importar TensorFlow.
+
+
+# =========================
+# Leitura do .env do modelo
+# =========================
+
+def load_env_config(env_path: Union[str, Path]) -> Dict[str, str]:
+    """
+    Lê um arquivo .env simples (chave=valor) ignorando linhas em branco e comentários (#).
+    Exemplo de linha válida: CHAVE=valor
+    """
+    env_path = Path(env_path)
+    cfg: Dict[str, str] = {}
+    with env_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            cfg[key.strip()] = value.strip()
+    return cfg
+
+
+def _get_str(cfg: Dict[str, str], key: str, default: Optional[str] = None, required: bool = False) -> str:
+    v = cfg.get(key, None)
+    if (v is None or v == "") and required:
+        if default is None:
+            raise ValueError(f"Config obrigatória ausente: {key}")
+        return default
+    if v is None or v == "":
+        return default
+    return v
+
+
+def _get_int(cfg: Dict[str, str], key: str, default: Optional[int] = None, required: bool = False) -> int:
+    v = cfg.get(key, None)
+    if (v is None or v == "") and required and default is None:
+        raise ValueError(f"Config obrigatória ausente: {key}")
+    if v is None or v == "":
+        if default is None:
+            raise ValueError(f"Config obrigatória ausente: {key}")
+        return default
+    return int(v)
+
+
+def _get_float(cfg: Dict[str, str], key: str, default: Optional[float] = None, required: bool = False) -> float:
+    v = cfg.get(key, None)
+    if (v is None or v == "") and required and default is None:
+        raise ValueError(f"Config obrigatória ausente: {key}")
+    if v is None or v == "":
+        if default is None:
+            raise ValueError(f"Config obrigatória ausente: {key}")
+        return default
+    return float(v)
+
+
+def _get_bool(cfg: Dict[str, str], key: str, default: bool = False) -> bool:
+    v = cfg.get(key, None)
+    if v is None or v == "":
+        return default
+    return v.strip().lower() in ("1", "true", "t", "yes", "y", "sim")
+
+
+def _parse_str_list(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _parse_int_list(value: Optional[str]) -> List[int]:
+    return [int(v.strip()) for v in _parse_str_list(value)]
+
+
+# =========================
+# Config tipada (imutável)
+# =========================
+
+FILL_METHODS = ("ffill", "bfill", "mean", "median", "zero", "drop")
+SCALE_METHODS = ("MINMAX", "STANDARD", "NONE")
+OPTIMIZERS = ("adam", "rmsprop")
+AGGREGATIONS = ("none", "mean", "sum", "median", "last")
+TRAIN_PIPELINES = ("tfdata", "memmap", "arrays")  # ver app.ml.input_pipeline
+PRECISIONS = ("float32", "mixed_bfloat16", "mixed_float16")
+FUSED_LSTM_MODES = ("warn", "auto")
+
+# Campos que só dizem ONDE ler/salvar, e não mudam o modelo treinado
+PATH_FIELDS = ("csv_path", "save_model_path", "save_forecast_csv_path")
+
+# Campos que definem o formato dos pesos e o significado das entradas: dois
+# modelos com os mesmos valores aqui podem herdar pesos um do outro (WARM_START)
+ARCHITECTURE_FIELDS = (
+    "datetime_column", "target_column", "exog_columns", "group_by_column",
+    "group_embedding_dim", "frequency", "aggregation", "fill_missing",
+    "scale_method", "history_window", "forecast_horizon", "lstm_layers",
+    "dense_layers", "bidirectional",
+)
+
+
+@dataclass(frozen=True)
+class ForecastConfig:
+    """
+    Config do modelo já lida e validada (uma vez, no startup).
+    Ajustes por requisição (ex.: CSV do usuário) são feitos em memória com
+    with_overrides(), sem regravar nenhum .env.
+    """
+
+    datetime_column: str
+    target_column: str
+    csv_path: str = ""
+    exog_columns: Tuple[str, ...] = ()
+    # várias séries no mesmo arquivo (ex.: uma por job_title): "" = série única
+    group_by_column: str = ""
+    group_embedding_dim: int = 0   # 0 = modelo compartilhado sem embedding do grupo
+    max_groups: int = 0            # 0 = todos; senão os N grupos com mais linhas
+    frequency: str = "D"
+    aggregation: str = "none"
+    fill_missing: str = "ffill"
+    scale_method: str = "MINMAX"
+
+    history_window: int = 60
+    forecast_horizon: int = 30
+    window_step: int = 1
+    train_test_split: float = 0.8
+    random_seed: int = 42
+
+    lstm_layers: Tuple[int, ...] = (64,)
+    dense_layers: Tuple[int, ...] = ()
+    dropout_lstm: float = 0.2
+    dropout_recurrent: float = 0.0
+    dropout_between_lstm: float = 0.0
+    dropout_dense: float = 0.0
+    bidirectional: bool = False
+    fused_lstm: str = "warn"  # DROPOUT_RECURRENT > 0 desliga o kernel fundido: avisa ou ignora o dropout
+
+    epochs: int = 50
+    batch_size: int = 32
+    train_pipeline: str = "tfdata"
+    jit_compile: bool = False
+    precision: str = "float32"
+    optimizer: str = "adam"
+    learning_rate: float = 1e-3
+    loss_function: str = "mse"
+    metrics: Tuple[str, ...] = ("mse", "mae", "rmse")
+    shuffle_train: bool = False
+    use_early_stopping: bool = True
+    early_stop_patience: int = 5
+    early_stop_min_delta: float = 0.0
+
+    # treino incremental: parte dos pesos do último modelo do mesmo arquivo
+    warm_start: bool = False
+    warm_start_epochs: int = 5
+    replay_windows: int = 256     # janelas antigas revistas junto com as novas
+    drift_threshold: float = 2.0  # perda nas janelas novas / perda de referência
+
+    save_model_path: str = ""
+    save_forecast_csv_path: str = ""
+
+    def __post_init__(self):
+        errors: List[str] = []
+        for name in ("history_window", "forecast_horizon", "window_step", "epochs", "batch_size", "warm_start_epochs"):
+            if getattr(self, name) < 1:
+                errors.append(f"{name.upper()} deve ser >= 1")
+        if not 0.0 < self.train_test_split <= 1.0:
+            errors.append("TRAIN_TEST_SPLIT deve estar entre 0 e 1")
+        if self.replay_windows < 0:
+            errors.append("REPLAY_WINDOWS deve ser >= 0")
+        if self.drift_threshold <= 0:
+            errors.append("DRIFT_THRESHOLD deve ser > 0")
+        if self.group_embedding_dim < 0 or self.max_groups < 0:
+            errors.append("GROUP_EMBEDDING_DIM e MAX_GROUPS devem ser >= 0")
+        if self.group_embedding_dim > 0 and not self.group_by_column:
+            errors.append("GROUP_EMBEDDING_DIM exige GROUP_BY_COLUMN")
+        if self.group_by_column and self.group_by_column in self.numeric_columns:
+            errors.append("GROUP_BY_COLUMN não pode ser o target nem uma exógena")
+        if not self.lstm_layers:
+            errors.append("LSTM_LAYERS precisa de pelo menos uma camada")
+        if self.aggregation not in AGGREGATIONS:
+            errors.append(f"AGGREGATION inválido: {self.aggregation} (use {', '.join(AGGREGATIONS)})")
+        if self.fill_missing not in FILL_METHODS:
+            errors.append(f"FILL_MISSING inválido: {self.fill_missing} (use {', '.join(FILL_METHODS)})")
+        if self.scale_method not in SCALE_METHODS:
+            errors.append(f"SCALE_METHOD inválido: {self.scale_method} (use {', '.join(SCALE_METHODS)})")
+        if self.train_pipeline not in TRAIN_PIPELINES:
+            errors.append(f"TRAIN_PIPELINE inválido: {self.train_pipeline} (use {', '.join(TRAIN_PIPELINES)})")
+        if self.precision not in PRECISIONS:
+            errors.append(f"PRECISION inválido: {self.precision} (use {', '.join(PRECISIONS)})")
+        if self.fused_lstm not in FUSED_LSTM_MODES:
+            errors.append(f"FUSED_LSTM inválido: {self.fused_lstm} (use {', '.join(FUSED_LSTM_MODES)})")
+        if self.optimizer not in OPTIMIZERS:
+            errors.append(f"OPTIMIZER inválido: {self.optimizer} (use {', '.join(OPTIMIZERS)})")
+        if errors:
+            raise ValueError("Config do modelo inválida: " + "; ".join(errors))
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        """Colunas usadas pelo modelo: target primeiro, depois as exógenas."""
+        return [self.target_column] + list(self.exog_columns)
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Colunas lidas do dataset: data, grupo (se houver) e as numéricas."""
+        group = [self.group_by_column] if self.group_by_column else []
+        return [self.datetime_column] + group + self.numeric_columns
+
+    @classmethod
+    def from_mapping(cls, cfg: Dict[str, str]) -> "ForecastConfig":
+        """Monta a config a partir das chaves do .env (ver load_env_config)."""
+        return cls(
+            csv_path=_get_str(cfg, "CSV_PATH", ""),
+            datetime_column=_get_str(cfg, "DATETIME_COLUMN", required=True),
+            target_column=_get_str(cfg, "TARGET_COLUMN", required=True),
+            exog_columns=tuple(_parse_str_list(cfg.get("EXOG_COLUMNS", ""))),
+            group_by_column=_get_str(cfg, "GROUP_BY_COLUMN", ""),
+            group_embedding_dim=_get_int(cfg, "GROUP_EMBEDDING_DIM", 0),
+            max_groups=_get_int(cfg, "MAX_GROUPS", 0),
+            frequency=_get_str(cfg, "FREQUENCY", "D"),
+            aggregation=_get_str(cfg, "AGGREGATION", "none").lower(),
+            fill_missing=_get_str(cfg, "FILL_MISSING", "ffill").lower(),
+            scale_method=_get_str(cfg, "SCALE_METHOD", "MINMAX").upper(),
+            history_window=_get_int(cfg, "HISTORY_WINDOW", 60),
+            forecast_horizon=_get_int(cfg, "FORECAST_HORIZON", 30),
+            window_step=_get_int(cfg, "WINDOW_STEP", 1),
+            train_test_split=_get_float(cfg, "TRAIN_TEST_SPLIT", 0.8),
+            random_seed=_get_int(cfg, "RANDOM_SEED", 42),
+            lstm_layers=tuple(_parse_int_list(cfg.get("LSTM_LAYERS", "64"))),
+            dense_layers=tuple(_parse_int_list(cfg.get("DENSE_LAYERS", ""))),
+            dropout_lstm=_get_float(cfg, "DROPOUT_LSTM", 0.2),
+            dropout_recurrent=_get_float(cfg, "DROPOUT_RECURRENT", 0.0),
+            dropout_between_lstm=_get_float(cfg, "DROPOUT_BETWEEN_LSTM", 0.0),
+            dropout_dense=_get_float(cfg, "DROPOUT_DENSE", 0.0),
+            bidirectional=_get_bool(cfg, "BIDIRECTIONAL", False),
+            fused_lstm=_get_str(cfg, "FUSED_LSTM", "warn").lower(),
+            epochs=_get_int(cfg, "EPOCHS", 50),
+            batch_size=_get_int(cfg, "BATCH_SIZE", 32),
+            train_pipeline=_get_str(cfg, "TRAIN_PIPELINE", "tfdata").lower(),
+            jit_compile=_get_bool(cfg, "JIT_COMPILE", False),
+            precision=_get_str(cfg, "PRECISION", "float32").lower(),
+            optimizer=_get_str(cfg, "OPTIMIZER", "adam").lower(),
+            learning_rate=_get_float(cfg, "LEARNING_RATE", 1e-3),
+            loss_function=_get_str(cfg, "LOSS_FUNCTION", "mse"),
+            metrics=tuple(m.lower() for m in _parse_str_list(cfg.get("METRICS", "mse,mae,rmse"))),
+            shuffle_train=_get_bool(cfg, "SHUFFLE_TRAIN", False),
+            use_early_stopping=_get_bool(cfg, "USE_EARLY_STOPPING", True),
+            early_stop_patience=_get_int(cfg, "EARLY_STOP_PATIENCE", 5),
+            early_stop_min_delta=_get_float(cfg, "EARLY_STOP_MIN_DELTA", 0.0),
+            warm_start=_get_bool(cfg, "WARM_START", False),
+            warm_start_epochs=_get_int(cfg, "WARM_START_EPOCHS", 5),
+            replay_windows=_get_int(cfg, "REPLAY_WINDOWS", 256),
+            drift_threshold=_get_float(cfg, "DRIFT_THRESHOLD", 2.0),
+            save_model_path=_get_str(cfg, "SAVE_MODEL_PATH", ""),
+            save_forecast_csv_path=_get_str(cfg, "SAVE_FORECAST_CSV_PATH", ""),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ForecastConfig":
+        """Inverso de dataclasses.asdict (ex.: config.json de um bundle); ignora chaves desconhecidas."""
+        known = {f.name: f for f in dataclasses.fields(cls)}
+        values = {
+            k: tuple(v) if isinstance(v, list) else v
+            for k, v in data.items()
+            if k in known
+        }
+        return cls(**values)
+
+    @classmethod
+    def from_env_file(cls, env_path: Union[str, Path]) -> "ForecastConfig":
+        return cls.from_mapping(load_env_config(env_path))
+
+    def with_overrides(self, **changes: Any) -> "ForecastConfig":
+        """Cópia com alguns campos trocados (valida de novo)."""
+        return dataclasses.replace(self, **changes)
+
+    def model_fields(self) -> Dict[str, Any]:
+        """Campos que definem o modelo treinado (sem caminhos de entrada/saída)."""
+        return {
+            k: v for k, v in dataclasses.asdict(self).items()
+            if k not in PATH_FIELDS
+        }
+
+    def architecture_fields(self) -> Dict[str, Any]:
+        """Campos que precisam bater para reaproveitar os pesos de outro modelo."""
+        return {k: getattr(self, k) for k in ARCHITECTURE_FIELDS}
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+from app.ml.bundle import bundle_exists, write_bundle
+from app.ml.config import ForecastConfig
+from app.services.hashing import file_sha256, text_sha256
+
+# Diretório base do projeto (pasta backend/)
+BASE_DIR = Path(__file__).resolve().parents[2]
+FORECAST_CACHE_DIR = BASE_DIR / "cache" / "forecast"
+
+HISTORY_FILE = "history.json"
+FORECAST_FILE = "forecast.csv"
+META_FILE = "meta.json"
+
+
+def config_fingerprint(config: ForecastConfig) -> str:
+    """
+    Hash dos campos que definem o modelo: ignora caminhos de entrada/saída,
+    para que o mesmo modelo sirva qualquer cópia do mesmo dataset.
+    """
+    return text_sha256(json.dumps(config.model_fields(), sort_keys=True))
+
+
+def architecture_fingerprint(config: ForecastConfig) -> str:
+    """Hash só da arquitetura/entradas: modelos com o mesmo hash trocam pesos (WARM_START)."""
+    return text_sha256(json.dumps(config.architecture_fields(), sort_keys=True))
+
+
+def reference_loss(history: Dict[str, Any]) -> Optional[float]:
+    """Perda do modelo treinado: a melhor val_loss (ou a última loss, sem validação)."""
+    val = history.get("val_loss") or []
+    if val:
+        return float(min(val))
+    loss = history.get("loss") or []
+    return float(loss[-1]) if loss else None
+
+
+class ForecastCache:
+    """
+    Cache de modelos/previsões endereçado por conteúdo:
+      chave = hash(conteúdo do dataset) + hash(config normalizada)
+
+    Em disco (FORECAST_CACHE_DIR/<chave>/) ficam o bundle do modelo (pesos, scaler,
+    config, última janela), o histórico de treino e a previsão; em memória fica um
+    LRU limitado com histórico + previsão.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_entries: int = 32):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max(0, max_entries)
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- chaves ----------
+
+    def make_key(self, dataset_path: Union[str, Path], config: ForecastConfig) -> str:
+        dataset_hash = file_sha256(dataset_path)
+        config_hash = config_fingerprint(config)
+        return text_sha256(f"{dataset_hash}:{config_hash}")[:32]
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    # ---------- leitura ----------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Devolve {"history", "forecast_df", "meta"} ou None se não houver entrada."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry
+
+        entry_dir = self._entry_dir(key)
+        meta_path = entry_dir / META_FILE
+        if not meta_path.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            history = json.loads((entry_dir / HISTORY_FILE).read_text(encoding="utf-8"))
+            datetime_col = meta.get("datetime_column")
+            forecast_df = pd.read_csv(
+                entry_dir / FORECAST_FILE,
+                parse_dates=[datetime_col] if datetime_col else None,
+            )
+        except (OSError, ValueError) as e:
+            # entrada corrompida/incompleta: descarta e trata como miss
+            print("Cache de forecast inválido, removendo:", key, repr(e))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        entry = {"history": history, "forecast_df": forecast_df, "meta": meta}
+        self._remember(key, entry)
+        return entry
+
+    def bundle_dir(self, key: str) -> Optional[Path]:
+        """Pasta do bundle de inferência da entrada (ver app.ml.bundle), se existir."""
+        path = self._entry_dir(key)
+        return path if bundle_exists(path) else None
+
+    # ---------- escrita ----------
+
+    def put(
+        self,
+        key: str,
+        dataset_path: Union[str, Path],
+        config: ForecastConfig,
+        result: Dict[str, Any],
+    ) -> None:
+        """
+        Grava o resultado de run_forecast_pipeline.
+        A entrada é montada numa pasta temporária e renomeada no final (atômico),
+        então um leitor nunca vê uma entrada pela metade.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp_dir.mkdir(parents=True)
+
+        history = {
+            name: [float(v) for v in values]
+            for name, values in (result.get("history") or {}).items()
+        }
+        forecast_df: pd.DataFrame = result["forecast_df"]
+        meta = {
+            "key": key,
+            "dataset_path": str(Path(dataset_path).resolve()),
+            "dataset_hash": file_sha256(dataset_path),
+            "config_hash": config_fingerprint(config),
+            "architecture_hash": architecture_fingerprint(config),
+            # warm start: a referência do modelo anterior (o ajuste incremental não tem validação)
+            "reference_loss": result.get("reference_loss") or reference_loss(history),
+            "datetime_column": config.datetime_column,
+            "target_column": config.target_column,
+            "created_at": time.time(),
+        }
+
+        try:
+            model = result.get("model")
+            if model is not None and result.get("last_window") is not None:
+                write_bundle(
+                    tmp_dir,
+                    weights=result.get("weights") or model.get_weights(),
+                    scaler=result.get("scaler"),
+                    config=config,
+                    last_window=result["last_window"],
+                    last_date=result["last_date"],
+                    frequency=result["frequency"],
+                    groups=result.get("groups"),
+                    last_dates=result.get("last_dates"),
+                )
+            (tmp_dir / HISTORY_FILE).write_text(json.dumps(history), encoding="utf-8")
+            forecast_df.to_csv(tmp_dir / FORECAST_FILE, index=False)
+            (tmp_dir / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # outra requisição gravou a mesma chave ao mesmo tempo: o conteúdo é equivalente
+                if not (entry_dir / META_FILE).exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._remember(key, {"history": history, "forecast_df": forecast_df.copy(), "meta": meta})
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def find_warm_start(self, dataset_path: Union[str, Path], config: ForecastConfig) -> Optional[Dict[str, Any]]:
+        """
+        Modelo anterior do mesmo arquivo com a mesma arquitetura (o mais recente),
+        para o treino incremental: {"key", "bundle_dir", "reference_loss"} ou None.
+        """
+        target = str(Path(dataset_path).resolve())
+        arch_hash = architecture_fingerprint(config)
+        best: Optional[Dict[str, Any]] = None
+        if not self.cache_dir.exists():
+            return None
+
+        for meta_path in self.cache_dir.glob(f"*/{META_FILE}"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if meta.get("dataset_path") != target or meta.get("architecture_hash") != arch_hash:
+                continue
+            if not bundle_exists(meta_path.parent):
+                continue
+            if best is None or meta.get("created_at", 0) > best["created_at"]:
+                best = {
+                    "key": meta.get("key") or meta_path.parent.name,
+                    "bundle_dir": str(meta_path.parent),
+                    "reference_loss": meta.get("reference_loss"),
+                    "created_at": meta.get("created_at", 0),
+                }
+        if best is not None:
+            best.pop("created_at")
+        return best
+
+    # ---------- invalidação ----------
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._lru.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def invalidate_dataset(self, dataset_path: Union[str, Path], keep_key: Optional[str] = None) -> int:
+        """
+        Remove todas as entradas do dataset (exceto keep_key).
+        Usado quando o arquivo ou a config do modelo mudam: a chave nova
+        passa a ser outra e as antigas viram lixo.
+        """
+        target = str(Path(dataset_path).resolve())
+        removed = 0
+        if not self.cache_dir.exists():
+            return removed
+
+        for meta_path in self.cache_dir.glob(f"*/{META_FILE}"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            key = meta.get("key") or meta_path.parent.name
+            if meta.get("dataset_path") == target and key != keep_key:
+                self.invalidate(key)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+forecast_cache = ForecastCache(
+    FORECAST_CACHE_DIR,
+    max_entries=int(os.getenv("VORA_FORECAST_CACHE_SIZE", 32)),
+)
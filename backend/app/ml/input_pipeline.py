@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import tensorflow as tf
+
+from app.ml.config import ForecastConfig
+from app.ml.windowing import windows_at
+
+# Entrada de treino em streaming: a série escalada fica guardada UMA vez e as
+# janelas (X, y) são montadas por batch dentro de um tf.data, em vez de
+# materializar [n_janelas, HISTORY_WINDOW, n_features] inteiro antes do fit.
+#
+# Cada exemplo do dataset é só o índice de início da janela; o split treino /
+# validação é feito sobre esses índices (faixas de início), sem copiar dados.
+#
+# TRAIN_PIPELINE (config):
+#   tfdata  série num tensor em memória, janelas montadas com tf.gather (padrão)
+#   memmap  série num .npy mapeado em memória; cada batch lê só as linhas dele
+#   arrays  comportamento antigo: X e y inteiros passados ao model.fit
+#
+# Só os workers de treino importam este módulo (ele importa TensorFlow).
+
+TrainingInput = Union[tf.data.Dataset, Tuple[Any, np.ndarray]]
+
+# Pasta dos .npy temporários do modo memmap (padrão: pasta temporária do sistema)
+MEMMAP_DIR = os.getenv("VORA_TRAIN_MEMMAP_DIR") or None
+
+
+@contextmanager
+def memmap_series(data: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Grava a série escalada num .npy temporário e devolve o memmap somente leitura.
+    O arquivo é apagado ao sair do bloco (depois do fit).
+    """
+    fd, name = tempfile.mkstemp(prefix="vora_series_", suffix=".npy", dir=MEMMAP_DIR)
+    os.close(fd)
+    path = Path(name)
+    try:
+        np.save(path, np.ascontiguousarray(data, dtype="float32"))
+        yield np.load(path, mmap_mode="r")
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def window_dataset(
+    series: Union[np.ndarray, tf.Tensor],
+    starts: np.ndarray,
+    window: int,
+    horizon: int,
+    batch_size: int,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    group_ids: Optional[np.ndarray] = None,
+) -> tf.data.Dataset:
+    """
+    tf.data de janelas geradas sob demanda a partir de `series` [n_amostras, n_features]:
+      X = series[s : s + window], y = series[s + window : s + window + horizon, 0]
+    para cada início s de `starts`, em batches e com prefetch.
+
+    `series` pode ser um tf.Tensor (compartilhado entre treino e validação) ou
+    um np.memmap: aí cada batch lê só as linhas que usa.
+    Com group_ids, a entrada vira {"series": X, "group": id} (embedding do grupo).
+    """
+    starts = np.asarray(starts, dtype="int64")
+    n_features = series.shape[1]
+    window_offsets = np.arange(window, dtype="int64")
+    target_offsets = np.arange(window, window + horizon, dtype="int64")
+
+    if isinstance(series, np.memmap):
+        def gather_batch(batch_starts: np.ndarray):
+            X = np.asarray(series[batch_starts[:, None] + window_offsets], dtype="float32")
+            y = np.asarray(series[batch_starts[:, None] + target_offsets, 0], dtype="float32")
+            return X, y
+
+        def make_xy(batch_starts):
+            X, y = tf.numpy_function(gather_batch, [batch_starts], (tf.float32, tf.float32))
+            X.set_shape([None, window, n_features])
+            y.set_shape([None, horizon])
+            return X, y
+    else:
+        series_t = tf.convert_to_tensor(series, dtype=tf.float32)
+        window_offsets_t = tf.constant(window_offsets)
+        target_offsets_t = tf.constant(target_offsets)
+
+        def make_xy(batch_starts):
+            X = tf.gather(series_t, batch_starts[:, None] + window_offsets_t)
+            y = tf.gather(series_t[:, 0], batch_starts[:, None] + target_offsets_t)
+            return X, y
+
+    if group_ids is None:
+        ds = tf.data.Dataset.from_tensor_slices(starts)
+    else:
+        ds = tf.data.Dataset.from_tensor_slices((starts, np.asarray(group_ids, dtype="int32")))
+
+    if shuffle:
+        # embaralha só os índices de início (baratos), não as janelas
+        ds = ds.shuffle(len(starts), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+
+    if group_ids is None:
+        ds = ds.map(make_xy, num_parallel_calls=tf.data.AUTOTUNE)
+    else:
+        def make_grouped(batch_starts, batch_groups):
+            X, y = make_xy(batch_starts)
+            return {"series": X, "group": tf.reshape(batch_groups, [-1, 1])}, y
+
+        ds = ds.map(make_grouped, num_parallel_calls=tf.data.AUTOTUNE)
+
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+def training_series(data: np.ndarray, config: ForecastConfig):
+    """
+    Contexto com a série guardada uma única vez para o fit (treino e validação):
+    memmap (TRAIN_PIPELINE=memmap), tensor (tfdata) ou o próprio array (arrays).
+    """
+    if config.train_pipeline == "memmap":
+        return memmap_series(data)
+    if config.train_pipeline == "tfdata":
+        return nullcontext(tf.constant(np.asarray(data, dtype="float32")))
+    return nullcontext(data)
+
+
+def training_inputs(
+    series: Union[np.ndarray, tf.Tensor],
+    starts: np.ndarray,
+    config: ForecastConfig,
+    group_ids: Optional[np.ndarray] = None,
+) -> Optional[TrainingInput]:
+    """
+    Entrada do model.fit para as janelas que começam em `starts`:
+    um tf.data (tfdata / memmap) ou a tupla (X, y) materializada (arrays).
+    Sem nenhuma janela devolve None (ex.: validação vazia).
+    """
+    if len(starts) == 0:
+        return None
+    if config.train_pipeline == "arrays":
+        series = np.asarray(series)
+        X, y = windows_at(series, starts, config.history_window, config.forecast_horizon)
+        if group_ids is not None:
+            return {"series": X, "group": np.asarray(group_ids, dtype="int32").reshape(-1, 1)}, y
+        return X, y
+
+    return window_dataset(
+        series,
+        starts,
+        config.history_window,
+        config.forecast_horizon,
+        batch_size=config.batch_size,
+        shuffle=config.shuffle_train,
+        seed=config.random_seed,
+        group_ids=group_ids,
+    )
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype
+
+# Etapas de preparação do eixo temporal que não dependem de TensorFlow
+# (usadas pelo forecaster nos workers e pela API ao montar o histórico).
+
+AGGREGATION_METHODS = ("none", "mean", "sum", "median", "last")
+
+
+def parse_time_column(col: pd.Series, hint: Optional[Dict[str, Any]] = None) -> pd.Series:
+    """
+    Converte a coluna temporal para datetime.
+
+    Se a coluna for numérica e parecer um ANO (entre 1900 e 2100),
+    tratamos como ano calendário (2020 -> 2020-01-01 etc),
+    evitando aquele comportamento bizarro de 1970 + nanossegundos.
+    Valores vazios viram NaT.
+
+    hint (opcional) vem do perfil do dataset (app.services.profiling.time_hint):
+    {"kind": "year" | "datetime" | "none", "format": ...}; com ele a coluna não
+    é varrida de novo para descobrir se é ano, e o formato da data já vai pronto.
+    """
+    kind = (hint or {}).get("kind")
+    is_numeric = is_integer_dtype(col) or is_float_dtype(col)
+
+    if is_numeric and (kind == "year" or (kind is None and col.dropna().between(1900, 2100).all())):
+        # Trata como ano: converte pra string e usa o formato %Y
+        years = col.dropna().astype(int).astype(str)
+        return pd.to_datetime(years, format="%Y").reindex(col.index)
+
+    fmt = (hint or {}).get("format")
+    if kind == "datetime" and fmt:
+        try:
+            return pd.to_datetime(col, format=fmt)
+        except (TypeError, ValueError):
+            pass
+
+    # Caso geral: deixa o pandas converter do jeito padrão
+    return pd.to_datetime(col)
+
+
+def resolve_frequency(freq: str, dates: Optional[pd.Series] = None) -> str:
+    """FREQUENCY válida para date_range; se não for, tenta inferir das datas (ou usa "D")."""
+    try:
+        pd.tseries.frequencies.to_offset(freq)
+        return freq
+    except (ValueError, TypeError):
+        inferred = None
+        if dates is not None and len(dates) >= 3:
+            try:
+                inferred = pd.infer_freq(dates)
+            except (ValueError, TypeError):
+                inferred = None
+        return inferred or "D"
+
+
+def future_dates(last_date: pd.Timestamp, freq: str, periods: int) -> pd.DatetimeIndex:
+    """As `periods` datas seguintes a last_date, no passo de `freq` (já resolvida)."""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    return pd.date_range(start=last_date + offset, periods=periods, freq=freq)
+
+
+def _to_periods(dates: pd.Series, freq: str) -> Optional[pd.Series]:
+    """Datas -> períodos de `freq` (aceita também os aliases de offset, ex.: YE, MS)."""
+    candidates = [freq]
+    if len(freq) > 1 and freq[-1] in ("E", "S"):
+        candidates.append(freq[:-1])
+    for candidate in candidates:
+        try:
+            return dates.dt.to_period(candidate)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def aggregate_time_axis(
+    df: pd.DataFrame,
+    datetime_col: str,
+    value_cols: Sequence[str],
+    method: str,
+    freq: str,
+) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
+    """
+    Agrupa as linhas em passos regulares de `freq` (group-by vetorizado):
+    cada passo vira uma linha com o valor agregado (mean, sum, median ou last).
+
+    Passos sem nenhuma linha entram com NaN (o FILL_MISSING cuida deles), para
+    o eixo ficar regular. Devolve (df_agregado, linhas_brutas_por_passo);
+    com method="none" devolve o df como veio e None.
+    """
+    if method == "none":
+        return df, None
+    if method not in AGGREGATION_METHODS:
+        raise ValueError(f"AGGREGATION inválido: {method} (use {', '.join(AGGREGATION_METHODS)})")
+
+    value_cols = list(value_cols)
+    periods = _to_periods(df[datetime_col], freq)
+
+    if periods is None:
+        # frequência sem equivalente em Period: agrupa só timestamps idênticos
+        print(f"FREQUENCY={freq} não suportada na agregação; agrupando datas iguais.")
+        grouped = df[value_cols].groupby(df[datetime_col], sort=True)
+        full_index = None
+    else:
+        grouped = df[value_cols].groupby(periods, sort=True)
+        keys = periods.dropna()
+        full_index = pd.period_range(keys.min(), keys.max(), freq=keys.dt.freq) if len(keys) else None
+
+    if method == "sum":
+        values = grouped.sum(min_count=1)
+    else:
+        values = grouped.agg(method)
+    counts = grouped.size()
+
+    if full_index is not None:
+        values = values.reindex(full_index)
+        counts = counts.reindex(full_index, fill_value=0)
+        values.index = values.index.to_timestamp(how="start")
+        counts.index = values.index
+
+    values.index.name = datetime_col
+    counts.index.name = datetime_col
+    counts.name = "rows"
+
+    return values.reset_index(), counts.astype("int64")
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from app.ml.forecast_cache import forecast_cache
+from app.ml.vora_lstm_forecaster import run_forecast_pipeline
+from app.services.metrics import StageTimer
+
+# Tarefas executadas pelos workers de treino (ver app.services.training_pool).
+# Recebem (payload, progress) e devolvem só dados picklable: o modelo Keras
+# fica no worker e vai para o disco via forecast_cache.
+
+
+def train_forecast_task(
+    payload: Dict[str, Any],
+    progress: Callable[[int, int, Dict[str, float]], None],
+    should_stop: Callable[[], bool],
+) -> Dict[str, Any]:
+    """
+    payload:
+      config: ForecastConfig (com csv_path / save_forecast_csv_path do usuário)
+      cache_key / dataset_path (opcionais): onde gravar o resultado no cache
+      warm_start (opcional): modelo anterior para o treino incremental
+        (forecast_cache.find_warm_start)
+
+    Devolve também "stages" (segundos por etapa): quem chamou observa as
+    durações nas métricas do seu processo. Cancelado (should_stop), levanta
+    TrainingCancelled antes de gravar qualquer coisa no cache.
+    """
+    config = payload["config"]
+    timer = StageTimer("forecast")
+    result = run_forecast_pipeline(
+        config,
+        on_epoch=progress,
+        timer=timer,
+        warm_start=payload.get("warm_start"),
+        should_stop=should_stop,
+    )
+
+    cache_key = payload.get("cache_key")
+    dataset_path = payload.get("dataset_path")
+    if cache_key and dataset_path:
+        try:
+            with timer.stage("cache_write"):
+                forecast_cache.put(cache_key, dataset_path, config, result)
+                forecast_cache.invalidate_dataset(dataset_path, keep_key=cache_key)
+        except Exception as e:
+            print("Erro ao gravar cache de forecast:", repr(e))
+
+    return {
+        "history": {
+            name: [float(v) for v in values]
+            for name, values in (result.get("history") or {}).items()
+        },
+        "forecast_df": result["forecast_df"],
+        "stages": timer.as_dict(),
+        "warm_start": result.get("warm_start"),
+    }
@@ -1,180 +1,213 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Any, Callable, Dict, List, Tuple, Optional, Union
 
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
+# TensorFlow é carregado aqui, no import do módulo. Só os workers de treino
+# (app.ml.training_tasks, via training_pool) importam este módulo; a API não.
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, Bidirectional
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import (
+    LSTM,
+    Bidirectional,
+    Concatenate,
+    Dense,
+    Dropout,
+    Embedding,
+    Flatten,
+    Input,
+)
+from tensorflow.keras.callbacks import Callback, EarlyStopping
 from tensorflow.keras.optimizers import Adam, RMSprop
 
+from app.ml.bundle import BundleModel
+from app.ml.config import ForecastConfig
+from app.ml.timeseries import (
+    aggregate_time_axis,
+    future_dates,
+    parse_time_column,
+    resolve_frequency,
+)
+from app.ml.input_pipeline import TrainingInput, training_inputs, training_series
+from app.ml.windowing import count_windows, grouped_window_starts, sliding_windows
+from app.services.datasets import read_dataset
+from app.services.metrics import StageTimer
+from app.services.training_pool import TrainingCancelled
+from app.services.profiling import (
+    build_profile,
+    dataset_dtypes,
+    read_profile,
+    time_hint as profile_time_hint,
+)
+
 
 # =========================
-# Leitura do .env do modelo
+# Preparação dos dados
 # =========================
 
-def load_env_config(env_path: Union[str, Path]) -> Dict[str, str]:
-    """
-    Lê um arquivo .env simples (chave=valor) ignorando linhas em branco e comentários (#).
-    Exemplo de linha válida: CHAVE=valor
-    """
-    env_path = Path(env_path)
-    cfg: Dict[str, str] = {}
-    with env_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            cfg[key.strip()] = value.strip()
-    return cfg
-
-
-def _get_str(cfg: Dict[str, str], key: str, default: Optional[str] = None, required: bool = False) -> str:
-    v = cfg.get(key, None)
-    if (v is None or v == "") and required:
-        if default is None:
-            raise ValueError(f"Config obrigatória ausente: {key}")
-        return default
-    if v is None or v == "":
-        return default
-    return v
-
-
-def _get_int(cfg: Dict[str, str], key: str, default: Optional[int] = None, required: bool = False) -> int:
-    v = cfg.get(key, None)
-    if (v is None or v == "") and required and default is None:
-        raise ValueError(f"Config obrigatória ausente: {key}")
-    if v is None or v == "":
-        if default is None:
-            raise ValueError(f"Config obrigatória ausente: {key}")
-        return default
-    return int(v)
-
-
-def _get_float(cfg: Dict[str, str], key: str, default: Optional[float] = None, required: bool = False) -> float:
-    v = cfg.get(key, None)
-    if (v is None or v == "") and required and default is None:
-        raise ValueError(f"Config obrigatória ausente: {key}")
-    if v is None or v == "":
-        if default is None:
-            raise ValueError(f"Config obrigatória ausente: {key}")
-        return default
-    return float(v)
-
-
-def _get_bool(cfg: Dict[str, str], key: str, default: bool = False) -> bool:
-    v = cfg.get(key, None)
-    if v is None or v == "":
-        return default
-    return v.strip().lower() in ("1", "true", "t", "yes", "y", "sim")
-
-
-def _parse_str_list(value: Optional[str]) -> List[str]:
-    if not value:
-        return []
-    return [v.strip() for v in value.split(",") if v.strip()]
-
+def fill_missing_values(df: pd.DataFrame, numeric_cols: List[str], fill_method: str) -> pd.DataFrame:
+    """Tratamento de missing nas colunas numéricas (FILL_MISSING)."""
+    if fill_method == "ffill":
+        df[numeric_cols] = df[numeric_cols].ffill().bfill()
+    elif fill_method == "bfill":
+        df[numeric_cols] = df[numeric_cols].bfill().ffill()
+    elif fill_method == "mean":
+        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
+    elif fill_method == "median":
+        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
+    elif fill_method == "zero":
+        df[numeric_cols] = df[numeric_cols].fillna(0.0)
+    elif fill_method == "drop":
+        df = df.dropna(subset=numeric_cols)
+    return df
 
-def _parse_int_list(value: Optional[str]) -> List[int]:
-    return [int(v.strip()) for v in _parse_str_list(value)]
 
+def scale_data(data: np.ndarray, scale_method: str) -> Tuple[np.ndarray, Optional[object]]:
+    """Escala a matriz (SCALE_METHOD). Devolve (data_scaled, scaler ou None)."""
+    if scale_method == "STANDARD":
+        scaler = StandardScaler()
+        return scaler.fit_transform(data), scaler
+    if scale_method == "NONE":
+        return data, None
+    # MINMAX default
+    scaler = MinMaxScaler()
+    return scaler.fit_transform(data), scaler
 
-# =========================
-# Preparação dos dados
-# =========================
 
 def prepare_time_series_data(
     df: pd.DataFrame,
-    cfg: Dict[str, str]
+    config: ForecastConfig,
+    timer: Optional[StageTimer] = None,
+    time_hint: Optional[Dict[str, Any]] = None,
 ) -> Tuple[pd.DataFrame, np.ndarray, Optional[object]]:
     """
     - Converte e ordena a coluna temporal
+    - Agrega linhas do mesmo passo de tempo (AGGREGATION), se configurado
     - Trata missing nas colunas numéricas
     - Escala os dados (target + exógenas)
+    timer (opcional) recebe a duração de cada etapa; time_hint (opcional) é o
+    tipo da coluna temporal segundo o perfil do dataset (ver parse_time_column).
     Retorna:
       df_ordenado, data_scaled (np.ndarray), scaler (ou None)
     """
-    datetime_col = _get_str(cfg, "DATETIME_COLUMN", required=True)
-    target_col = _get_str(cfg, "TARGET_COLUMN", required=True)
-    exog_cols = _parse_str_list(cfg.get("EXOG_COLUMNS", ""))
+    timer = timer or StageTimer("forecast")
+    datetime_col = config.datetime_column
 
     df = df.copy()
 
-    # ========= AJUSTE ESPECIAL PARA COLUNA "ANO" =========
-    # Se a coluna de tempo for numérica e parecer um ANO (entre 1900 e 2100),
-    # tratamos como ano calendário (2020 -> 2020-01-01 etc),
-    # evitando aquele comportamento bizarro de 1970 + nanossegundos.
-    col = df[datetime_col]
-
-    try:
-        from pandas.api.types import is_integer_dtype, is_float_dtype
-        is_numeric = is_integer_dtype(col) or is_float_dtype(col)
-    except Exception:
-        # fallback se der algum problema no import
-        is_numeric = False
-
-    if is_numeric and col.dropna().between(1900, 2100).all():
-        # Trata como ano: converte pra string e usa o formato %Y
-        df[datetime_col] = pd.to_datetime(col.astype(int).astype(str), format="%Y")
-    else:
-        # Caso geral: deixa o pandas converter do jeito padrão
-        df[datetime_col] = pd.to_datetime(col)
-
-    # Ordena pela coluna temporal
-    df = df.sort_values(datetime_col).reset_index(drop=True)
-    # ========= FIM DO AJUSTE DA COLUNA DE TEMPO =========
+    # Coluna temporal (anos numéricos viram datas de verdade; sem data = descartada) + ordenação
+    with timer.stage("parse_datetime"):
+        df[datetime_col] = parse_time_column(df[datetime_col], time_hint)
+        df = df.dropna(subset=[datetime_col])
+        df = df.sort_values(datetime_col).reset_index(drop=True)
 
     # Colunas numéricas usadas pelo modelo
-    numeric_cols = [target_col] + exog_cols
+    numeric_cols = config.numeric_columns
 
     # Converte para numérico (erros viram NaN)
-    for col_num in numeric_cols:
-        df[col_num] = pd.to_numeric(df[col_num], errors="coerce")
+    with timer.stage("to_numeric"):
+        for col_num in numeric_cols:
+            df[col_num] = pd.to_numeric(df[col_num], errors="coerce")
+
+    # Agregação no eixo temporal (AGGREGATION): linhas com o mesmo passo de
+    # FREQUENCY viram uma só, então cada janela cobre passos de tempo reais
+    with timer.stage("aggregate"):
+        df, rows_per_step = aggregate_time_axis(
+            df, datetime_col, numeric_cols, config.aggregation, config.frequency
+        )
+    if rows_per_step is not None:
+        print(
+            f"Agregação {config.aggregation} por {config.frequency}: "
+            f"{int(rows_per_step.sum())} linhas -> {len(rows_per_step)} passos"
+        )
 
     # Tratamento de missing conforme config
-    fill_method = cfg.get("FILL_MISSING", "ffill").lower()
-    if fill_method == "ffill":
-        df[numeric_cols] = df[numeric_cols].ffill().bfill()
-    elif fill_method == "bfill":
-        df[numeric_cols] = df[numeric_cols].bfill().ffill()
-    elif fill_method == "mean":
-        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
-    elif fill_method == "median":
-        df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
-    elif fill_method == "zero":
-        df[numeric_cols] = df[numeric_cols].fillna(0.0)
-    elif fill_method == "drop":
-        df = df.dropna(subset=numeric_cols)
-    else:
-        # fallback: forward + backward fill
-        df[numeric_cols] = df[numeric_cols].ffill().bfill()
+    with timer.stage("fill_missing"):
+        df = fill_missing_values(df, numeric_cols, config.fill_missing)
 
-    # Matriz de dados numéricos
-    data = df[numeric_cols].values.astype("float32")
-
-    # Escalonamento
-    scale_method = cfg.get("SCALE_METHOD", "MINMAX").upper()
-    scaler = None
-    if scale_method == "STANDARD":
-        scaler = StandardScaler()
-        data_scaled = scaler.fit_transform(data)
-    elif scale_method == "NONE":
-        data_scaled = data
-    else:
-        # MINMAX default
-        scaler = MinMaxScaler()
-        data_scaled = scaler.fit_transform(data)
+    # Matriz de dados numéricos + escalonamento
+    with timer.stage("scale"):
+        data = df[numeric_cols].values.astype("float32")
+        data_scaled, scaler = scale_data(data, config.scale_method)
 
     return df, data_scaled, scaler
 
+
+def prepare_grouped_series(
+    df: pd.DataFrame,
+    config: ForecastConfig,
+    timer: Optional[StageTimer] = None,
+    time_hint: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[str], List[pd.DataFrame], np.ndarray, np.ndarray, Optional[object]]:
+    """
+    Versão multi-série (GROUP_BY_COLUMN) de prepare_time_series_data:
+    - separa o frame por grupo uma única vez (groupby)
+    - agrega e trata missing dentro de cada grupo (um grupo não vaza no outro)
+    - descarta grupos curtos demais para uma janela (HISTORY_WINDOW + FORECAST_HORIZON)
+    - escala tudo com UM scaler, ajustado nas séries concatenadas
+    Retorna:
+      grupos, frames por grupo, data_scaled concatenado, linhas por grupo, scaler
+    """
+    timer = timer or StageTimer("forecast")
+    datetime_col = config.datetime_column
+    group_col = config.group_by_column
+    numeric_cols = config.numeric_columns
+
+    df = df.copy()
+    with timer.stage("parse_datetime"):
+        df[datetime_col] = parse_time_column(df[datetime_col], time_hint)
+        df = df.dropna(subset=[datetime_col, group_col])
+        if isinstance(df[group_col].dtype, pd.CategoricalDtype):
+            # já veio category (mapa de dtypes do perfil): categorias em ordem
+            # alfabética, para os grupos saírem na mesma ordem do texto
+            used = df[group_col].cat.remove_unused_categories().cat.categories
+            df[group_col] = df[group_col].cat.set_categories(sorted(used))
+        else:
+            df[group_col] = df[group_col].astype(str)
+    with timer.stage("to_numeric"):
+        for col_num in numeric_cols:
+            df[col_num] = pd.to_numeric(df[col_num], errors="coerce")
+
+    if config.max_groups > 0:
+        keep = df[group_col].value_counts().index[: config.max_groups]
+        df = df[df[group_col].isin(keep)]
+
+    min_rows = config.history_window + config.forecast_horizon
+    groups: List[str] = []
+    frames: List[pd.DataFrame] = []
+    skipped = 0
+    with timer.stage("split_groups"):
+        for name, part in df.groupby(group_col, sort=True, observed=True):
+            part = part.sort_values(datetime_col, kind="stable")
+            part, _ = aggregate_time_axis(
+                part, datetime_col, numeric_cols, config.aggregation, config.frequency
+            )
+            part = fill_missing_values(part[[datetime_col] + numeric_cols], numeric_cols, config.fill_missing)
+            if len(part) < min_rows:
+                skipped += 1
+                continue
+            groups.append(str(name))
+            frames.append(part.reset_index(drop=True))
+
+    if not frames:
+        raise ValueError(
+            f"Nenhum grupo de {group_col} tem linhas suficientes "
+            f"(mínimo HISTORY_WINDOW + FORECAST_HORIZON = {min_rows})."
+        )
+    print(f"{group_col}: {len(groups)} grupos usados, {skipped} descartados (menos de {min_rows} linhas)")
+
+    with timer.stage("scale"):
+        lengths = np.array([len(f) for f in frames], dtype="int64")
+        data = np.concatenate([f[numeric_cols].to_numpy(dtype="float32") for f in frames])
+        data_scaled, scaler = scale_data(data, config.scale_method)
+
+    return groups, frames, np.asarray(data_scaled, dtype="float32"), lengths, scaler
+
+
 def create_sequences(
     data: np.ndarray,
     window: int,
@@ -185,17 +218,12 @@ def create_sequences(
     Cria janelas de treinamento:
       X: [janela_passado, n_features]
       y: [horizonte_futuro] (somente target)
-    """
-    X, y = [], []
-    n_samples = len(data)
 
-    max_start = n_samples - window - horizon + 1
-    for start in range(0, max_start, step):
-        end = start + window
-        X.append(data[start:end, :])
-        y.append(data[end : end + horizon, 0])
-
-    return np.array(X, dtype="float32"), np.array(y, dtype="float32")
+    As janelas são views somente leitura sobre `data` (ver app.ml.windowing),
+    então nenhuma janela é copiada aqui. Só a série é convertida para float32, se preciso.
+    """
+    data = np.asarray(data, dtype="float32")
+    return sliding_windows(data, window, horizon, step=step)
 
 
 # =========================
@@ -206,11 +234,37 @@ def rmse_metric(y_true, y_pred):
     return tf.sqrt(tf.reduce_mean(tf.square(y_pred - y_true)))
 
 
+def cpu_supports_bf16() -> bool:
+    """CPU com instruções bfloat16 nativas (AVX512-BF16 ou AMX), segundo /proc/cpuinfo."""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = line.split()
+                    return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        pass
+    return False
+
+
+def apply_precision(config: ForecastConfig) -> None:
+    """
+    Política de precisão global do Keras (PRECISION). Sempre aplicada, para que
+    um worker reaproveitado não herde a política do treino anterior.
+    """
+    if config.precision == "mixed_bfloat16" and not cpu_supports_bf16():
+        print("PRECISION=mixed_bfloat16 sem suporte nativo na CPU: o treino pode ficar mais lento.")
+    if config.precision == "mixed_float16" and not tf.config.list_physical_devices("GPU"):
+        print("PRECISION=mixed_float16 sem GPU: float16 na CPU costuma ser mais lento que float32.")
+    tf.keras.mixed_precision.set_global_policy(config.precision)
+
+
 def build_lstm_from_config(
     input_window: int,
     n_features: int,
     horizon: int,
-    cfg: Dict[str, str],
+    config: ForecastConfig,
+    n_groups: int = 0,
 ) -> tf.keras.Model:
     """
     Monta uma LSTM sofisticada conforme o .env:
@@ -218,26 +272,41 @@ def build_lstm_from_config(
       - bidirecional opcional
       - dropout normal, recorrente e entre camadas
       - camadas densas finais
-    """
-    lstm_layers = _parse_int_list(cfg.get("LSTM_LAYERS", "64"))
-    dense_layers = _parse_int_list(cfg.get("DENSE_LAYERS", ""))
+      - embedding do grupo (GROUP_EMBEDDING_DIM) concatenado à saída da LSTM,
+        quando n_groups > 0; aí o modelo recebe {"series": X, "group": ids}
+      - modos de desempenho opcionais: JIT_COMPILE (XLA), PRECISION
+        (mixed_bfloat16 / mixed_float16; a saída fica em float32) e FUSED_LSTM
 
-    dropout_lstm = _get_float(cfg, "DROPOUT_LSTM", 0.2)
-    recurrent_dropout = _get_float(cfg, "DROPOUT_RECURRENT", 0.0)
-    dropout_between_lstm = _get_float(cfg, "DROPOUT_BETWEEN_LSTM", 0.0)
-    dropout_dense = _get_float(cfg, "DROPOUT_DENSE", 0.0)
-
-    bidirectional = _get_bool(cfg, "BIDIRECTIONAL", False)
+    As camadas com pesos têm nomes fixos (lstm_i, group_embedding, dense_i,
+    output): é por eles que model_weights() exporta os pesos para o bundle.
+    """
+    lstm_layers = config.lstm_layers
+    dense_layers = config.dense_layers
+
+    dropout_lstm = config.dropout_lstm
+    recurrent_dropout = config.dropout_recurrent
+    if recurrent_dropout > 0.0:
+        # dropout recorrente obriga o Keras a usar o kernel genérico da LSTM
+        # (4 matmuls por passo em vez de 1 fundida, e sem cuDNN na GPU)
+        if config.fused_lstm == "auto":
+            print(f"FUSED_LSTM=auto: ignorando DROPOUT_RECURRENT={recurrent_dropout} para usar o kernel fundido.")
+            recurrent_dropout = 0.0
+        else:
+            print(
+                f"Aviso: DROPOUT_RECURRENT={recurrent_dropout} desliga o kernel fundido da LSTM "
+                "(treino mais lento). Use FUSED_LSTM=auto para ignorá-lo."
+            )
+    dropout_between_lstm = config.dropout_between_lstm
+    dropout_dense = config.dropout_dense
 
-    loss_fn = cfg.get("LOSS_FUNCTION", "mse")
-    optimizer_name = cfg.get("OPTIMIZER", "adam").lower()
-    learning_rate = _get_float(cfg, "LEARNING_RATE", 1e-3)
+    bidirectional = config.bidirectional
 
-    metric_names = _parse_str_list(cfg.get("METRICS", "mse,mae,rmse"))
+    loss_fn = config.loss_function
+    optimizer_name = config.optimizer
+    learning_rate = config.learning_rate
 
     metrics = []
-    for m in metric_names:
-        m_low = m.lower()
+    for m_low in config.metrics:
         if m_low == "rmse":
             metrics.append(rmse_metric)
         elif m_low in ("mse", "mae"):
@@ -248,7 +317,10 @@ def build_lstm_from_config(
     else:
         optimizer = Adam(learning_rate=learning_rate)
 
-    model = Sequential()
+    apply_precision(config)
+
+    series_input = Input(shape=(input_window, n_features), name="series")
+    h = series_input
 
     # Empilha camadas LSTM
     for i, units in enumerate(lstm_layers):
@@ -262,130 +334,370 @@ def build_lstm_from_config(
             recurrent_dropout=recurrent_dropout,
         )
 
-        if i == 0:
-            lstm_kwargs["input_shape"] = (input_window, n_features)
-
         if bidirectional:
-            lstm_layer = Bidirectional(LSTM(**lstm_kwargs))
+            lstm_layer = Bidirectional(LSTM(**lstm_kwargs), name=f"lstm_{i}")
         else:
-            lstm_layer = LSTM(**lstm_kwargs)
+            lstm_layer = LSTM(**lstm_kwargs, name=f"lstm_{i}")
 
-        model.add(lstm_layer)
+        h = lstm_layer(h)
 
         # Dropout extra entre LSTM, se configurado
         if return_sequences and dropout_between_lstm > 0.0:
-            model.add(Dropout(dropout_between_lstm))
+            h = Dropout(dropout_between_lstm)(h)
+
+    inputs = series_input
+    use_embedding = n_groups > 0 and config.group_embedding_dim > 0
+    if use_embedding:
+        group_input = Input(shape=(1,), dtype="int32", name="group")
+        embedded = Embedding(n_groups, config.group_embedding_dim, name="group_embedding")(group_input)
+        h = Concatenate()([h, Flatten()(embedded)])
+        inputs = {"series": series_input, "group": group_input}
 
     # Camadas densas finais
-    for units in dense_layers:
-        model.add(Dense(units, activation="relu"))
+    for i, units in enumerate(dense_layers):
+        h = Dense(units, activation="relu", name=f"dense_{i}")(h)
         if dropout_dense > 0.0:
-            model.add(Dropout(dropout_dense))
+            h = Dropout(dropout_dense)(h)
 
     # Saída: horizonte completo
-    model.add(Dense(horizon))
+    output = Dense(horizon, name="output", dtype="float32")(h)
 
+    model = Model(inputs=inputs, outputs=output)
     model.compile(
         loss=loss_fn,
         optimizer=optimizer,
         metrics=metrics,
+        jit_compile=config.jit_compile,
     )
 
     return model
 
 
+def _weight_layer_names(model: tf.keras.Model, config: ForecastConfig) -> List[str]:
+    names = [f"lstm_{i}" for i in range(len(config.lstm_layers))]
+    if any(layer.name == "group_embedding" for layer in model.layers):
+        names.append("group_embedding")
+    names += [f"dense_{i}" for i in range(len(config.dense_layers))]
+    names.append("output")
+    return names
+
+
+def model_weights(model: tf.keras.Model, config: ForecastConfig) -> List[np.ndarray]:
+    """
+    Pesos na ordem que app.ml.bundle.forward espera:
+    LSTMs, embedding do grupo (se houver), densas, saída.
+    """
+    weights: List[np.ndarray] = []
+    for name in _weight_layer_names(model, config):
+        weights.extend(model.get_layer(name).get_weights())
+    return weights
+
+
+def set_model_weights(model: tf.keras.Model, config: ForecastConfig, weights: List[np.ndarray]) -> None:
+    """Inverso de model_weights: carrega no modelo os pesos de um bundle."""
+    pos = 0
+    for name in _weight_layer_names(model, config):
+        layer = model.get_layer(name)
+        n = len(layer.get_weights())
+        layer.set_weights(weights[pos:pos + n])
+        pos += n
+    if pos != len(weights):
+        raise ValueError(f"Bundle com {len(weights)} tensores de peso; o modelo espera {pos}.")
+
+
 # =========================
 # Pipeline completo
 # =========================
 
-def train_and_forecast_from_env(env_path: Union[str, Path]):
+class EpochProgressCallback(Callback):
     """
-    Pipeline completo:
-      - lê config_vora_lstm.env
-      - carrega CSV
-      - prepara dados
-      - treina modelo LSTM
-      - gera previsão com horizonte configurado
-
-    Retorna:
-      model: modelo treinado
-      history: dicionário com histórico de treino
-      forecast_df: DataFrame com datas futuras + previsão
+    Repassa o fim de cada época para on_epoch(epoch, epochs, logs),
+    com epoch começando em 1. Usado para reportar progresso dos jobs de forecast.
     """
-    cfg = load_env_config(env_path)
 
-    # Seed para reprodutibilidade
-    seed = _get_int(cfg, "RANDOM_SEED", 42)
-    np.random.seed(seed)
-    tf.random.set_seed(seed)
+    def __init__(self, on_epoch: Callable[[int, int, Dict[str, float]], None], epochs: int):
+        super().__init__()
+        self.on_epoch = on_epoch
+        self.epochs = epochs
 
-    csv_path = _get_str(cfg, "CSV_PATH", required=True)
-    datetime_col = _get_str(cfg, "DATETIME_COLUMN", required=True)
-    target_col = _get_str(cfg, "TARGET_COLUMN", required=True)
+    def on_epoch_end(self, epoch, logs=None):
+        logs = {k: float(v) for k, v in (logs or {}).items()}
+        self.on_epoch(epoch + 1, self.epochs, logs)
 
-    df = pd.read_csv(csv_path)
-    df, data_scaled, scaler = prepare_time_series_data(df, cfg)
 
-    history_window = _get_int(cfg, "HISTORY_WINDOW", 60)
-    forecast_horizon = _get_int(cfg, "FORECAST_HORIZON", 30)
-    window_step = _get_int(cfg, "WINDOW_STEP", 1)
+class CancelTrainingCallback(Callback):
+    """
+    Interrompe o fit no fim do batch em que should_stop() ficar verdadeiro
+    (treino ou validação), levantando TrainingCancelled: nem o resto da época
+    nem a validação dela rodam.
+    """
 
-    X, y = create_sequences(data_scaled, history_window, forecast_horizon, step=window_step)
+    def __init__(self, should_stop: Callable[[], bool]):
+        super().__init__()
+        self.should_stop = should_stop
 
-    if len(X) < 2:
-        raise ValueError("Poucos dados para criar janelas. Ajuste HISTORY_WINDOW e FORECAST_HORIZON.")
+    def _check(self, batch, logs=None):
+        if self.should_stop():
+            raise TrainingCancelled("Treino cancelado.")
 
-    train_split = float(cfg.get("TRAIN_TEST_SPLIT", 0.8))
-    n_samples = len(X)
-    n_train = max(1, int(n_samples * train_split))
-    n_train = min(n_train, n_samples - 1)
+    on_train_batch_end = _check
+    on_test_batch_end = _check
 
-    X_train, X_val = X[:n_train], X[n_train:]
-    y_train, y_val = y[:n_train], y[n_train:]
 
-    n_features = X.shape[2]
-    model = build_lstm_from_config(history_window, n_features, forecast_horizon, cfg)
+def evaluate_loss(model: tf.keras.Model, inputs: TrainingInput, config: ForecastConfig) -> float:
+    """Perda do modelo (LOSS_FUNCTION) nas janelas de training_inputs, sem treinar."""
+    if isinstance(inputs, tf.data.Dataset):
+        out = model.evaluate(inputs, verbose=0, return_dict=True)
+    else:
+        out = model.evaluate(inputs[0], inputs[1], batch_size=config.batch_size, verbose=0, return_dict=True)
+    return float(out["loss"])
 
-    epochs = _get_int(cfg, "EPOCHS", 50)
-    batch_size = _get_int(cfg, "BATCH_SIZE", 32)
-    shuffle_train = _get_bool(cfg, "SHUFFLE_TRAIN", False)
 
-    use_early_stopping = _get_bool(cfg, "USE_EARLY_STOPPING", True)
-    early_patience = _get_int(cfg, "EARLY_STOP_PATIENCE", 5)
-    early_min_delta = _get_float(cfg, "EARLY_STOP_MIN_DELTA", 0.0)
+def try_warm_start(
+    df: pd.DataFrame,
+    starts: np.ndarray,
+    warm_start: Dict[str, Any],
+    config: ForecastConfig,
+) -> Dict[str, Any]:
+    """
+    Decide se o treino parte do modelo anterior do mesmo arquivo (WARM_START).
+
+    warm_start vem de forecast_cache.find_warm_start: {"key", "bundle_dir",
+    "reference_loss"}. Janelas novas = as que têm no alvo alguma linha posterior
+    à última data do modelo anterior. O modelo anterior é avaliado nelas (com o
+    scaler dele): se a perda passar de DRIFT_THRESHOLD x reference_loss, os dados
+    mudaram demais e o treino é completo.
+
+    Devolve {"mode": "warm_start" | "full", "reason", ...}; com warm_start traz
+    também model (com os pesos anteriores), scaler, data_scaled e starts (janelas
+    novas + até REPLAY_WINDOWS janelas antigas logo antes delas).
+    """
+    def full(reason: str, **extra: Any) -> Dict[str, Any]:
+        return {"mode": "full", "reason": reason, **extra}
+
+    try:
+        base = BundleModel(warm_start["bundle_dir"])
+    except (OSError, ValueError, KeyError) as e:
+        return full(f"modelo anterior ilegível: {e}")
+    if base.groups is not None or base.config.architecture_fields() != config.architecture_fields():
+        return full("modelo anterior com outra arquitetura")
+    ref_loss = warm_start.get("reference_loss")
+    if not ref_loss:
+        return full("modelo anterior sem perda de referência")
+
+    history_window = config.history_window
+    forecast_horizon = config.forecast_horizon
+    n_old = int(df[config.datetime_column].searchsorted(base.last_date, side="right"))
+    first_new = max(0, n_old - history_window - forecast_horizon + 1)
+    new_starts = starts[starts >= first_new]
+    if n_old >= len(df) or len(new_starts) == 0:
+        return full("sem períodos novos desde o último treino")
+
+    data = df[config.numeric_columns].to_numpy(dtype="float32")
+    data_scaled = np.asarray(base.scaler.transform(data), dtype="float32")
+
+    model = build_lstm_from_config(history_window, data.shape[1], forecast_horizon, config)
+    set_model_weights(model, config, base.weights)
+    with training_series(data_scaled, config) as series:
+        new_loss = evaluate_loss(model, training_inputs(series, new_starts, config), config)
+
+    drift = new_loss / ref_loss
+    if not np.isfinite(drift) or drift > config.drift_threshold:
+        return full(f"drift {drift:.2f} > DRIFT_THRESHOLD {config.drift_threshold}", drift=drift)
+
+    older = starts[starts < new_starts[0]]
+    replay = older[len(older) - min(config.replay_windows, len(older)):]
+    return {
+        "mode": "warm_start",
+        "reason": f"drift {drift:.2f} <= DRIFT_THRESHOLD {config.drift_threshold}",
+        "drift": drift,
+        "base_model": warm_start.get("key"),
+        "new_windows": int(len(new_starts)),
+        "replay_windows": int(len(replay)),
+        "model": model,
+        "scaler": base.scaler,
+        "data_scaled": data_scaled,
+        "starts": np.concatenate([replay, new_starts]),
+    }
+
+
+def fit_model(
+    model: tf.keras.Model,
+    train: TrainingInput,
+    val: Optional[TrainingInput],
+    config: ForecastConfig,
+    on_epoch: Optional[Callable[[int, int, Dict[str, float]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, List[float]]:
+    """
+    model.fit com early stopping / progresso conforme a config; devolve o history.
+    train / val vêm de training_inputs: um tf.data já em batches ou a tupla (X, y).
+    should_stop (opcional): cancelamento, conferido a cada batch (TrainingCancelled).
+    """
+    epochs = config.epochs
+    has_val = val is not None
+    if should_stop is not None and should_stop():
+        raise TrainingCancelled("Treino cancelado.")
 
     callbacks = []
-    if use_early_stopping and len(X_val) > 0:
+    if config.use_early_stopping and has_val:
         callbacks.append(
             EarlyStopping(
                 monitor="val_loss",
-                patience=early_patience,
-                min_delta=early_min_delta,
+                patience=config.early_stop_patience,
+                min_delta=config.early_stop_min_delta,
                 restore_best_weights=True,
             )
         )
 
-    fit_kwargs = dict(
-        x=X_train,
-        y=y_train,
-        epochs=epochs,
-        batch_size=batch_size,
-        shuffle=shuffle_train,
-        verbose=1,
-    )
+    if isinstance(train, tf.data.Dataset):
+        # batch e embaralhamento já feitos no pipeline (shuffle=False só evita o aviso do Keras)
+        fit_kwargs = dict(x=train, epochs=epochs, shuffle=False, verbose=1)
+    else:
+        fit_kwargs = dict(
+            x=train[0],
+            y=train[1],
+            epochs=epochs,
+            batch_size=config.batch_size,
+            shuffle=config.shuffle_train,
+            verbose=1,
+        )
+
+    if on_epoch is not None:
+        callbacks.append(EpochProgressCallback(on_epoch, epochs))
+    if should_stop is not None:
+        callbacks.append(CancelTrainingCallback(should_stop))
 
-    if len(X_val) > 0:
-        fit_kwargs["validation_data"] = (X_val, y_val)
+    if has_val:
+        fit_kwargs["validation_data"] = val
     if callbacks:
         fit_kwargs["callbacks"] = callbacks
 
     history_obj = model.fit(**fit_kwargs)
-    history = history_obj.history
+    return history_obj.history
+
+
+def save_outputs(model: tf.keras.Model, forecast_df: pd.DataFrame, config: ForecastConfig) -> None:
+    """Salva modelo e CSV de previsão, se configurado (SAVE_MODEL_PATH / SAVE_FORECAST_CSV_PATH)."""
+    if config.save_model_path:
+        Path(config.save_model_path).parent.mkdir(parents=True, exist_ok=True)
+        model.save(config.save_model_path)
+
+    if config.save_forecast_csv_path:
+        Path(config.save_forecast_csv_path).parent.mkdir(parents=True, exist_ok=True)
+        forecast_df.to_csv(config.save_forecast_csv_path, index=False)
+
+
+def train_and_forecast(
+    df: pd.DataFrame,
+    config: ForecastConfig,
+    on_epoch: Optional[Callable[[int, int, Dict[str, float]], None]] = None,
+    timer: Optional[StageTimer] = None,
+    warm_start: Optional[Dict[str, Any]] = None,
+    time_hint: Optional[Dict[str, Any]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Treina e prevê a partir de um DataFrame já carregado:
+      - prepara dados
+      - treina modelo LSTM
+      - gera previsão com horizonte configurado
+
+    on_epoch (opcional) é chamado ao fim de cada época com (época, total, logs);
+    timer (opcional) recebe a duração de cada etapa (ver app.services.metrics).
+    warm_start (opcional, com WARM_START): modelo anterior do mesmo arquivo
+    (forecast_cache.find_warm_start); ver try_warm_start.
+    time_hint (opcional): tipo da coluna temporal pelo perfil do dataset.
+    should_stop (opcional): cancelamento do treino (ver fit_model).
+
+    Retorna um dicionário com:
+      model, history, forecast_df, scaler (ou None, se SCALE_METHOD=NONE),
+      last_window (últimas HISTORY_WINDOW linhas, sem escala), last_date e frequency,
+      weights (pesos na ordem do bundle, ver model_weights),
+      stages (segundos por etapa: parse_datetime, ..., fit, predict, save_outputs),
+      warm_start (modo do treino: "warm_start" ou "full", e o motivo)
+
+    Com GROUP_BY_COLUMN, delega para train_and_forecast_grouped.
+    """
+    if config.group_by_column:
+        return train_and_forecast_grouped(
+            df, config, on_epoch=on_epoch, timer=timer, warm_start=warm_start,
+            time_hint=time_hint, should_stop=should_stop,
+        )
+
+    timer = timer or StageTimer("forecast")
+
+    # Seed para reprodutibilidade
+    seed = config.random_seed
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+    datetime_col = config.datetime_column
+    target_col = config.target_column
+
+    df, data_scaled, scaler = prepare_time_series_data(df, config, timer, time_hint)
+
+    history_window = config.history_window
+    forecast_horizon = config.forecast_horizon
+
+    n_samples = count_windows(len(data_scaled), history_window, forecast_horizon, config.window_step)
+
+    if n_samples < 2:
+        raise ValueError("Poucos dados para criar janelas. Ajuste HISTORY_WINDOW e FORECAST_HORIZON.")
+
+    n_train = max(1, int(n_samples * config.train_test_split))
+    n_train = min(n_train, n_samples - 1)
+
+    # janelas identificadas só pelo início; treino/validação = faixas de início
+    starts = np.arange(n_samples, dtype="int64") * config.window_step
+
+    n_features = data_scaled.shape[1]
+    train_starts, val_starts = starts[:n_train], starts[n_train:]
+    fit_config = config
+    # perda de referência para o próximo teste de drift (None = a do history, ver forecast_cache)
+    ref_loss = None
+
+    # Treino incremental: parte dos pesos do modelo anterior e só revê as janelas novas
+    warm: Dict[str, Any] = {"mode": "full", "reason": "WARM_START desligado"}
+    if config.warm_start:
+        if warm_start is None:
+            warm = {"mode": "full", "reason": "nenhum modelo anterior compatível"}
+        else:
+            with timer.stage("warm_start_check"):
+                warm = try_warm_start(df, starts, warm_start, config)
+
+    if warm["mode"] == "warm_start":
+        model = warm.pop("model")
+        scaler = warm.pop("scaler")
+        data_scaled = warm.pop("data_scaled")
+        train_starts, val_starts = warm.pop("starts"), starts[:0]
+        fit_config = config.with_overrides(epochs=config.warm_start_epochs, use_early_stopping=False)
+        # o ajuste incremental não tem validação: a perda de treino em poucas janelas
+        # não serve de referência, então segue a val_loss do modelo treinado por completo
+        ref_loss = warm_start["reference_loss"]
+        print(
+            f"Warm start a partir de {warm['base_model']}: {warm['new_windows']} janelas novas "
+            f"+ {warm['replay_windows']} de replay, {fit_config.epochs} épocas ({warm['reason']})"
+        )
+    else:
+        with timer.stage("build_model"):
+            model = build_lstm_from_config(history_window, n_features, forecast_horizon, config)
+
+    with timer.stage("fit"), training_series(data_scaled, config) as series:
+        history = fit_model(
+            model,
+            training_inputs(series, train_starts, config),
+            training_inputs(series, val_starts, config),
+            fit_config,
+            on_epoch,
+            should_stop,
+        )
 
     # Previsão usando a última janela
-    last_window = data_scaled[-history_window:, :].reshape(1, history_window, n_features)
-    forecast_scaled = model.predict(last_window)
-    forecast_scaled = forecast_scaled[0]
+    with timer.stage("predict"):
+        last_window = data_scaled[-history_window:, :].reshape(1, history_window, n_features)
+        forecast_scaled = model.predict(last_window)
+        forecast_scaled = forecast_scaled[0]
 
     # Desescalar somente o target
     if scaler is not None:
@@ -398,42 +710,214 @@ def train_and_forecast_from_env(env_path: Union[str, Path]):
 
     # Construir datas futuras
     last_date = df[datetime_col].iloc[-1]
-    freq = cfg.get("FREQUENCY", "D")
+    freq = resolve_frequency(config.frequency, df[datetime_col])
 
-    try:
-        offset = pd.tseries.frequencies.to_offset(freq)
-    except (ValueError, TypeError):
-        inferred = pd.infer_freq(df[datetime_col])
-        if inferred is None:
-            inferred = "D"
-        freq = inferred
-        offset = pd.tseries.frequencies.to_offset(freq)
-
-    future_dates = pd.date_range(
-        start=last_date + offset,
-        periods=forecast_horizon,
-        freq=freq,
+    forecast_df = pd.DataFrame(
+        {
+            datetime_col: future_dates(last_date, freq, forecast_horizon),
+            f"forecast_{target_col}": forecast_values,
+        }
     )
 
+    with timer.stage("save_outputs"):
+        save_outputs(model, forecast_df, config)
+
+    return {
+        "model": model,
+        "history": history,
+        "forecast_df": forecast_df,
+        "scaler": scaler,
+        "weights": model_weights(model, config),
+        # para o bundle de inferência (ver app.ml.bundle)
+        "last_window": df[config.numeric_columns].to_numpy(dtype="float32")[-history_window:],
+        "last_date": last_date,
+        "frequency": freq,
+        "stages": timer.as_dict(),
+        "warm_start": warm,
+        "reference_loss": ref_loss,
+    }
+
+
+def train_and_forecast_grouped(
+    df: pd.DataFrame,
+    config: ForecastConfig,
+    on_epoch: Optional[Callable[[int, int, Dict[str, float]], None]] = None,
+    timer: Optional[StageTimer] = None,
+    warm_start: Optional[Dict[str, Any]] = None,
+    time_hint: Optional[Dict[str, Any]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Multi-série (GROUP_BY_COLUMN): um modelo compartilhado para todos os grupos.
+      - janelas de todos os grupos num único passe vetorizado (sem cruzar grupos)
+      - split treino/validação temporal dentro de cada grupo
+      - embedding do grupo opcional (GROUP_EMBEDDING_DIM)
+      - previsão do próximo horizonte de todos os grupos num único predict
+
+    Retorna as mesmas chaves de train_and_forecast; forecast_df vem em formato
+    longo (grupo, data, forecast_<target>) e last_window/last_dates têm um item
+    por grupo, na ordem de `groups`. WARM_START ainda não vale aqui: o treino
+    é sempre completo (warm_start é ignorado).
+    """
+    timer = timer or StageTimer("forecast")
+    seed = config.random_seed
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+    datetime_col = config.datetime_column
+    target_col = config.target_column
+    group_col = config.group_by_column
+    history_window = config.history_window
+    forecast_horizon = config.forecast_horizon
+
+    groups, frames, data_scaled, lengths, scaler = prepare_grouped_series(df, config, timer, time_hint)
+
+    starts, group_idx = grouped_window_starts(
+        lengths, history_window, forecast_horizon, step=config.window_step
+    )
+    if len(starts) < 2:
+        raise ValueError("Poucos dados para criar janelas. Ajuste HISTORY_WINDOW e FORECAST_HORIZON.")
+
+    # split temporal por grupo: as primeiras janelas de cada grupo treinam, as últimas validam
+    per_group = np.bincount(group_idx, minlength=len(groups))
+    position = np.arange(len(group_idx)) - np.searchsorted(group_idx, group_idx)
+    n_train = np.clip((per_group * config.train_test_split).astype("int64"), 1, None)
+    n_train = np.minimum(n_train, np.maximum(per_group - 1, 1))
+    is_train = position < n_train[group_idx]
+
+    use_embedding = config.group_embedding_dim > 0
+    n_features = data_scaled.shape[1]
+    with timer.stage("build_model"):
+        model = build_lstm_from_config(
+            history_window, n_features, forecast_horizon, config,
+            n_groups=len(groups) if use_embedding else 0,
+        )
+
+    def model_input(windows: np.ndarray, ids: np.ndarray) -> Any:
+        if use_embedding:
+            return {"series": windows, "group": ids.reshape(-1, 1).astype("int32")}
+        return windows
+
+    def split_inputs(series: Any, mask: np.ndarray):
+        ids = group_idx[mask] if use_embedding else None
+        return training_inputs(series, starts[mask], config, group_ids=ids)
+
+    with timer.stage("fit"), training_series(data_scaled, config) as series:
+        history = fit_model(
+            model,
+            split_inputs(series, is_train),
+            split_inputs(series, ~is_train),
+            config,
+            on_epoch,
+            should_stop,
+        )
+
+    # Previsão: a última janela de cada grupo, todas num único predict
+    ends = np.cumsum(lengths)
+    last_idx = ends[:, None] - history_window + np.arange(history_window)
+    last_windows = data_scaled[last_idx]
+    group_ids = np.arange(len(groups))
+    with timer.stage("predict"):
+        forecast_scaled = model.predict(model_input(last_windows, group_ids), batch_size=max(1, len(groups)))
+
+    # Desescalar somente o target
+    if scaler is not None:
+        dummy = np.zeros((forecast_scaled.size, n_features), dtype="float32")
+        dummy[:, 0] = forecast_scaled.reshape(-1)
+        forecast_values = scaler.inverse_transform(dummy)[:, 0].reshape(forecast_scaled.shape)
+    else:
+        forecast_values = forecast_scaled
+
+    last_dates = [f[datetime_col].iloc[-1] for f in frames]
+    freq = resolve_frequency(config.frequency, frames[0][datetime_col])
+
     forecast_df = pd.DataFrame(
         {
-            datetime_col: future_dates,
-            f"forecast_{target_col}": forecast_values,
+            group_col: np.repeat(groups, forecast_horizon),
+            datetime_col: np.concatenate(
+                [future_dates(d, freq, forecast_horizon).to_numpy() for d in last_dates]
+            ),
+            f"forecast_{target_col}": forecast_values.reshape(-1),
         }
     )
 
-    # Salvar, se configurado
-    save_model_path = cfg.get("SAVE_MODEL_PATH", "").strip()
-    if save_model_path:
-        Path(save_model_path).parent.mkdir(parents=True, exist_ok=True)
-        model.save(save_model_path)
+    with timer.stage("save_outputs"):
+        save_outputs(model, forecast_df, config)
+
+    raw = np.concatenate([f[config.numeric_columns].to_numpy(dtype="float32") for f in frames])
+    return {
+        "model": model,
+        "history": history,
+        "forecast_df": forecast_df,
+        "scaler": scaler,
+        "weights": model_weights(model, config),
+        "groups": groups,
+        "last_window": raw[last_idx],
+        "last_date": max(last_dates),
+        "last_dates": last_dates,
+        "frequency": freq,
+        "stages": timer.as_dict(),
+        "warm_start": {
+            "mode": "full",
+            "reason": "GROUP_BY_COLUMN: treino incremental só para série única" if config.warm_start
+            else "WARM_START desligado",
+        },
+    }
+
+
+def run_forecast_pipeline(
+    config: ForecastConfig,
+    on_epoch: Optional[Callable[[int, int, Dict[str, float]], None]] = None,
+    timer: Optional[StageTimer] = None,
+    warm_start: Optional[Dict[str, Any]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Carrega o CSV de config.csv_path (só as colunas que o modelo usa; sidecar
+    Parquet, se existir) e executa train_and_forecast. O resultado traz em
+    "stages" a duração de cada etapa, incluindo a leitura (read_dataset).
+    warm_start: ver train_and_forecast. Do perfil do dataset (app.services.profiling,
+    gerado aqui na primeira vez se o arquivo ainda não tiver) vêm o tipo da coluna
+    temporal e o mapa de dtypes: texto repetitivo como category e as colunas
+    numéricas do modelo já em float32. should_stop: cancelamento (ver fit_model).
+    """
+    if not config.csv_path:
+        raise ValueError("Config obrigatória ausente: CSV_PATH")
+
+    timer = timer or StageTimer("forecast")
+    with timer.stage("profile"):
+        profile = read_profile(config.csv_path) or build_profile(config.csv_path)
+    with timer.stage("read_dataset"):
+        df = read_dataset(
+            config.csv_path,
+            columns=config.input_columns,
+            dtypes=dataset_dtypes(profile, config.numeric_columns),
+        )
+    hint = profile_time_hint(profile, config.datetime_column)
+    return train_and_forecast(
+        df, config, on_epoch=on_epoch, timer=timer, warm_start=warm_start,
+        time_hint=hint, should_stop=should_stop,
+    )
+
 
-    save_forecast_path = cfg.get("SAVE_FORECAST_CSV_PATH", "").strip()
-    if save_forecast_path:
-        Path(save_forecast_path).parent.mkdir(parents=True, exist_ok=True)
-        forecast_df.to_csv(save_forecast_path, index=False)
+def train_and_forecast_from_env(env_path: Union[str, Path]):
+    """
+    Pipeline completo:
+      - lê config_vora_lstm.env
+      - executa run_forecast_pipeline
 
-    return model, history, forecast_df
+    Retorna:
+      model: modelo treinado
+      history: dicionário com histórico de treino
+      forecast_df: DataFrame com datas futuras + previsão
+
+    As durações de cada etapa são impressas e vão para as métricas do processo.
+    """
+    timer = StageTimer("forecast")
+    result = run_forecast_pipeline(ForecastConfig.from_env_file(env_path), timer=timer)
+    timer.observe()
+    print("Etapas (s): " + ", ".join(f"{k}={v:.3f}" for k, v in timer.as_dict().items()))
+    return result["model"], result["history"], result["forecast_df"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# =========================
+# Janelas temporais (zero-copy)
+# =========================
+
+def count_windows(n_samples: int, window: int, horizon: int, step: int = 1) -> int:
+    """
+    Quantidade de janelas (passado + horizonte) que cabem numa série de n_samples,
+    começando em 0 e andando de `step` em `step`.
+    """
+    if window <= 0 or horizon <= 0 or step <= 0:
+        raise ValueError("window, horizon e step precisam ser maiores que zero.")
+    max_start = n_samples - window - horizon + 1
+    if max_start <= 0:
+        return 0
+    return (max_start - 1) // step + 1
+
+
+def sliding_windows(
+    data: np.ndarray,
+    window: int,
+    horizon: int,
+    step: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cria as janelas de treino como *views* somente leitura sobre `data`, sem copiar:
+      X: [n_janelas, window, n_features]
+      y: [n_janelas, horizon] (somente o target, coluna 0)
+
+    A janela i começa na linha i * step, exatamente como o loop antigo de create_sequences.
+    Para obter arrays contíguos (ex.: um batch), use materialize_windows / iter_window_batches.
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    if data.ndim != 2:
+        raise ValueError("data precisa ser 2D: [n_amostras, n_features].")
+
+    n_samples, n_features = data.shape
+    n_windows = count_windows(n_samples, window, horizon, step)
+
+    if n_windows == 0:
+        X_empty = np.empty((0, window, n_features), dtype=data.dtype)
+        y_empty = np.empty((0, horizon), dtype=data.dtype)
+        X_empty.flags.writeable = False
+        y_empty.flags.writeable = False
+        return X_empty, y_empty
+
+    max_start = n_samples - window - horizon + 1
+
+    # sliding_window_view devolve [n, n_features, window]; só trocamos os eixos (continua view)
+    X = sliding_window_view(data, window, axis=0).transpose(0, 2, 1)[:max_start:step]
+    y = sliding_window_view(data[window:, 0], horizon)[:max_start:step]
+
+    return X, y
+
+
+def windows_at(
+    data: np.ndarray,
+    starts: np.ndarray,
+    window: int,
+    horizon: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Janelas que começam nas linhas `starts` (cópia, indexação por lista):
+      X: [len(starts), window, n_features], y: [len(starts), horizon]
+    Funciona também com np.memmap (só as linhas usadas são lidas).
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    starts = np.asarray(starts, dtype="int64")
+    X = np.asarray(data[starts[:, None] + np.arange(window)])
+    y = np.asarray(data[starts[:, None] + np.arange(window, window + horizon), 0])
+    return X, y
+
+
+def grouped_window_starts(
+    lengths: np.ndarray,
+    window: int,
+    horizon: int,
+    step: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Várias séries concatenadas (uma após a outra, com `lengths` linhas cada):
+    devolve (início global, índice da série) de cada janela, sem nenhuma janela
+    atravessar a fronteira entre duas séries. Tudo vetorizado, sem loop por série.
+    """
+    if window <= 0 or horizon <= 0 or step <= 0:
+        raise ValueError("window, horizon e step precisam ser maiores que zero.")
+    lengths = np.asarray(lengths, dtype="int64")
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype("int64")
+
+    max_start = lengths - window - horizon + 1
+    per_series = np.where(max_start > 0, (max_start - 1) // step + 1, 0)
+
+    series_idx = np.repeat(np.arange(len(lengths)), per_series)
+    first_of_series = np.repeat(np.cumsum(per_series) - per_series, per_series)
+    position = np.arange(int(per_series.sum())) - first_of_series
+
+    return offsets[series_idx] + position * step, series_idx
+
+
+def grouped_windows(
+    data: np.ndarray,
+    lengths: np.ndarray,
+    window: int,
+    horizon: int,
+    step: int = 1,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Janelas de todas as séries de uma vez (ver grouped_window_starts):
+      X: [n_janelas, window, n_features], y: [n_janelas, horizon], série de cada janela.
+    Aqui as janelas são copiadas (indexação por lista de inícios).
+    """
+    starts, series_idx = grouped_window_starts(lengths, window, horizon, step)
+    X, y = windows_at(data, starts, window, horizon)
+    return X, y, series_idx
+
+
+def materialize_windows(
+    X: np.ndarray,
+    y: np.ndarray,
+    indices: Optional[np.ndarray] = None,
+    dtype: str = "float32",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Copia (todas ou só `indices`) as janelas para arrays contíguos e graváveis.
+    É o único ponto em que a memória proporcional a n_janelas * window é alocada.
+    """
+    if indices is not None:
+        X = X[indices]
+        y = y[indices]
+    return np.ascontiguousarray(X, dtype=dtype), np.ascontiguousarray(y, dtype=dtype)
+
+
+def iter_window_batches(
+    X: np.ndarray,
+    y: np.ndarray,
+    batch_size: int,
+    start: int = 0,
+    stop: Optional[int] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    dtype: str = "float32",
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Percorre as janelas [start, stop) em batches materializados sob demanda.
+    Só um batch por vez existe em memória como cópia.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size precisa ser maior que zero.")
+
+    stop = len(X) if stop is None else min(stop, len(X))
+    order = np.arange(start, stop)
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+
+    for i in range(0, len(order), batch_size):
+        yield materialize_windows(X, y, order[i : i + batch_size], dtype=dtype)
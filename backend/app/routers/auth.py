@@ -1,20 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
-import os
 
 import oracledb  # <-- Oracle DB driver
 
 from app.models.user import UserOut
+from app.services.database import database
+from app.services.passwords import ExecutorBusy, hash_password, verify_password
 
 router = APIRouter(tags=["Auth"])
 
-# ---------- CONFIG ORACLE (via .env) ----------
-ORACLE_USER = os.getenv("ORACLE_USER")
-ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD")
-ORACLE_DSN = os.getenv("ORACLE_DSN")  # ex: "host:porta/servicename"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def busy_error() -> HTTPException:
+    """Fila de hash de senha cheia: pede para o cliente tentar de novo em instantes."""
+    return HTTPException(
+        status_code=503,
+        detail="Servidor ocupado, tente novamente em instantes.",
+        headers={"Retry-After": "1"},
+    )
 
 
 # ---------- MODELOS ----------
@@ -29,31 +31,15 @@ class LoginRequest(BaseModel):
     senha: str
 
 
-# ---------- CONEXÃO COM ORACLE ----------
-
-def get_conn():
-    """
-    Abre conexão com o Oracle usando python-oracledb em modo thin.
-    Certifique-se que ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN estão no .env
-    """
-    if not ORACLE_USER or not ORACLE_PASSWORD or not ORACLE_DSN:
-        raise RuntimeError("Configuração ORACLE_* ausente no .env")
-
-    return oracledb.connect(
-        user=ORACLE_USER,
-        password=ORACLE_PASSWORD,
-        dsn=ORACLE_DSN,
-    )
-
+# ---------- SCHEMA ORACLE ----------
 
-def init_db():
+@database.on_open
+async def init_db(conn):
     """
-    Cria tabela USERS se não existir.
+    Cria tabela USERS se não existir (roda no startup, quando o pool abre).
     Usa bloco PL/SQL para ignorar erro de 'table already exists' (ORA-00955).
     """
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
+    await conn.execute(
         """
         BEGIN
             EXECUTE IMMEDIATE '
@@ -71,13 +57,7 @@ def init_db():
         END;
         """
     )
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-# cria tabela na importação
-init_db()
+    await conn.commit()
 
 
 # ---------- ROTAS ----------
@@ -90,23 +70,21 @@ async def register(payload: RegisterRequest):
     if len(payload.senha) > 72:
         raise HTTPException(status_code=400, detail="A senha deve ter no máximo 72 caracteres.")
 
-    password_hash = pwd_context.hash(payload.senha)
+    try:
+        password_hash = await hash_password(payload.senha)
+    except ExecutorBusy:
+        raise busy_error()
 
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO users (email, password_hash) VALUES (:1, :2)",
-            (payload.email, password_hash),
-        )
-        conn.commit()
-
-        # pega o id gerado
-        cur.execute("SELECT id FROM users WHERE email = :1", (payload.email,))
-        row = cur.fetchone()
-
-        cur.close()
-        conn.close()
+        async with database.connection() as conn:
+            await conn.execute(
+                "INSERT INTO users (email, password_hash) VALUES (:1, :2)",
+                (payload.email, password_hash),
+            )
+            await conn.commit()
+
+            # pega o id gerado
+            row = await conn.fetchone("SELECT id FROM users WHERE email = :1", (payload.email,))
     except oracledb.IntegrityError as e:
         # ORA-00001: unique constraint violated
         error_obj, = e.args
@@ -125,15 +103,11 @@ async def register(payload: RegisterRequest):
 async def login(payload: LoginRequest):
     """Login: compara senha enviada com o hash salvo no Oracle."""
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, email, password_hash FROM users WHERE email = :1",
-            (payload.email,),
-        )
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
+        async with database.connection() as conn:
+            row = await conn.fetchone(
+                "SELECT id, email, password_hash FROM users WHERE email = :1",
+                (payload.email,),
+            )
     except Exception as e:
         print("Erro ao consultar usuário (Oracle):", e)
         raise HTTPException(status_code=500, detail="Erro ao consultar usuário.")
@@ -143,7 +117,12 @@ async def login(payload: LoginRequest):
 
     user_id, email, password_hash = row
 
-    if not pwd_context.verify(payload.senha, password_hash):
+    try:
+        valid = await verify_password(payload.senha, password_hash)
+    except ExecutorBusy:
+        raise busy_error()
+
+    if not valid:
         raise HTTPException(status_code=401, detail="Credenciais inválidas.")
 
     return {
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from pathlib import Path
 import re
 
 import pandas as pd
 
+from app.services.chunked_cleaning import clean_csv_in_chunks, should_stream
+from app.services.cleaning_cache import cleaning_cache
+from app.services.datasets import read_dataset, write_sidecar
+from app.services.metrics import StageTimer
+from app.services.profiling import read_profile, write_profile
+
 router = APIRouter(
     prefix="/clean",
     tags=["cleaning"],
@@ -40,17 +47,11 @@ def get_user_dir(user_email: Optional[str]) -> Path:
 
 
 def load_dataframe(path: Path) -> pd.DataFrame:
-    """Lê CSV / JSON / Excel em DataFrame pandas."""
+    """Lê CSV / JSON / Excel em DataFrame pandas (via sidecar Parquet, se existir)."""
     suffix = path.suffix.lower()
-
-    if suffix in [".csv", ".txt"]:
-        return pd.read_csv(path)
-    elif suffix == ".json":
-        return pd.read_json(path)
-    elif suffix in [".xlsx", ".xls"]:
-        return pd.read_excel(path)
-    else:
+    if suffix not in [".csv", ".txt", ".json", ".xlsx", ".xls"]:
         raise ValueError(f"Extensão não suportada para limpeza: {suffix}")
+    return read_dataset(path)
 
 
 class CleanRequest(BaseModel):
@@ -59,60 +60,95 @@ class CleanRequest(BaseModel):
     remove_duplicates: bool = True
     fix_missing: bool = True
     standardize_formats: bool = True
+    # None = automático (CSV grande é limpo em blocos); True/False força o modo
+    streaming: Optional[bool] = None
 
 
-@router.post("/dataset")
-async def clean_dataset(req: CleanRequest):
-    """
-    Aplica limpeza ao arquivo salvo em uploads/<pasta_do_usuario>/<filename>.
-    """
-    user_dir = get_user_dir(req.user_email)
-    file_path = user_dir / req.filename
+async def _remember_result(
+    timer: StageTimer,
+    cache_key: str,
+    file_path: Path,
+    cleaned_path: Path,
+    report: Dict[str, Any],
+) -> None:
+    """Guarda o resultado no cache de limpeza; falha no cache não derruba a limpeza."""
+    try:
+        with timer.stage("cache_write"):
+            await run_in_threadpool(cleaning_cache.put, cache_key, file_path, cleaned_path, report)
+    except Exception as e:
+        print("Erro ao gravar cache de limpeza:", repr(e))
 
-    if not file_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail=f"Arquivo não encontrado para este usuário: {file_path}",
-        )
 
+def clean_in_memory(
+    file_path: Path,
+    cleaned_path: Path,
+    req: CleanRequest,
+    timer: StageTimer,
+) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Limpeza com o arquivo inteiro na memória (pandas): lê, remove duplicados,
+    preenche vazios, padroniza, grava o arquivo limpo, o sidecar Parquet e o perfil.
+    Bloqueante: o endpoint chama via run_in_threadpool.
+    Devolve (caminho gravado, relatório).
+    """
     try:
-        df = load_dataframe(file_path)
+        with timer.stage("read"):
+            df = load_dataframe(file_path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo: {e}")
 
     rows_before = len(df)
 
+    # Perfil gravado no upload: nulos, medianas e modas sem varrer as colunas de novo
+    profile = read_profile(file_path)
+    column_profiles: Dict[str, Dict[str, Any]] = (profile or {}).get("columns", {})
+
     # Remover duplicados
     if req.remove_duplicates:
-        df_no_dups = df.drop_duplicates()
+        with timer.stage("dedupe"):
+            df_no_dups = df.drop_duplicates()
         duplicates_removed = rows_before - len(df_no_dups)
         df = df_no_dups
     else:
         duplicates_removed = 0
 
+    # As estatísticas do perfil valem para o df se o dedup não tirou linhas
+    # (coluna sem nulo no arquivo continua sem nulo de qualquer jeito)
+    profile_exact = profile is not None and duplicates_removed == 0
+
     # Valores vazios antes
-    missing_before = int(df.isna().sum().sum())
+    missing_before = profile["nulls"] if profile_exact else int(df.isna().sum().sum())
 
     # Corrigir valores vazios
     if req.fix_missing:
-        for col in df.columns:
-            if df[col].isna().sum() == 0:
-                continue
+        with timer.stage("fix_missing"):
+            for col in df.columns:
+                info = column_profiles.get(str(col), {})
+                nulls = info.get("nulls") if profile_exact or info.get("nulls") == 0 else None
+                if nulls is None:
+                    nulls = int(df[col].isna().sum())
+                if nulls == 0:
+                    continue
 
-            if pd.api.types.is_numeric_dtype(df[col]):
-                median = df[col].median()
-                df[col] = df[col].fillna(median)
-            else:
-                mode = df[col].mode(dropna=True)
-                fill_value = mode.iloc[0] if not mode.empty else ""
-                df[col] = df[col].fillna(fill_value)
+                if pd.api.types.is_numeric_dtype(df[col]):
+                    median = info.get("median") if profile_exact else None
+                    if median is None:
+                        median = df[col].median()
+                    df[col] = df[col].fillna(median)
+                else:
+                    fill_value = info.get("mode") if profile_exact else None
+                    if fill_value is None:
+                        mode = df[col].mode(dropna=True)
+                        fill_value = mode.iloc[0] if not mode.empty else ""
+                    df[col] = df[col].fillna(fill_value)
 
     missing_after = int(df.isna().sum().sum())
 
     # Padronizar formatos simples (strings)
     if req.standardize_formats:
-        for col in df.select_dtypes(include=["object", "string"]).columns:
-            df[col] = df[col].astype(str).str.strip()
+        with timer.stage("standardize"):
+            for col in df.select_dtypes(include=["object", "string"]).columns:
+                df[col] = df[col].astype(str).str.strip()
         formats_standardized = True
     else:
         formats_standardized = False
@@ -120,33 +156,35 @@ async def clean_dataset(req: CleanRequest):
     rows_after = len(df)
 
     # Salvar arquivo limpo na mesma pasta
-    cleaned_name = file_path.stem + "_cleaned" + file_path.suffix
-    cleaned_path = file_path.with_name(cleaned_name)
-
     try:
-        suffix = cleaned_path.suffix.lower()
-        if suffix in [".csv", ".txt"]:
-            df.to_csv(cleaned_path, index=False)
-        elif suffix == ".json":
-            df.to_json(cleaned_path, orient="records", force_ascii=False)
-        elif suffix in [".xlsx", ".xls"]:
-            df.to_excel(cleaned_path, index=False)
-        else:
-            cleaned_path = cleaned_path.with_suffix(".csv")
-            cleaned_name = cleaned_path.name
-            df.to_csv(cleaned_path, index=False)
+        with timer.stage("write"):
+            suffix = cleaned_path.suffix.lower()
+            if suffix in [".csv", ".txt"]:
+                df.to_csv(cleaned_path, index=False)
+            elif suffix == ".json":
+                df.to_json(cleaned_path, orient="records", force_ascii=False)
+            elif suffix in [".xlsx", ".xls"]:
+                df.to_excel(cleaned_path, index=False)
+            else:
+                cleaned_path = cleaned_path.with_suffix(".csv")
+                df.to_csv(cleaned_path, index=False)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar arquivo limpo: {e}")
 
+    # Sidecar colunar do arquivo limpo (o forecast lê dele só as colunas que usa)
+    with timer.stage("sidecar"):
+        write_sidecar(cleaned_path, df)
+
+    # Perfil do arquivo limpo (o forecast lê dele o tipo da coluna temporal)
+    with timer.stage("profile"):
+        write_profile(cleaned_path, df)
+
     # Prévia para a interface
     preview = df.head(10)
     preview_headers: List[str] = list(preview.columns)
     preview_rows = preview.values.tolist()
 
-    return {
-        "ok": True,
-        "cleaned_filename": cleaned_name,
-        "cleaned_path": str(cleaned_path),
+    report = {
         "rows_before": int(rows_before),
         "rows_after": int(rows_after),
         "duplicates_removed": int(duplicates_removed),
@@ -156,3 +194,88 @@ async def clean_dataset(req: CleanRequest):
         "preview_headers": preview_headers,
         "preview_rows": preview_rows,
     }
+    return cleaned_path, report
+
+
+@router.post("/dataset")
+async def clean_dataset(req: CleanRequest):
+    """
+    Aplica limpeza ao arquivo salvo em uploads/<pasta_do_usuario>/<filename>.
+    A duração de cada etapa vai em metrics["stages"] e para GET /metrics.
+
+    Idempotente: o resultado fica em cache por conteúdo do arquivo + opções;
+    repetir a chamada devolve o relatório guardado (cached=True) sem reprocessar.
+    """
+    timer = StageTimer("cleaning")
+    user_dir = get_user_dir(req.user_email)
+    file_path = user_dir / req.filename
+
+    if not file_path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Arquivo não encontrado para este usuário: {file_path}",
+        )
+
+    cleaned_path = file_path.with_name(file_path.stem + "_cleaned" + file_path.suffix)
+    options = {
+        "remove_duplicates": req.remove_duplicates,
+        "fix_missing": req.fix_missing,
+        "standardize_formats": req.standardize_formats,
+    }
+
+    # Mesmo conteúdo + mesmas opções: devolve o resultado já calculado, sem pandas
+    with timer.stage("cache_lookup"):
+        cache_key = await run_in_threadpool(cleaning_cache.make_key, file_path, options)
+        cached = await run_in_threadpool(cleaning_cache.restore, cache_key, cleaned_path)
+
+    if cached is not None:
+        timer.observe()
+        return {
+            "ok": True,
+            "cleaned_filename": cleaned_path.name,
+            "cleaned_path": str(cleaned_path),
+            **cached,
+            "cached": True,
+            "metrics": {"stages": timer.as_dict()},
+        }
+
+    # CSV grande: limpeza em blocos, sem carregar o arquivo inteiro na memória
+    if should_stream(file_path, req.streaming):
+        try:
+            with timer.stage("streaming_clean"):
+                report = await run_in_threadpool(
+                    clean_csv_in_chunks,
+                    file_path,
+                    cleaned_path,
+                    remove_duplicates=req.remove_duplicates,
+                    fix_missing=req.fix_missing,
+                    standardize_formats=req.standardize_formats,
+                )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Erro ao limpar arquivo: {e}")
+
+        await _remember_result(timer, cache_key, file_path, cleaned_path, report)
+        timer.observe()
+        return {
+            "ok": True,
+            "cleaned_filename": cleaned_path.name,
+            "cleaned_path": str(cleaned_path),
+            **report,
+            "cached": False,
+            "metrics": {"stages": timer.as_dict()},
+        }
+
+    # Limpeza em memória (pandas + gravação + sidecar + perfil) fora do event loop, como a em blocos
+    cleaned_path, report = await run_in_threadpool(clean_in_memory, file_path, cleaned_path, req, timer)
+
+    await _remember_result(timer, cache_key, file_path, cleaned_path, report)
+
+    timer.observe()
+    return {
+        "ok": True,
+        "cleaned_filename": cleaned_path.name,
+        "cleaned_path": str(cleaned_path),
+        **report,
+        "cached": False,
+        "metrics": {"stages": timer.as_dict()},
+    }
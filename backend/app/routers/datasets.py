@@ -0,0 +1,45 @@
+from typing import Optional
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.routers.cleaning import get_user_dir
+from app.services.profiling import build_profile, read_profile
+
+router = APIRouter(
+    prefix="/datasets",
+    tags=["datasets"],
+)
+
+
+@router.get("/{name}/profile")
+async def get_dataset_profile(name: str, user_email: Optional[str] = None):
+    """
+    Perfil do arquivo uploads/<pasta_do_usuario>/<name>: tipos, nulos,
+    mínimo/máximo, distintos (aproximado) e a coluna temporal detectada.
+
+    Normalmente já foi gravado no upload / na limpeza; se faltar ou estiver
+    velho (arquivo alterado), é calculado agora e guardado.
+    """
+    safe_name = Path(name).name
+    if safe_name != name or ".." in name:
+        raise HTTPException(status_code=400, detail="Nome de arquivo inválido.")
+
+    path = get_user_dir(user_email) / safe_name
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado para este usuário.")
+
+    profile = read_profile(path)
+    if profile is None:
+        profile = await run_in_threadpool(build_profile, path)
+    if profile is None:
+        raise HTTPException(status_code=500, detail="Não foi possível calcular o perfil do arquivo.")
+
+    source = profile.get("source", {})
+    return {
+        "ok": True,
+        "filename": safe_name,
+        "size_bytes": source.get("size"),
+        **{k: v for k, v in profile.items() if k != "source"},
+    }
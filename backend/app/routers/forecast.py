@@ -1,18 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import math
+import os
 import re
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Literal, Optional, Dict, Any, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-
-from app.ml.vora_lstm_forecaster import (
-    train_and_forecast_from_env,
-    load_env_config,
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, model_serializer
+
+from app.ml.bundle import bundle_lru
+from app.ml.config import ForecastConfig
+from app.ml.timeseries import aggregate_time_axis, parse_time_column
+from app.ml.forecast_cache import forecast_cache
+from app.services.datasets import read_dataset
+from app.services.downsampling import downsample_indices
+from app.services.metrics import StageTimer, job_cancellations, trainings_in_flight
+from app.services.profiling import read_profile, time_hint
+from app.services.responses import json_response
+from app.services.forecast_jobs import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    FINISHED_STATUSES,
+    ForecastJobManager,
+    JobCancelled,
+    JobError,
+    ProgressFn,
 )
+from app.services.training_pool import TrainingCancelled, training_pool
 
 router = APIRouter(prefix="/forecast", tags=["forecast"])
 
@@ -21,6 +46,16 @@ router = APIRouter(prefix="/forecast", tags=["forecast"])
 BASE_DIR = Path(__file__).resolve().parents[2]          # pasta backend/
 BASE_UPLOAD_DIR = BASE_DIR / "uploads"
 BASE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+BASE_JOBS_DIR = BASE_DIR / "jobs"                        # estado dos jobs de forecast
+
+FORECAST_CONFIG_PATH = BASE_DIR / "config_vora_lstm.env"   # config base do modelo LSTM
+
+# Tarefa executada pelos workers de treino (string: a API não importa o módulo de treino)
+TRAIN_FORECAST_TASK = "app.ml.training_tasks:train_forecast_task"
+
+# Stream de eventos dos jobs: intervalo entre leituras do estado e keep-alive
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_PING_SECONDS = 15.0
 
 
 def safe_folder_name(raw: Optional[str]) -> str:
@@ -42,6 +77,23 @@ def get_user_dir(user_email: Optional[str]) -> Path:
     return user_dir
 
 
+@lru_cache(maxsize=1)
+def load_base_config() -> ForecastConfig:
+    """
+    Lê e valida config_vora_lstm.env uma única vez (chamado no startup).
+    Para recarregar depois de editar o arquivo: load_base_config.cache_clear().
+    """
+    if not FORECAST_CONFIG_PATH.exists():
+        raise HTTPException(
+            status_code=500,
+            detail="Arquivo 'config_vora_lstm.env' não encontrado no backend.",
+        )
+    try:
+        return ForecastConfig.from_env_file(FORECAST_CONFIG_PATH)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"config_vora_lstm.env inválido: {e}")
+
+
 # --------- MODELOS Pydantic ---------
 
 
@@ -49,35 +101,143 @@ class ForecastRequest(BaseModel):
     # nome do arquivo salvo em uploads/<user_folder>/ (pode ser bruto ou _cleaned)
     filename: str
     user_email: Optional[str] = None  # usado para localizar a pasta do usuário
+    # limite de pontos do histórico na resposta (None = todos); o resto é resumido no servidor
+    max_points: Optional[int] = Field(default=None, ge=3)
+    downsample_method: Literal["lttb", "minmax"] = "lttb"
+    # formato das séries: "points" = [{date, value, rows}, ...] (padrão, usado pelo
+    # dashboard); "columns" = {dates: [...], values: [...], rows: [...]} (compacto)
+    series_format: Literal["points", "columns"] = "points"
 
 
 class TimePoint(BaseModel):
     date: str
     value: float
+    rows: Optional[int] = None  # linhas brutas agregadas neste passo (com AGGREGATION)
+
+    @model_serializer(mode="wrap")
+    def _omit_rows(self, handler):
+        # sem AGGREGATION (e no /predict) o ponto continua só {date, value}
+        data = handler(self)
+        if data.get("rows") is None:
+            data.pop("rows", None)
+        return data
+
+
+class GroupForecast(BaseModel):
+    group: str
+    forecast: List[TimePoint]
+
+
+class GroupSeries(GroupForecast):
+    history: List[TimePoint]  # histórico só deste grupo (mesma agregação / max_points)
 
 
 class ForecastResponse(BaseModel):
     ok: bool
     filename: str
-    history: List[TimePoint]
-    forecast: List[TimePoint]
+    history: List[TimePoint]                    # vazio com GROUP_BY_COLUMN (ver groups)
+    forecast: List[TimePoint]                   # vazio com GROUP_BY_COLUMN (ver groups)
     metrics: Dict[str, Any]
     forecast_csv_filename: Optional[str] = None  # nome do CSV salvo com a previsão
+    history_points_raw: Optional[int] = None     # pontos do histórico antes do downsampling
+    history_downsampled: bool = False
+    group_column: Optional[str] = None          # GROUP_BY_COLUMN: um forecast por grupo
+    groups: Optional[List[GroupSeries]] = None
 
 
-# --------- ENDPOINT LSTM ---------
+class PredictRequest(BaseModel):
+    filename: str
+    user_email: Optional[str] = None
+    # janela própria (opcional): pelo menos HISTORY_WINDOW linhas, sem escala,
+    # nas colunas do modelo (target + exógenas); sem ela usa a última janela do treino
+    recent_values: Optional[List[List[float]]] = None
+    last_date: Optional[str] = None  # data da última linha de recent_values
+    group: Optional[str] = None      # modelo multi-série: grupo a prever (None = todos)
+    series_format: Literal["points", "columns"] = "points"  # ver ForecastRequest
 
 
-@router.post("/lstm", response_model=ForecastResponse)
-def run_lstm_forecast(body: ForecastRequest):
+class PredictResponse(BaseModel):
+    ok: bool
+    filename: str
+    model_key: str
+    columns: List[str]
+    forecast: List[TimePoint]
+    elapsed_ms: float
+    groups: Optional[List[GroupForecast]] = None  # modelo multi-série sem `group`: todos
+
+
+# --------- SERIALIZAÇÃO DAS SÉRIES ---------
+
+
+def iso_dates(dates: pd.Series) -> List[str]:
     """
-    Usa o vora_lstm_forecaster para treinar o modelo e devolver:
-    - série histórica (original/limpa)
-    - forecast
-    - métricas básicas (MSE, MAE, RMSE, épocas)
-    - nome do arquivo CSV de forecast salvo com sufixo _forecast
+    Datas -> strings ISO de uma vez (sem Timestamp.isoformat() linha a linha).
+    Cada data sai com a precisão do isoformat: segundos, micro ou nanossegundos.
+    """
+    values = dates.to_numpy()
+    if values.dtype.kind != "M":
+        # ex.: datas com fuso horário (dtype object) -> caminho lento
+        return [pd.Timestamp(t).isoformat() for t in dates]
+
+    ns = values.astype("datetime64[ns]").view("int64")
+    out = np.datetime_as_string(values, unit="ns")
+    whole_us = (ns % 1_000) == 0
+    out[whole_us] = np.datetime_as_string(values[whole_us], unit="us")
+    whole_s = (ns % 1_000_000_000) == 0
+    out[whole_s] = np.datetime_as_string(values[whole_s], unit="s")
+    return out.tolist()
+
+
+def series_points(
+    dates: pd.Series,
+    values: pd.Series,
+    rows: Optional[pd.Series] = None,
+) -> List[Dict[str, Any]]:
+    """Monta a lista de {date, value[, rows]} da resposta a partir das colunas."""
+    points = [
+        {"date": d, "value": v}
+        for d, v in zip(iso_dates(dates), values.to_numpy(dtype="float64").tolist())
+    ]
+    if rows is not None:
+        for point, n in zip(points, rows.to_numpy(dtype="int64").tolist()):
+            point["rows"] = n
+    return points
+
+
+def series_columns(
+    dates: pd.Series,
+    values: pd.Series,
+    rows: Optional[pd.Series] = None,
+) -> Dict[str, List[Any]]:
+    """Mesma série de series_points em arrays paralelos {dates, values[, rows]}."""
+    columns: Dict[str, List[Any]] = {
+        "dates": iso_dates(dates),
+        "values": values.to_numpy(dtype="float64").tolist(),
+    }
+    if rows is not None:
+        columns["rows"] = rows.to_numpy(dtype="int64").tolist()
+    return columns
+
+
+SERIALIZERS = {"points": series_points, "columns": series_columns}
+
+
+def respond(request: Request, result: Union[BaseModel, Dict[str, Any]]) -> Response:
     """
+    Serializa a resposta (modelo pydantic ou dict já no formato "columns")
+    com o encoder rápido e compressão negociada (ver app.services.responses).
+    """
+    return json_response(request, result)
+
 
+# --------- PIPELINE DE FORECAST ---------
+
+
+def resolve_dataset_path(body: Union[ForecastRequest, PredictRequest]) -> Tuple[Path, Path]:
+    """
+    Valida o nome do arquivo e devolve (pasta_do_usuario, arquivo_a_usar).
+    Se o arquivo pedido não existir, tenta o *_cleaned correspondente.
+    """
     # 1) valida o nome do arquivo passado na requisição
     safe_name = Path(body.filename).name
     if safe_name != body.filename or ".." in body.filename or "/" in body.filename or "\\" in body.filename:
@@ -96,78 +256,149 @@ def run_lstm_forecast(body: ForecastRequest):
         cleaned_path = user_dir / cleaned_name
         if cleaned_path.exists():
             csv_path = cleaned_path
-            safe_name = cleaned_name
         else:
             raise HTTPException(
                 status_code=404,
                 detail=f"Arquivo '{requested_path.name}' não encontrado na pasta do usuário e nenhum arquivo *_cleaned correspondente foi localizado.",
             )
 
-    # 3) base do .env (na raiz do backend: backend/config_vora_lstm.env)
-    base_env_path = BASE_DIR / "config_vora_lstm.env"
-    if not base_env_path.exists():
-        raise HTTPException(
-            status_code=500,
-            detail="Arquivo 'config_vora_lstm.env' não encontrado no backend.",
-        )
+    return user_dir, csv_path
 
-    # 4) monta caminhos relativos para CSV de entrada e CSV de forecast
-    user_folder = safe_folder_name(body.user_email)
-    csv_rel_path = f"./uploads/{user_folder}/{csv_path.name}"
-
-    stem = csv_path.stem
-    suffix = csv_path.suffix
-    forecast_name = f"{stem}_forecast{suffix}"
-    forecast_rel_path = f"./uploads/{user_folder}/{forecast_name}"
-
-    # 5) gera um .env runtime apontando para o CSV certo + caminho de forecast
-    lines = base_env_path.read_text(encoding="utf-8").splitlines()
-    new_lines: List[str] = []
-    found_csv = False
-    found_save_forecast = False
-
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith("CSV_PATH="):
-            new_lines.append(f"CSV_PATH={csv_rel_path}")
-            found_csv = True
-        elif stripped.startswith("SAVE_FORECAST_CSV_PATH="):
-            new_lines.append(f"SAVE_FORECAST_CSV_PATH={forecast_rel_path}")
-            found_save_forecast = True
-        else:
-            new_lines.append(line)
 
-    if not found_csv:
-        new_lines.append(f"CSV_PATH={csv_rel_path}")
-    if not found_save_forecast:
-        new_lines.append(f"SAVE_FORECAST_CSV_PATH={forecast_rel_path}")
+def prepare_history(
+    hist: pd.DataFrame,
+    datetime_col: str,
+    target_col: str,
+    config: ForecastConfig,
+    body: ForecastRequest,
+    timer: StageTimer,
+) -> Tuple[pd.DataFrame, Optional[pd.Series], int]:
+    """
+    Uma série do histórico (ordenada por data) pronta para a resposta: a mesma
+    agregação do treino (o histórico mostra a série que o modelo viu, com
+    quantas linhas brutas caíram em cada passo) e o downsampling de max_points.
+    Devolve (série, linhas_por_passo ou None, pontos antes do downsampling).
+    """
+    hist = hist[[datetime_col, target_col]]
+    rows = None
+    if config.aggregation != "none":
+        try:
+            with timer.stage("aggregate_history"):
+                hist = hist.assign(**{target_col: pd.to_numeric(hist[target_col], errors="coerce")})
+                hist, rows_per_step = aggregate_time_axis(
+                    hist, datetime_col, [target_col], config.aggregation, config.frequency
+                )
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=500, detail=f"Erro ao agregar histórico: {e}")
+        hist = hist.assign(__rows=rows_per_step.to_numpy()).dropna(subset=[target_col])
+        rows = hist["__rows"]
+    points = len(hist)
+
+    # downsampling opcional (preserva o formato da curva: LTTB ou min/max por bucket),
+    # sobre a série já agregada
+    if body.max_points is not None and points > body.max_points:
+        try:
+            x = hist[datetime_col].to_numpy().astype("datetime64[ns]").view("int64")
+            y = pd.to_numeric(hist[target_col]).to_numpy(dtype="float64")
+            with timer.stage("downsample"):
+                idx = downsample_indices(x, y, body.max_points, body.downsample_method)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Erro ao reduzir histórico: {e}")
+        hist = hist.iloc[idx]
+        rows = rows.iloc[idx] if rows is not None else None
+    return hist, rows, points
+
+
+def build_forecast_response(
+    body: ForecastRequest,
+    on_epoch: Optional[Callable[[int, int, Dict[str, float]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Union[ForecastResponse, Dict[str, Any]]:
+    """
+    Usa o vora_lstm_forecaster para treinar o modelo e devolver:
+    - série histórica (original/limpa)
+    - forecast
+    - métricas básicas (MSE, MAE, RMSE, épocas)
+    - nome do arquivo CSV de forecast salvo com sufixo _forecast
 
-    runtime_env_path = base_env_path.parent / "config_vora_lstm_runtime.env"
-    runtime_env_path.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
+    on_epoch (opcional) recebe o progresso do treino, época a época; cancel
+    (opcional), quando setado, interrompe o treino (TrainingCancelled).
+    A duração de cada etapa vai em metrics["stages"] e para GET /metrics.
+    Com series_format="columns" devolve um dict com os mesmos campos, as séries
+    em arrays paralelos e sem passar pela validação ponto a ponto do pydantic.
+    """
+    timer = StageTimer("forecast")
+    serialize = SERIALIZERS[body.series_format]
+    user_dir, csv_path = resolve_dataset_path(body)
 
-    # 6) treina e gera forecast
-    try:
-        model, history_dict, forecast_df = train_and_forecast_from_env(runtime_env_path)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao treinar modelo/prever: {e}",
-        )
+    # 3) config do modelo (lida uma vez e mantida em memória)
+    base_config = load_base_config()
 
-    # 7) carrega config pra saber coluna de data e target
-    cfg = load_env_config(runtime_env_path)
-    datetime_col = cfg.get("DATETIME_COLUMN")
-    target_col = cfg.get("TARGET_COLUMN")
+    # 4) caminho do CSV de forecast (mesma pasta, sufixo _forecast)
+    forecast_name = f"{csv_path.stem}_forecast{csv_path.suffix}"
+    forecast_path = user_dir / forecast_name
 
-    if not datetime_col or not target_col:
-        raise HTTPException(
-            status_code=500,
-            detail="DATETIME_COLUMN ou TARGET_COLUMN não configurados no .env.",
-        )
+    # ajustes desta requisição só em memória (nada de .env runtime em disco)
+    config = base_config.with_overrides(
+        csv_path=str(csv_path),
+        save_forecast_csv_path=str(forecast_path),
+    )
+
+    # 5) cache: mesmo conteúdo de dataset + mesma config => reaproveita o modelo já treinado
+    with timer.stage("cache_lookup"):
+        cache_key = forecast_cache.make_key(csv_path, config)
+        cached = forecast_cache.get(cache_key)
+        # WARM_START: modelo anterior deste arquivo (mesma arquitetura) para o treino incremental
+        warm_start = None
+        if cached is None and config.warm_start:
+            warm_start = forecast_cache.find_warm_start(csv_path, config)
+
+    warm_info = None
+    if cached is not None:
+        history_dict = cached["history"]
+        forecast_df = cached["forecast_df"]
+        if not forecast_path.exists():
+            forecast_df.to_csv(forecast_path, index=False)
+    else:
+        # 6) treina e gera forecast num worker isolado (o worker também grava o cache
+        #    e descarta entradas antigas deste arquivo, caso dataset ou config tenham mudado)
+        try:
+            with timer.stage("training"), trainings_in_flight.track():
+                result = training_pool.run(
+                    TRAIN_FORECAST_TASK,
+                    {
+                        "config": config,
+                        "cache_key": cache_key,
+                        "dataset_path": str(csv_path),
+                        "warm_start": warm_start,
+                    },
+                    on_epoch=on_epoch,
+                    cancel=cancel,
+                )
+        except TrainingCancelled:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao treinar modelo/prever: {e}",
+            )
+
+        history_dict = result["history"]
+        forecast_df = result["forecast_df"]
+        # etapas medidas dentro do worker (read_dataset, fit, predict...)
+        timer.update(result.get("stages"))
+        warm_info = result.get("warm_start")
+
+    datetime_col = config.datetime_column
+    target_col = config.target_column
 
-    # 8) monta série histórica (arquivo usado no treino: bruto ou *_cleaned)
+    # 7) monta série histórica (arquivo usado no treino: bruto ou *_cleaned)
+    group_col = config.group_by_column or None
     try:
-        df_raw = pd.read_csv(csv_path)
+        with timer.stage("read_history"):
+            df_raw = read_dataset(
+                csv_path, columns=[datetime_col, target_col] + ([group_col] if group_col else [])
+            )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -175,49 +406,89 @@ def run_lstm_forecast(body: ForecastRequest):
         )
 
     try:
-        df_raw[datetime_col] = pd.to_datetime(df_raw[datetime_col])
+        # mesma conversão do treino (ex.: work_year 2020 -> 2020-01-01)
+        df_raw[datetime_col] = parse_time_column(
+            df_raw[datetime_col], time_hint(read_profile(csv_path), datetime_col)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao converter coluna de data '{datetime_col}': {e}",
         )
 
-    df_raw = df_raw.sort_values(datetime_col)
-
-    history_list: List[TimePoint] = []
-    for _, row in df_raw[[datetime_col, target_col]].dropna().iterrows():
-        history_list.append(
-            TimePoint(
-                date=row[datetime_col].isoformat(),
-                value=float(row[target_col]),
+    hist = df_raw.dropna().sort_values(datetime_col, kind="stable")
+    raw_rows = len(hist)
+    if group_col:
+        # multi-série: um histórico por grupo (em groups[*].history), como no treino
+        hist_parts = {
+            str(name): part.drop(columns=group_col)
+            for name, part in hist.groupby(hist[group_col].astype(str), sort=True)
+        }
+    else:
+        hist_parts = {None: hist}
+
+    history_points_raw = 0
+    downsampled = False
+    history_by_group: Dict[Optional[str], Any] = {}
+    for name, part in hist_parts.items():
+        part, rows, points = prepare_history(part, datetime_col, target_col, config, body, timer)
+        history_points_raw += points
+        downsampled = downsampled or len(part) < points
+        try:
+            with timer.stage("build_series"):
+                history_by_group[name] = serialize(part[datetime_col], part[target_col], rows)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Coluna alvo '{target_col}' não numérica: {e}",
             )
-        )
 
-    # 9) monta forecast (datas futuras + previsão)
+    aggregation_info: Optional[Dict[str, Any]] = None
+    if config.aggregation != "none":
+        aggregation_info = {
+            "method": config.aggregation,
+            "frequency": config.frequency,
+            "raw_rows": raw_rows,
+            "steps": history_points_raw,
+        }
+
+    # 8) monta forecast (datas futuras + previsão)
     if datetime_col not in forecast_df.columns:
         raise HTTPException(
             status_code=500,
             detail="Forecast retornou em formato inesperado.",
         )
 
-    forecast_cols = [c for c in forecast_df.columns if c != datetime_col]
-    if not forecast_cols:
+    forecast_cols = [c for c in forecast_df.columns if c not in (datetime_col, group_col)]
+    if not forecast_cols or (group_col and group_col not in forecast_df.columns):
         raise HTTPException(
             status_code=500,
             detail="Forecast retornou sem coluna de previsão.",
         )
     forecast_col = forecast_cols[0]
 
-    forecast_list: List[TimePoint] = []
-    for _, row in forecast_df[[datetime_col, forecast_col]].iterrows():
-        forecast_list.append(
-            TimePoint(
-                date=row[datetime_col].isoformat(),
-                value=float(row[forecast_col]),
+    groups_list = None
+    with timer.stage("build_series"):
+        if group_col:
+            # multi-série: forecast_df em formato longo (grupo, data, previsão)
+            empty = [] if body.series_format == "points" else {"dates": [], "values": []}
+            history_list = forecast_list = empty
+            groups_list = [
+                {
+                    "group": str(name),
+                    "history": history_by_group.get(str(name), empty),
+                    "forecast": serialize(pd.to_datetime(part[datetime_col]), part[forecast_col]),
+                }
+                for name, part in forecast_df.groupby(group_col, sort=False)
+            ]
+        else:
+            history_list = history_by_group[None]
+            forecast_list = serialize(
+                pd.to_datetime(forecast_df[datetime_col]),
+                forecast_df[forecast_col],
             )
-        )
 
-    # 10) extrai métricas do histórico de treino
+    # 9) extrai métricas do histórico de treino
     metrics: Dict[str, Any] = {}
 
     if isinstance(history_dict, dict):
@@ -252,11 +523,324 @@ def run_lstm_forecast(body: ForecastRequest):
         if "loss" in history_dict:
             metrics["train_epochs"] = len(history_dict["loss"])
 
-    return ForecastResponse(
+    if aggregation_info is not None:
+        metrics["aggregation"] = aggregation_info
+
+    if warm_info is not None and config.warm_start:
+        metrics["warm_start"] = warm_info
+    metrics["stages"] = timer.as_dict()
+    timer.observe()
+
+    response = dict(
         ok=True,
         filename=csv_path.name,
         history=history_list,
         forecast=forecast_list,
         metrics=metrics,
         forecast_csv_filename=forecast_name,
+        history_points_raw=history_points_raw,
+        history_downsampled=downsampled,
+        group_column=group_col,
+        groups=groups_list,
+    )
+    if body.series_format == "columns":
+        return response
+    return ForecastResponse(**response)
+
+
+# --------- ENDPOINT LSTM ---------
+
+
+@router.post("/lstm", response_model=ForecastResponse)
+def run_lstm_forecast(body: ForecastRequest, request: Request):
+    """
+    Treina e devolve o forecast na mesma requisição (bloqueante).
+    Para treinos longos prefira POST /forecast/jobs.
+    O response_model documenta o formato padrão ("points"); com
+    series_format="columns" history/forecast vêm como {dates, values, rows}.
+    """
+    return respond(request, build_forecast_response(body))
+
+
+# --------- INFERÊNCIA (SEM TREINO) ---------
+
+
+@router.post("/predict", response_model=PredictResponse)
+def predict_forecast(body: PredictRequest, request: Request):
+    """
+    Previsão com o modelo já treinado para o arquivo (bundle do cache), sem fit
+    e sem TensorFlow: o forward da LSTM roda em NumPy. Se ainda não houver
+    modelo para este arquivo + config, responde 404 (treine com POST /forecast/jobs).
+    """
+    started = time.perf_counter()
+    _, csv_path = resolve_dataset_path(body)
+
+    config = load_base_config()
+    cache_key = forecast_cache.make_key(csv_path, config)
+    bundle_path = forecast_cache.bundle_dir(cache_key)
+    if bundle_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Nenhum modelo treinado para este arquivo com a config atual. Rode o forecast antes.",
+        )
+
+    try:
+        model = bundle_lru.get(bundle_path)
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao carregar o modelo salvo: {e}")
+    if model is None:
+        raise HTTPException(status_code=404, detail="Modelo salvo não encontrado.")
+
+    group_ids = None
+    if model.groups is not None and body.group is not None:
+        try:
+            group_ids = [model.group_index(body.group)]
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Grupo '{body.group}' não existe no modelo treinado.")
+
+    windows = None
+    last_dates = None
+    if body.recent_values is not None:
+        window = model.config.history_window
+        if len(body.recent_values) < window:
+            raise HTTPException(
+                status_code=400,
+                detail=f"recent_values precisa de pelo menos {window} linhas (HISTORY_WINDOW).",
+            )
+        if not body.last_date:
+            raise HTTPException(status_code=400, detail="Informe last_date junto com recent_values.")
+        n_columns = len(model.columns)
+        if any(len(row) != n_columns for row in body.recent_values[-window:]):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cada linha de recent_values precisa de {n_columns} valores ({', '.join(model.columns)}).",
+            )
+        if model.groups is not None and group_ids is None:
+            # a janela é de uma série só: sem group não há a que grupo (escala, embedding) atribuí-la
+            raise HTTPException(status_code=400, detail="Modelo multi-série: informe group junto com recent_values.")
+        try:
+            last_dates = [pd.Timestamp(body.last_date)]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"last_date inválida: {body.last_date}")
+        windows = np.asarray(body.recent_values[-window:], dtype="float64")[None, ...]
+
+    try:
+        forecast_dfs = model.predict(windows, last_dates, group_ids=group_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    datetime_col = model.config.datetime_column
+    forecast_col = model.manifest["forecast_column"]
+    serialize = SERIALIZERS[body.series_format]
+
+    forecast_list: Any = [] if body.series_format == "points" else {"dates": [], "values": []}
+    groups_list = None
+    if model.groups is not None and group_ids is None:
+        # todos os grupos de uma vez (um único forward em lote)
+        groups_list = [
+            {"group": name, "forecast": serialize(df[datetime_col], df[forecast_col])}
+            for name, df in zip(model.groups, forecast_dfs)
+        ]
+    else:
+        forecast_df = forecast_dfs[0]
+        forecast_list = serialize(forecast_df[datetime_col], forecast_df[forecast_col])
+
+    response = dict(
+        ok=True,
+        filename=csv_path.name,
+        model_key=cache_key,
+        columns=model.columns,
+        forecast=forecast_list,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        groups=groups_list,
     )
+    if body.series_format == "columns":
+        return respond(request, response)
+    return respond(request, PredictResponse(**response))
+
+
+# --------- JOBS ASSÍNCRONOS ---------
+
+
+def _run_forecast_job(
+    payload: Dict[str, Any],
+    progress: ProgressFn,
+    cancel: threading.Event,
+) -> Dict[str, Any]:
+    """Executa um job de forecast em segundo plano (ver ForecastJobManager)."""
+    body = ForecastRequest(**payload)
+    try:
+        response = build_forecast_response(body, on_epoch=progress, cancel=cancel)
+    except TrainingCancelled:
+        raise JobCancelled()
+    except HTTPException as e:
+        raise JobError(str(e.detail))
+    return jsonable_encoder(response)
+
+
+forecast_jobs = ForecastJobManager(
+    BASE_JOBS_DIR,
+    runner=_run_forecast_job,
+    max_workers=int(os.getenv("VORA_FORECAST_JOB_WORKERS", 1)),
+)
+
+
+def _public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    payload = job.get("payload") or {}
+    return {
+        "ok": True,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "filename": payload.get("filename"),
+        "progress": job.get("progress"),
+        "cancel_requested": bool(job.get("cancel_requested")),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+@router.post("/jobs", status_code=202)
+def submit_forecast_job(body: ForecastRequest):
+    """
+    Enfileira um forecast e devolve o job_id na hora.
+    Acompanhe em GET /forecast/jobs/{job_id} e busque o resultado em
+    GET /forecast/jobs/{job_id}/result.
+    """
+    # valida arquivo antes de enfileirar, para o erro voltar já nesta requisição
+    resolve_dataset_path(body)
+    job = forecast_jobs.submit(jsonable_encoder(body))
+    return _public_job(job)
+
+
+@router.get("/jobs/{job_id}")
+def get_forecast_job(job_id: str):
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return _public_job(job)
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_forecast_job(job_id: str):
+    """
+    Cancela o job: na fila, sai na hora; treinando, para no próximo batch e o
+    worker passa para o próximo job da fila. Job já terminado responde 409.
+    """
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    if job["status"] in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail="Job já terminou.")
+    job_cancellations.inc(reason="request")
+    return _public_job(forecast_jobs.cancel(job_id))
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_forecast_job(job_id: str, request: Request, cancel_on_disconnect: bool = True):
+    """
+    Progresso do job em Server-Sent Events:
+      status  mudança de status (mesmo formato de GET /forecast/jobs/{job_id})
+      epoch   fim de cada época: {epoch, epochs, loss, val_loss}
+      end     job terminou (done / failed / cancelled); o stream fecha em seguida
+    Se o cliente desconectar antes do fim (ex.: fechou a aba), o job é
+    cancelado, a menos que cancel_on_disconnect=false.
+    """
+    if forecast_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+    async def events():
+        status = None
+        sent_epochs = 0
+        finished = False
+        last_write = time.monotonic()
+        try:
+            while True:
+                job = forecast_jobs.get(job_id)
+                if job is None:
+                    break
+                chunks = []
+                if job["status"] != status:
+                    status = job["status"]
+                    chunks.append(_sse("status", _public_job(job)))
+                epochs = (job.get("progress") or {}).get("epochs")
+                history = job.get("loss_history") or []
+                for item in history[sent_epochs:]:
+                    chunks.append(_sse("epoch", {**item, "epochs": epochs}))
+                sent_epochs = len(history)
+                if job["status"] in FINISHED_STATUSES:
+                    finished = True
+                    chunks.append(_sse("end", _public_job(job)))
+                elif not chunks and time.monotonic() - last_write >= JOB_EVENTS_PING_SECONDS:
+                    chunks.append(": ping\n\n")  # comentário SSE: mantém a conexão viva
+
+                if chunks:
+                    yield "".join(chunks)
+                    last_write = time.monotonic()
+                if finished or await request.is_disconnected():
+                    break
+                await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+        finally:
+            if not finished and cancel_on_disconnect:
+                job = forecast_jobs.get(job_id)
+                if job is not None and job["status"] not in FINISHED_STATUSES:
+                    print("Cliente do stream desconectou; cancelando job:", job_id)
+                    job_cancellations.inc(reason="disconnect")
+                    forecast_jobs.cancel(job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/result", response_model=ForecastResponse)
+def get_forecast_job_result(job_id: str, request: Request):
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=409, detail=job.get("error") or "Job falhou.")
+    if job["status"] == CANCELLED:
+        raise HTTPException(status_code=409, detail="Job cancelado.")
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail="Job ainda não terminou.")
+
+    result = forecast_jobs.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Resultado do job não encontrado.")
+    # já gravado no formato pedido ao criar o job (series_format)
+    return respond(request, result)
+
+
+# --------- CACHE ---------
+
+
+@router.delete("/cache")
+def invalidate_forecast_cache(filename: Optional[str] = None, user_email: Optional[str] = None):
+    """
+    Invalida o cache de modelos/forecast.
+    - com filename: só as entradas daquele arquivo (e do *_cleaned correspondente)
+    - sem filename: o cache inteiro
+    """
+    if not filename:
+        forecast_cache.clear()
+        return {"ok": True, "removed": "all"}
+
+    safe_name = Path(filename).name
+    if safe_name != filename or ".." in filename:
+        raise HTTPException(status_code=400, detail="Nome de arquivo inválido.")
+
+    user_dir = get_user_dir(user_email)
+    p = Path(safe_name)
+    removed = 0
+    for candidate in (user_dir / safe_name, user_dir / f"{p.stem}_cleaned{p.suffix}"):
+        removed += forecast_cache.invalidate_dataset(candidate)
+
+    return {"ok": True, "removed": removed}
@@ -1,7 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from pathlib import Path
+import hashlib
+import os
 import re
+import uuid
+
+from app.services.cleaning_cache import cleaning_cache
+from app.services.datasets import sidecar_is_fresh
+from app.services.hashing import remember_file_hash
+from app.services.metrics import StageTimer, upload_bytes, uploads
+from app.services.profiling import build_profile
 
 router = APIRouter(
     prefix="/upload",
@@ -13,6 +23,14 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 BASE_UPLOAD_DIR = BASE_DIR / "uploads"
 BASE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Upload em streaming: tamanho de cada bloco e limite por arquivo (0 = sem limite)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("VORA_MAX_UPLOAD_BYTES", 500 * 1024 * 1024))
+
+
+def _too_large_message() -> str:
+    return f"Arquivo maior que o limite de {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+
 
 def safe_folder_name(raw: str) -> str:
     """
@@ -41,7 +59,14 @@ async def upload_dataset(
     """
     Recebe um arquivo CSV / JSON / Excel, salva em uploads/<pasta_do_usuario>/
     e devolve informações básicas.
+
+    O arquivo é gravado em blocos (nunca inteiro na memória), num temporário que
+    só é renomeado para o nome final no fim; hash SHA-256 e contagem de linhas
+    físicas são calculados durante a gravação (rows, o número de registros, vem
+    do parser, via perfil). A duração de cada etapa vai em
+    metrics["stages"] e para GET /metrics.
     """
+    timer = StageTimer("upload")
     # 1) Validar extensão
     ext = file.filename.split(".")[-1].lower()
     if ext not in {"csv", "json", "xlsx", "xls"}:
@@ -56,20 +81,80 @@ async def upload_dataset(
     user_dir = BASE_UPLOAD_DIR / user_folder
     user_dir.mkdir(parents=True, exist_ok=True)
 
-    # 3) Ler conteúdo do arquivo
-    content = await file.read()
+    filename = Path(file.filename).name
+
+    # 3) Aborta cedo se o tamanho já é conhecido e passa do limite
+    known_size = getattr(file, "size", None)
+    if MAX_UPLOAD_BYTES and known_size is not None and known_size > MAX_UPLOAD_BYTES:
+        uploads.inc(status="too_large")
+        raise HTTPException(status_code=413, detail=_too_large_message())
+
+    # 4) Grava em blocos num arquivo temporário, calculando hash e contagens no caminho
+    save_path = user_dir / filename
+    tmp_path = user_dir / f".{filename}.{uuid.uuid4().hex}.part"
+
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    newlines = 0
+    last_byte = b""
+
+    try:
+        with timer.stage("receive"), open(tmp_path, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size_bytes += len(chunk)
+                upload_bytes.inc(len(chunk))
+                if MAX_UPLOAD_BYTES and size_bytes > MAX_UPLOAD_BYTES:
+                    uploads.inc(status="too_large")
+                    raise HTTPException(status_code=413, detail=_too_large_message())
+
+                hasher.update(chunk)
+                newlines += chunk.count(b"\n")
+                last_byte = chunk[-1:]
+                # escrita em disco bloqueia: fora do event loop
+                await run_in_threadpool(f.write, chunk)
+
+        # 5) Só aparece com o nome final quando está completo (rename atômico)
+        os.replace(tmp_path, save_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    sha256 = hasher.hexdigest()
+    remember_file_hash(save_path, sha256)
+    # arquivo substituído: limpezas do conteúdo anterior deixam de valer
+    await run_in_threadpool(cleaning_cache.invalidate_source, save_path, sha256)
+
+    # Linhas físicas (CSV): quebras de linha, mais a última linha sem "\n". Não é o
+    # número de registros: campos entre aspas podem conter quebras de linha
+    lines = None
+    if ext == "csv" and size_bytes > 0:
+        lines = newlines + (0 if last_byte == b"\n" else 1)
+
+    # 6) Converte uma vez para o formato colunar (Parquet) usado pela limpeza/forecast e
+    #    calcula o perfil (tipos, nulos, estatísticas, coluna temporal) dos mesmos blocos:
+    #    o arquivo é lido uma vez só
+    with timer.stage("sidecar_profile"):
+        profile = await run_in_threadpool(build_profile, save_path)
 
-    # 4) Salvar arquivo
-    save_path = user_dir / file.filename
-    with open(save_path, "wb") as f:
-        f.write(content)
+    timer.observe()
+    uploads.inc(status="ok")
 
-    # 5) Resposta
+    # 7) Resposta
     return {
         "ok": True,
-        "filename": file.filename,
+        "filename": filename,
         "user_folder": user_folder,
         "path": str(save_path),
-        "size_bytes": len(content),
+        "size_bytes": size_bytes,
+        "sha256": sha256,
+        "lines": lines,
+        "rows": profile["rows"] if profile is not None else None,
+        "columnar_sidecar": sidecar_is_fresh(save_path),
+        "profile": profile is not None,
         "message": "Arquivo recebido com sucesso",
+        "metrics": {"stages": timer.as_dict()},
     }
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_numeric_dtype
+
+# Limpeza "out-of-core" de CSV: o arquivo é lido em blocos de CHUNK_ROWS linhas,
+# em três passadas, e nunca fica inteiro na memória:
+#   1) esquema: tipo final de cada coluna, total de linhas e nulos brutos
+#   2) deduplicação por hash + estatísticas (nulos, medianas, modas) das linhas mantidas
+#   3) escrita incremental do arquivo limpo
+# O relatório tem os mesmos campos (e valores) da limpeza em memória do cleaning.py.
+
+CHUNK_ROWS = int(os.getenv("VORA_CLEAN_CHUNK_ROWS", 200_000))
+STREAMING_MIN_BYTES = int(os.getenv("VORA_CLEAN_STREAMING_MIN_BYTES", 256 * 1024 * 1024))
+
+_PREVIEW_ROWS = 10
+
+
+def should_stream(path: Path, requested: Optional[bool] = None) -> bool:
+    """CSV grande (ou pedido explícito) -> limpeza em blocos."""
+    if path.suffix.lower() not in [".csv", ".txt"]:
+        return False
+    if requested is not None:
+        return requested
+    return path.stat().st_size >= STREAMING_MIN_BYTES
+
+
+# =========================
+# Conjunto de hashes (dedup)
+# =========================
+
+class _SeenHashes:
+    """
+    Conjunto de hashes uint64 guardado em blocos ordenados de numpy
+    (8 bytes por linha única, em vez de um set Python).
+    Blocos de tamanho parecido são fundidos, então a busca olha poucos blocos.
+    """
+
+    def __init__(self):
+        self._blocks: List[np.ndarray] = []
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for block in self._blocks:
+            idx = np.searchsorted(block, hashes)
+            idx[idx == len(block)] = len(block) - 1
+            found |= block[idx] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        self._blocks.append(np.unique(hashes))
+        while len(self._blocks) > 1 and len(self._blocks[-1]) * 2 >= len(self._blocks[-2]):
+            newer = self._blocks.pop()
+            older = self._blocks.pop()
+            self._blocks.append(np.union1d(older, newer))
+
+
+# =========================
+# Passada 1: esquema
+# =========================
+
+def _chunk_kind(series: pd.Series) -> Optional[str]:
+    if series.isna().all():
+        return None
+    if is_bool_dtype(series):
+        return "bool"
+    if is_integer_dtype(series):
+        return "int"
+    if is_numeric_dtype(series):
+        return "float"
+    return "str"
+
+
+def _final_kind(kinds: set, has_empty_chunk: bool) -> str:
+    """Combina o tipo visto em cada bloco no tipo que o pandas daria ao arquivo inteiro."""
+    if not kinds:
+        return "float"  # coluna toda vazia
+    if "str" in kinds or ("bool" in kinds and len(kinds) > 1):
+        return "str"
+    if kinds == {"bool"}:
+        return "str" if has_empty_chunk else "bool"
+    if kinds == {"int"} and not has_empty_chunk:
+        return "int"
+    return "float"
+
+
+_DTYPES = {"int": "int64", "float": "float64", "bool": "bool", "str": str}
+
+
+def _scan_schema(path: Path, chunk_rows: int):
+    kinds: Dict[str, set] = {}
+    empty: Dict[str, bool] = {}
+    raw_nulls: Dict[str, int] = {}
+    columns: List[str] = []
+    rows = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        if not columns:
+            columns = list(chunk.columns)
+            kinds = {c: set() for c in columns}
+            empty = {c: False for c in columns}
+            raw_nulls = {c: 0 for c in columns}
+        rows += len(chunk)
+        for col in columns:
+            series = chunk[col]
+            nulls = int(series.isna().sum())
+            raw_nulls[col] += nulls
+            kind = _chunk_kind(series)
+            if kind is None:
+                empty[col] = True
+            else:
+                kinds[col].add(kind)
+
+    if not columns:
+        # arquivo só com cabeçalho
+        columns = list(pd.read_csv(path, nrows=0).columns)
+        raw_nulls = {c: 0 for c in columns}
+
+    dtypes = {c: _DTYPES[_final_kind(kinds.get(c, set()), empty.get(c, False))] for c in columns}
+    return columns, dtypes, rows, raw_nulls
+
+
+# =========================
+# Estatísticas incrementais
+# =========================
+
+class ValueCounts:
+    """Contagem de valores de uma coluna, acumulada bloco a bloco (memória ~ valores distintos)."""
+
+    def __init__(self):
+        self._parts: List[pd.Series] = []
+
+    def update(self, series: pd.Series) -> None:
+        vc = series.value_counts(dropna=True)
+        if len(vc):
+            self._parts.append(vc)
+        if len(self._parts) > 16:
+            self._compact()
+
+    def size_hint(self) -> int:
+        """Limite superior de valores distintos guardados (sem compactar)."""
+        return sum(len(part) for part in self._parts)
+
+    def distinct(self) -> int:
+        return len(self._compact())
+
+    def _compact(self) -> pd.Series:
+        if not self._parts:
+            return pd.Series(dtype="int64")
+        merged = pd.concat(self._parts).groupby(level=0).sum().sort_index()
+        self._parts = [merged]
+        return merged
+
+    def median(self) -> float:
+        counts = self._compact()
+        total = int(counts.sum()) if len(counts) else 0
+        if total == 0:
+            return float("nan")
+        values = counts.index.to_numpy(dtype="float64")
+        cum = counts.to_numpy().cumsum()
+        lo = values[np.searchsorted(cum, (total - 1) // 2 + 1)]
+        hi = values[np.searchsorted(cum, total // 2 + 1)]
+        return (lo + hi) / 2 if total % 2 == 0 else lo
+
+    def mode(self) -> Any:
+        counts = self._compact()
+        if not len(counts):
+            return ""
+        # igual a Series.mode(): entre empatados, o menor valor
+        return counts[counts == counts.max()].index.min()
+
+
+def _row_hashes(chunk: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+
+# =========================
+# Limpeza completa
+# =========================
+
+def clean_csv_in_chunks(
+    path: Union[str, Path],
+    output_path: Union[str, Path],
+    remove_duplicates: bool = True,
+    fix_missing: bool = True,
+    standardize_formats: bool = True,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, Any]:
+    """
+    Limpa um CSV em blocos e grava output_path incrementalmente.
+    Devolve os mesmos campos de relatório da limpeza em memória.
+    """
+    path = Path(path)
+    output_path = Path(output_path)
+
+    # 1) esquema
+    columns, dtypes, rows_before, raw_nulls = _scan_schema(path, chunk_rows)
+    numeric_cols = {c for c, d in dtypes.items() if d in ("int64", "float64")}
+    str_cols = [c for c, d in dtypes.items() if d is str]
+
+    # colunas sem nenhum nulo no arquivo bruto continuam sem nulos depois do dedup
+    cols_with_nulls = [c for c in columns if raw_nulls.get(c, 0) > 0]
+
+    # 2) dedup por hash + estatísticas das linhas mantidas
+    seen = _SeenHashes()
+    keep_masks: List[np.ndarray] = []
+    missing_before = 0
+    counters = {c: ValueCounts() for c in cols_with_nulls} if fix_missing else {}
+
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=dtypes):
+        if remove_duplicates:
+            hashes = _row_hashes(chunk)
+            keep = ~pd.Series(hashes).duplicated().to_numpy()
+            keep &= ~seen.contains(hashes)
+            seen.add(hashes[keep])
+            chunk = chunk[keep]
+        else:
+            keep = np.ones(len(chunk), dtype=bool)
+        keep_masks.append(np.packbits(keep))
+
+        if cols_with_nulls:
+            missing_before += int(chunk[cols_with_nulls].isna().sum().sum())
+        for col, counter in counters.items():
+            counter.update(chunk[col])
+
+    del seen
+    rows_after = sum(int(np.unpackbits(m).sum()) for m in keep_masks)
+    duplicates_removed = rows_before - rows_after
+
+    fill_values: Dict[str, Any] = {}
+    for col, counter in counters.items():
+        fill_values[col] = counter.median() if col in numeric_cols else counter.mode()
+
+    # 3) escrita incremental (arquivo temporário + rename atômico)
+    missing_after = 0
+    preview: Optional[pd.DataFrame] = None
+    tmp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp")
+
+    try:
+        with tmp_path.open("w", encoding="utf-8", newline="") as out:
+            header = True
+            reader = pd.read_csv(path, chunksize=chunk_rows, dtype=dtypes)
+            for chunk, packed in zip(reader, keep_masks):
+                keep = np.unpackbits(packed, count=len(chunk)).astype(bool)
+                chunk = chunk[keep]
+
+                if fix_missing:
+                    for col, value in fill_values.items():
+                        chunk[col] = chunk[col].fillna(value)
+
+                if cols_with_nulls:
+                    missing_after += int(chunk[cols_with_nulls].isna().sum().sum())
+
+                if standardize_formats:
+                    for col in str_cols:
+                        chunk[col] = chunk[col].astype(str).str.strip()
+
+                chunk.to_csv(out, index=False, header=header)
+                header = False
+
+                if preview is None or len(preview) < _PREVIEW_ROWS:
+                    head = chunk.head(_PREVIEW_ROWS)
+                    preview = head if preview is None else pd.concat([preview, head]).head(_PREVIEW_ROWS)
+
+            if header:
+                # nenhum bloco: grava só o cabeçalho
+                pd.DataFrame(columns=columns).to_csv(out, index=False)
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    if preview is None:
+        preview = pd.DataFrame(columns=columns)
+
+    return {
+        "rows_before": int(rows_before),
+        "rows_after": int(rows_after),
+        "duplicates_removed": int(duplicates_removed),
+        "missing_before": int(missing_before),
+        "missing_after": int(missing_after),
+        "formats_standardized": bool(standardize_formats),
+        "preview_headers": list(preview.columns),
+        "preview_rows": preview.values.tolist(),
+    }
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from app.services.datasets import sidecar_is_fresh, sidecar_path
+from app.services.hashing import file_sha256, remember_file_hash, text_sha256
+from app.services.profiling import profile_path, read_profile
+
+# Diretório base do projeto (pasta backend/)
+BASE_DIR = Path(__file__).resolve().parents[2]
+CLEANING_CACHE_DIR = BASE_DIR / "cache" / "cleaning"
+
+META_FILE = "meta.json"
+REPORT_FILE = "report.json"
+ARTIFACT_FILE = "cleaned"
+SIDECAR_FILE = "cleaned.parquet"
+PROFILE_FILE = "cleaned.profile.json"
+
+
+def _copy_atomic(src: Path, dst: Path) -> None:
+    """Copia preservando o mtime (o sidecar Parquet confere tamanho + mtime do original)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class CleaningCache:
+    """
+    Cache de resultados da limpeza, endereçado por conteúdo:
+      chave = hash(conteúdo do arquivo de origem) + opções da limpeza
+
+    Em disco (CLEANING_CACHE_DIR/<chave>/) ficam o arquivo limpo (com sidecar
+    Parquet e perfil) e o relatório (contagens + prévia); em memória fica um
+    LRU limitado com os relatórios. Origem alterada = hash novo = chave nova.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_entries: int = 64):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max(0, max_entries)
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- chaves ----------
+
+    def make_key(self, source_path: Union[str, Path], options: Dict[str, Any]) -> str:
+        source_hash = file_sha256(source_path)
+        # o formato de saída segue a extensão do arquivo de origem
+        options = {**options, "suffix": Path(source_path).suffix.lower()}
+        return text_sha256(f"{source_hash}:{json.dumps(options, sort_keys=True)}")[:32]
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    # ---------- leitura ----------
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry
+
+        entry_dir = self._entry_dir(key)
+        if not (entry_dir / META_FILE).exists():
+            return None
+        try:
+            meta = json.loads((entry_dir / META_FILE).read_text(encoding="utf-8"))
+            report = json.loads((entry_dir / REPORT_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print("Cache de limpeza inválido, removendo:", key, repr(e))
+            self.invalidate(key)
+            return None
+
+        entry = {"meta": meta, "report": report}
+        self._remember(key, entry)
+        return entry
+
+    def restore(self, key: str, output_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """
+        Devolve o relatório da entrada (ou None) garantindo que output_path tem o
+        arquivo limpo dela: se o que está lá já é o mesmo conteúdo, nada é copiado.
+        """
+        entry = self._load(key)
+        if entry is None:
+            return None
+
+        meta = entry["meta"]
+        output_path = Path(output_path)
+        if output_path.exists() and file_sha256(output_path) == meta["output_hash"]:
+            return entry["report"]
+
+        # saída apagada ou sobrescrita (ex.: limpeza com outras opções): volta a do cache
+        entry_dir = self._entry_dir(key)
+        artifact = entry_dir / ARTIFACT_FILE
+        if not artifact.exists():
+            self.invalidate(key)
+            return None
+        _copy_atomic(artifact, output_path)
+        remember_file_hash(output_path, meta["output_hash"])
+        if (entry_dir / SIDECAR_FILE).exists():
+            _copy_atomic(entry_dir / SIDECAR_FILE, sidecar_path(output_path))
+        if (entry_dir / PROFILE_FILE).exists():
+            _copy_atomic(entry_dir / PROFILE_FILE, profile_path(output_path))
+        return entry["report"]
+
+    # ---------- escrita ----------
+
+    def put(
+        self,
+        key: str,
+        source_path: Union[str, Path],
+        output_path: Union[str, Path],
+        report: Dict[str, Any],
+    ) -> None:
+        """
+        Guarda o arquivo limpo (e sidecar / perfil, se estiverem em dia) + relatório.
+        Montado numa pasta temporária e renomeado no final, como no cache de forecast.
+        Entradas antigas do mesmo arquivo de origem (conteúdo anterior) são removidas.
+        """
+        source_path = Path(source_path)
+        output_path = Path(output_path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp_dir.mkdir(parents=True)
+
+        source_hash = file_sha256(source_path)
+        meta = {
+            "key": key,
+            "source_path": str(source_path.resolve()),
+            "source_hash": source_hash,
+            "output_hash": file_sha256(output_path),
+            "created_at": time.time(),
+        }
+
+        try:
+            shutil.copy2(output_path, tmp_dir / ARTIFACT_FILE)
+            if sidecar_is_fresh(output_path):
+                shutil.copy2(sidecar_path(output_path), tmp_dir / SIDECAR_FILE)
+            if read_profile(output_path) is not None:
+                shutil.copy2(profile_path(output_path), tmp_dir / PROFILE_FILE)
+            (tmp_dir / REPORT_FILE).write_text(json.dumps(report, default=str), encoding="utf-8")
+            (tmp_dir / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # outra requisição gravou a mesma chave ao mesmo tempo: o conteúdo é equivalente
+                if not (entry_dir / META_FILE).exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._remember(key, {"meta": meta, "report": json.loads(json.dumps(report, default=str))})
+        self.invalidate_source(source_path, keep_hash=source_hash)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    # ---------- invalidação ----------
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._lru.pop(key, None)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def invalidate_source(self, source_path: Union[str, Path], keep_hash: Optional[str] = None) -> int:
+        """
+        Remove as entradas geradas a partir de source_path cujo conteúdo de
+        origem não é keep_hash (chamado quando o arquivo é substituído).
+        """
+        target = str(Path(source_path).resolve())
+        removed = 0
+        if not self.cache_dir.exists():
+            return removed
+
+        for meta_path in self.cache_dir.glob(f"*/{META_FILE}"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if meta.get("source_path") == target and meta.get("source_hash") != keep_hash:
+                self.invalidate(meta.get("key") or meta_path.parent.name)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+cleaning_cache = CleaningCache(
+    CLEANING_CACHE_DIR,
+    max_entries=int(os.getenv("VORA_CLEANING_CACHE_SIZE", 64)),
+)
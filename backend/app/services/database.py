@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+import oracledb  # <-- Oracle DB driver (modo thin, API assíncrona)
+
+# Pool de conexões Oracle compartilhado pela API.
+# Criado no startup (lifespan do main.py) e fechado no shutdown; as rotas pegam
+# conexões emprestadas com `async with database.connection() as conn`.
+
+# hook chamado com uma conexão logo depois que o pool abre (ex.: criar tabelas)
+StartupHook = Callable[[Any], Awaitable[None]]
+
+
+def pool_settings_from_env() -> Dict[str, Any]:
+    """Configuração do pool via .env (ORACLE_* já usados antes + ORACLE_POOL_*)."""
+    return {
+        "user": os.getenv("ORACLE_USER"),
+        "password": os.getenv("ORACLE_PASSWORD"),
+        "dsn": os.getenv("ORACLE_DSN"),  # ex: "host:porta/servicename"
+        "min": int(os.getenv("ORACLE_POOL_MIN", 1)),
+        "max": int(os.getenv("ORACLE_POOL_MAX", 4)),
+        "increment": int(os.getenv("ORACLE_POOL_INCREMENT", 1)),
+        # conexão ociosa há mais de N s é testada (ping) antes de ser entregue
+        "ping_interval": int(os.getenv("ORACLE_POOL_PING_INTERVAL", 60)),
+        # conexões ociosas além do mínimo são fechadas depois de N s
+        "timeout": int(os.getenv("ORACLE_POOL_IDLE_TIMEOUT", 300)),
+        # espera máxima (ms) por uma conexão livre quando o pool está cheio
+        "wait_timeout": int(os.getenv("ORACLE_POOL_WAIT_TIMEOUT_MS", 5000)),
+    }
+
+
+def create_oracle_pool(settings: Dict[str, Any]):
+    if not settings.get("user") or not settings.get("password") or not settings.get("dsn"):
+        raise RuntimeError("Configuração ORACLE_* ausente no .env")
+
+    return oracledb.create_pool_async(
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        **settings,
+    )
+
+
+class OracleDatabase:
+    """
+    Dono do pool assíncrono do Oracle.
+
+    - open(): cria o pool e roda os hooks de startup (uma vez por pool aberto)
+    - connection(): empresta uma conexão; se o banco estava fora do ar no
+      startup, tenta abrir o pool de novo na primeira requisição
+    - open(pool=...) aceita um pool já pronto (ex.: banco local de testes),
+      desde que tenha acquire() assíncrono e close()
+    """
+
+    def __init__(self, pool_factory: Callable[[Dict[str, Any]], Any] = create_oracle_pool):
+        self.pool_factory = pool_factory
+        self._pool = None
+        self._hooks: List[StartupHook] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None
+
+    def on_open(self, hook: StartupHook) -> StartupHook:
+        """Registra um hook de startup (pode ser usado como decorator)."""
+        self._hooks.append(hook)
+        return hook
+
+    async def open(self, pool: Any = None) -> None:
+        async with self._lock:
+            if self._pool is not None:
+                return
+            pool = pool if pool is not None else self.pool_factory(pool_settings_from_env())
+            try:
+                for hook in self._hooks:
+                    async with pool.acquire() as conn:
+                        await hook(conn)
+            except BaseException:
+                await pool.close()
+                raise
+            self._pool = pool
+
+    async def close(self) -> None:
+        async with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        if self._pool is None:
+            await self.open()
+        async with self._pool.acquire() as conn:
+            yield conn
+
+    async def ping(self) -> bool:
+        """Health check: True se o banco responde."""
+        try:
+            async with self.connection() as conn:
+                await conn.ping()
+            return True
+        except Exception as e:
+            print("Health check do Oracle falhou:", repr(e))
+            return False
+
+
+database = OracleDatabase()
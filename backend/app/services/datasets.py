@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, is_string_dtype
+
+from app.services.chunked_cleaning import CHUNK_ROWS, STREAMING_MIN_BYTES
+
+# pyarrow é opcional: sem ele tudo continua funcionando lendo o arquivo original
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pa_csv = None
+    pq = None
+
+# Arquivos auxiliares ficam em uploads/<usuario>/.vora/
+SIDECAR_DIRNAME = ".vora"
+_SOURCE_META_KEY = b"vora_source"
+
+# Tamanho de cada bloco do CSV lido em streaming para o sidecar (vira um row group)
+SIDECAR_BLOCK_BYTES = 8 * 1024 * 1024
+
+# on_batch(bloco) recebe cada bloco gravado no sidecar (ex.: o perfil, calculado na
+# mesma passada); None = descarte o que recebeu, a leitura vai recomeçar
+BatchFn = Callable[[Optional[pd.DataFrame]], None]
+
+
+def sidecar_dir(path: Union[str, Path]) -> Path:
+    return Path(path).parent / SIDECAR_DIRNAME
+
+
+def sidecar_path(path: Union[str, Path]) -> Path:
+    """uploads/<usuario>/dados.csv -> uploads/<usuario>/.vora/dados.csv.parquet"""
+    path = Path(path)
+    return sidecar_dir(path) / f"{path.name}.parquet"
+
+
+def source_signature(path: Path) -> dict:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def sidecar_failed_path(path: Union[str, Path]) -> Path:
+    """uploads/<usuario>/dados.csv -> uploads/<usuario>/.vora/dados.csv.nosidecar.json"""
+    path = Path(path)
+    return sidecar_dir(path) / f"{path.name}.nosidecar.json"
+
+
+def sidecar_failed(path: Union[str, Path]) -> bool:
+    """True se build_sidecar já falhou para este conteúdo do arquivo (mesma assinatura)."""
+    path = Path(path)
+    marker = sidecar_failed_path(path)
+    if not marker.exists() or not path.exists():
+        return False
+    try:
+        return json.loads(marker.read_text(encoding="utf-8")) == source_signature(path)
+    except (OSError, ValueError):
+        return False
+
+
+def _mark_sidecar_failed(path: Path) -> None:
+    marker = sidecar_failed_path(path)
+    tmp = marker.with_name(f".{marker.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(source_signature(path)), encoding="utf-8")
+        os.replace(tmp, marker)
+    except OSError as e:
+        print("Não foi possível registrar a falha do sidecar:", path.name, repr(e))
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+# =========================
+# Leitura do arquivo original
+# =========================
+
+def _arrow_temporal_columns(df: pd.DataFrame) -> List[str]:
+    """Colunas em que o Arrow reconheceu datas / horas (o engine C deixa como texto)."""
+    temporal = []
+    for name in df.columns:
+        col = df[name]
+        if is_datetime64_any_dtype(col):
+            temporal.append(name)
+        elif col.dtype == object:
+            first = col.dropna()
+            if not first.empty and isinstance(first.iloc[0], (datetime.date, datetime.time)):
+                temporal.append(name)
+    return temporal
+
+
+def read_csv_fast(path: Union[str, Path], usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    pd.read_csv com o engine do pyarrow (multithread) quando ele está instalado,
+    com o mesmo resultado do engine C:
+    - o Arrow converte sozinho datas / horas ISO (e "10:30" vira 10:30:00); essas
+      colunas são relidas como texto cru, com os mesmos vazios da primeira leitura
+    - se o Arrow não aceitar o arquivo (ex.: linha com campos a mais), usa o engine C
+    """
+    if pa is not None:
+        try:
+            df = pd.read_csv(path, usecols=usecols, engine="pyarrow")
+            temporal = _arrow_temporal_columns(df)
+            if temporal:
+                table = pa_csv.read_csv(
+                    path,
+                    convert_options=pa_csv.ConvertOptions(
+                        include_columns=temporal,
+                        column_types=dict.fromkeys(temporal, pa.string()),
+                    ),
+                )
+                for name in temporal:
+                    text = table.column(name).to_pandas()
+                    text.index = df.index
+                    df[name] = text.where(df[name].notna().to_numpy())
+            if usecols:
+                # o engine C mantém a ordem do arquivo, o pyarrow a de usecols
+                header = pd.read_csv(path, nrows=0).columns
+                df = df[[c for c in header if c in df.columns]]
+            return df
+        except Exception as e:
+            print("Engine pyarrow falhou, usando o engine C:", Path(path).name, repr(e))
+    return pd.read_csv(path, usecols=usecols)
+
+
+def parse_dataset(path: Union[str, Path], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Lê CSV / JSON / Excel em DataFrame pandas (parse completo do texto)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    usecols = list(columns) if columns else None
+
+    if suffix in [".csv", ".txt"]:
+        return read_csv_fast(path, usecols=usecols)
+    elif suffix == ".json":
+        df = pd.read_json(path)
+    elif suffix in [".xlsx", ".xls"]:
+        return pd.read_excel(path, usecols=usecols)
+    else:
+        raise ValueError(f"Extensão não suportada: {suffix}")
+
+    return df[usecols] if usecols else df
+
+
+# =========================
+# Sidecar colunar (Parquet)
+# =========================
+
+def write_sidecar(path: Union[str, Path], df: pd.DataFrame) -> Optional[Path]:
+    """
+    Grava df como Parquet tipado ao lado do arquivo original.
+    A assinatura (tamanho, mtime) do original vai nos metadados, para detectar
+    quando o sidecar ficou velho. Devolve o caminho, ou None se não deu para gravar.
+    """
+    if pq is None:
+        return None
+
+    path = Path(path)
+    target = sidecar_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_SOURCE_META_KEY] = json.dumps(source_signature(path)).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+        pq.write_table(table, tmp)
+        os.replace(tmp, target)
+    except Exception as e:
+        # ex.: coluna com tipos misturados que o Arrow não converte
+        print("Não foi possível gravar sidecar Parquet:", path.name, repr(e))
+        return None
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+    return target
+
+
+def sidecar_is_fresh(path: Union[str, Path]) -> bool:
+    if pq is None:
+        return False
+    path = Path(path)
+    target = sidecar_path(path)
+    if not target.exists() or not path.exists():
+        return False
+    try:
+        metadata = pq.read_schema(target).metadata or {}
+        source = json.loads(metadata.get(_SOURCE_META_KEY, b"{}"))
+    except Exception:
+        return False
+    return source == source_signature(path)
+
+
+def _is_temporal(arrow_type) -> bool:
+    return pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type) or pa.types.is_time(arrow_type)
+
+
+def _open_csv(path: Path, column_types: Optional[Dict[str, Any]] = None):
+    """Leitor em blocos do pyarrow com as opções que o pd.read_csv(engine="pyarrow") usa."""
+    return pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=SIDECAR_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(
+            null_values=sorted(STR_NA_VALUES),
+            strings_can_be_null=True,
+            column_types=column_types or {},
+        ),
+    )
+
+
+def _stream_csv_sidecar(path: Path, target: Path, on_batch: Optional[BatchFn] = None) -> None:
+    """
+    CSV -> Parquet bloco a bloco (memória ~ um bloco), com o mesmo resultado de
+    read_csv_fast: datas / horas ficam como texto cru e colunas só com vazios
+    viram float64. O tipo de cada coluna é o que o Arrow infere no primeiro
+    bloco; se um bloco seguinte não encaixa, o Arrow levanta erro.
+    """
+    schema = _open_csv(path).schema
+    if len(set(schema.names)) != len(schema.names):
+        raise ValueError("cabeçalho com colunas repetidas")
+    column_types = {f.name: pa.string() for f in schema if _is_temporal(f.type)}
+    column_types.update({f.name: pa.float64() for f in schema if pa.types.is_null(f.type)})
+    reader = _open_csv(path, column_types)
+
+    metadata = dict(reader.schema.metadata or {})
+    metadata[_SOURCE_META_KEY] = json.dumps(source_signature(path)).encode("utf-8")
+    schema = reader.schema.with_metadata(metadata)
+
+    with pq.ParquetWriter(target, schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            if on_batch is not None:
+                on_batch(batch.to_pandas())
+
+
+def build_sidecar(path: Union[str, Path], on_batch: Optional[BatchFn] = None) -> Optional[Path]:
+    """
+    Converte o arquivo original uma única vez (chamado no upload, ou na primeira
+    leitura). CSV é convertido em blocos, sem carregar o arquivo inteiro; se o
+    Arrow não aceitar o CSV em blocos, ou para JSON / Excel, o arquivo é lido
+    inteiro só se for menor que STREAMING_MIN_BYTES (os grandes ficam sem sidecar
+    e as leituras usam o original, só com as colunas pedidas).
+    on_batch (opcional): recebe os mesmos blocos que vão para o Parquet (ou o
+    DataFrame inteiro, quando o arquivo é lido de uma vez).
+
+    Uma falha fica registrada em .vora/ (sidecar_failed) com a assinatura do
+    arquivo: até ele mudar, as próximas chamadas devolvem None sem reler nada.
+    """
+    if pq is None:
+        return None
+    path = Path(path)
+    if sidecar_failed(path):
+        return None
+
+    target = _build_sidecar(path, on_batch)
+    if target is None:
+        _mark_sidecar_failed(path)
+    return target
+
+
+def _build_sidecar(path: Path, on_batch: Optional[BatchFn]) -> Optional[Path]:
+    if path.suffix.lower() in [".csv", ".txt"]:
+        target = sidecar_path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            _stream_csv_sidecar(path, tmp, on_batch)
+            os.replace(tmp, target)
+            return target
+        except Exception as e:
+            print("Não foi possível converter o CSV em blocos:", path.name, repr(e))
+            if on_batch is not None:
+                on_batch(None)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    if path.stat().st_size >= STREAMING_MIN_BYTES:
+        return None
+    try:
+        df = parse_dataset(path)
+    except Exception as e:
+        print("Não foi possível ler o arquivo para gerar o sidecar:", path.name, repr(e))
+        return None
+    if on_batch is not None:
+        on_batch(df)
+    return write_sidecar(path, df)
+
+
+def iter_batches(path: Union[str, Path], chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    O dataset em blocos de DataFrame, sem carregá-lo inteiro: do sidecar (row
+    groups), ou do CSV original em blocos. JSON / Excel não são lidos em blocos:
+    vêm inteiros, se forem menores que STREAMING_MIN_BYTES.
+    """
+    path = Path(path)
+    if sidecar_is_fresh(path):
+        for batch in pq.ParquetFile(sidecar_path(path)).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif path.suffix.lower() in [".csv", ".txt"]:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    elif path.stat().st_size < STREAMING_MIN_BYTES:
+        yield parse_dataset(path)
+    else:
+        raise ValueError(f"Arquivo grande demais para ler sem sidecar: {path.name}")
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """
+    Aplica um mapa {coluna: "category" | "float32"} onde a conversão é segura:
+    category só em colunas de texto, float32 só em colunas numéricas (texto
+    "sujo" numa coluna do modelo continua para o pd.to_numeric do pipeline).
+    Colunas fora do mapa ou fora do DataFrame ficam como estão.
+    """
+    for name, dtype in (dtypes or {}).items():
+        if name not in df.columns or str(df[name].dtype) == dtype:
+            continue
+        col = df[name]
+        if dtype == "category" and (is_string_dtype(col) or col.dtype == object):
+            df[name] = col.astype("category")
+        elif dtype == "float32" and is_numeric_dtype(col) and not is_bool_dtype(col):
+            df[name] = col.astype("float32")
+    return df
+
+
+def read_dataset(
+    path: Union[str, Path],
+    columns: Optional[Sequence[str]] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Carrega um dataset enviado pelo usuário, lendo só `columns` (se informado).
+
+    Usa o sidecar Parquet quando ele está em dia com o arquivo original; caso
+    contrário grava o sidecar antes (ver build_sidecar) e lê dele. Sem sidecar,
+    lê do original só as colunas pedidas.
+    dtypes: mapa compacto (ver apply_dtypes / profiling.dataset_dtypes); do
+    sidecar, as colunas "category" já saem do Parquet como dicionário.
+    """
+    path = Path(path)
+    wanted: Optional[List[str]] = list(dict.fromkeys(columns)) if columns else None
+
+    if pq is not None and not sidecar_is_fresh(path):
+        build_sidecar(path)
+
+    if sidecar_is_fresh(path):
+        categories = [
+            c for c, dtype in (dtypes or {}).items()
+            if dtype == "category" and (wanted is None or c in wanted)
+        ]
+        try:
+            df = pd.read_parquet(sidecar_path(path), columns=wanted, read_dictionary=categories or None)
+            return apply_dtypes(df, dtypes)
+        except Exception as e:
+            print("Sidecar Parquet ilegível, relendo o original:", path.name, repr(e))
+
+    if wanted and path.suffix.lower() in [".csv", ".txt"]:
+        header = pd.read_csv(path, nrows=0).columns
+        missing = [c for c in wanted if c not in header]
+        if missing:
+            raise ValueError(f"Colunas não encontradas no dataset: {missing}")
+    return apply_dtypes(parse_dataset(path, columns=wanted), dtypes)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Redução de pontos de séries para gráfico, preservando o formato da curva.
+# Todas as funções devolvem ÍNDICES (ordenados) dos pontos escolhidos.
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: mantém primeiro e último ponto e, em cada
+    bucket intermediário, o ponto que forma o maior triângulo com o ponto
+    escolhido no bucket anterior e a média do próximo bucket.
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    # limites dos n_out - 2 buckets do meio (o primeiro e o último ponto são fixos)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if end <= start:
+            end = start + 1
+
+        # média do próximo bucket (ou o último ponto, no último bucket)
+        if i + 2 < len(edges):
+            nxt_start, nxt_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[nxt_start:nxt_end].mean()
+            avg_y = y[nxt_start:nxt_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max por bucket: em cada um de (n_out - 2) // 2 buckets guarda o menor e o
+    maior valor, preservando picos e vales (mais o primeiro e o último ponto).
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype="float64")
+    n_buckets = max(1, (n_out - 2) // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+
+    # min/max por bucket, vetorizado com reduceat
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    bucket_of = np.repeat(np.arange(n_buckets), np.diff(edges))
+    is_min = y == mins[bucket_of]
+    is_max = y == maxs[bucket_of]
+
+    # primeira ocorrência de min e de max em cada bucket
+    idx = np.arange(n)
+    first_min = np.full(n_buckets, n, dtype=np.int64)
+    first_max = np.full(n_buckets, n, dtype=np.int64)
+    np.minimum.at(first_min, bucket_of[is_min], idx[is_min])
+    np.minimum.at(first_max, bucket_of[is_max], idx[is_max])
+
+    return np.unique(np.concatenate([first_min, first_max, [0, n - 1]]))
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> np.ndarray:
+    method = (method or "lttb").lower()
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    raise ValueError(f"Método de downsampling inválido: {method} (use {', '.join(DOWNSAMPLE_METHODS)})")
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+# status possíveis de um job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {DONE, FAILED, CANCELLED}
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# runner(payload, progress, cancel) -> resultado serializável em JSON;
+# cancel é setado quando alguém cancela o job em execução
+ProgressFn = Callable[[int, int, Dict[str, float]], None]
+JobRunner = Callable[[Dict[str, Any], ProgressFn, threading.Event], Dict[str, Any]]
+
+
+class JobError(Exception):
+    """Erro "esperado" de um job: a mensagem vai direto para o usuário."""
+
+
+class JobCancelled(Exception):
+    """O runner parou porque o job foi cancelado (ver ForecastJobManager.cancel)."""
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ForecastJobManager:
+    """
+    Fila de jobs de forecast executados em segundo plano.
+
+    Cada job tem um arquivo <jobs_dir>/<job_id>.json com status/progresso e,
+    quando termina com sucesso, <job_id>.result.json com a resposta completa.
+    Assim os resultados sobrevivem a um restart da API.
+
+    O progresso guarda a perda de cada época (loss_history, para o stream de
+    eventos). Um job cancelado na fila nem chega a rodar; em execução, o runner
+    recebe o aviso pelo threading.Event e o worker volta para a fila na hora.
+    """
+
+    def __init__(self, jobs_dir: Union[str, Path], runner: JobRunner, max_workers: int = 1):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+
+    # ---------- ciclo de vida ----------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="vora-forecast-job",
+                )
+            return self._executor
+
+    def restore(self) -> None:
+        """
+        Recarrega os jobs salvos em disco (chamado no startup da API).
+        Jobs que ainda estavam na fila voltam para a fila; os que estavam
+        rodando quando a API caiu são marcados como falha.
+        """
+        for state_path in sorted(self.jobs_dir.glob("*.json")):
+            if state_path.name.endswith(".result.json"):
+                continue
+            try:
+                job = json.loads(state_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+
+            job_id = job.get("job_id")
+            if not job_id or not _JOB_ID_RE.match(job_id):
+                continue
+
+            with self._lock:
+                self._jobs[job_id] = job
+
+            if job.get("status") == RUNNING:
+                self._update(job_id, status=FAILED, finished_at=time.time(),
+                             error="Job interrompido por reinício do servidor.")
+            elif job.get("status") == QUEUED:
+                self._get_executor().submit(self._run, job_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- API pública ----------
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "payload": payload,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {"epoch": 0, "epochs": None},
+            "loss_history": [],
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(job_id)
+        self._get_executor().submit(self._run, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancela o job (None se não existe). Na fila: vira "cancelled" na hora.
+        Rodando: avisa o runner, que interrompe o treino no próximo batch; o
+        status muda quando ele devolver. Job já terminado fica como está.
+        """
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == QUEUED:
+                self._update(job_id, status=CANCELLED, finished_at=time.time())
+            elif job["status"] == RUNNING and not job.get("cancel_requested"):
+                self._update(job_id, cancel_requested=True)
+                self._cancel_events.setdefault(job_id, threading.Event()).set()
+        return self.get(job_id)
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not _JOB_ID_RE.match(job_id or ""):
+            return None
+        result_path = self.jobs_dir / f"{job_id}.result.json"
+        if not result_path.exists():
+            return None
+        return json.loads(result_path.read_text(encoding="utf-8"))
+
+    # ---------- execução ----------
+
+    def _run(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+
+        with self._lock:
+            # cancelado entre a leitura acima e aqui: não começa
+            if self._jobs[job_id]["status"] != QUEUED:
+                return
+            cancel = self._cancel_events.setdefault(job_id, threading.Event())
+            self._update(job_id, status=RUNNING, started_at=time.time())
+
+        def progress(epoch: int, epochs: int, logs: Dict[str, float]) -> None:
+            losses = {k: logs[k] for k in ("loss", "val_loss") if k in logs}
+            with self._lock:
+                history = list(self._jobs[job_id].get("loss_history") or [])
+                history.append({"epoch": epoch, **losses})
+                self._update(
+                    job_id,
+                    progress={"epoch": epoch, "epochs": epochs, **losses},
+                    loss_history=history,
+                )
+
+        try:
+            result = self.runner(job["payload"], progress, cancel)
+        except JobCancelled:
+            self._update(job_id, status=CANCELLED, finished_at=time.time())
+            return
+        except JobError as e:
+            self._update(job_id, status=FAILED, finished_at=time.time(), error=str(e))
+            return
+        except Exception as e:
+            print("Erro no job de forecast:", job_id, repr(e))
+            self._update(job_id, status=FAILED, finished_at=time.time(), error=f"Erro inesperado: {e}")
+            return
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+        _write_json_atomic(self.jobs_dir / f"{job_id}.result.json", result)
+        self._update(job_id, status=DONE, finished_at=time.time())
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            self._save(job_id)
+
+    def _save(self, job_id: str) -> None:
+        # escreve sob o lock para que duas atualizações não gravem fora de ordem
+        with self._lock:
+            _write_json_atomic(self.jobs_dir / f"{job_id}.json", self._jobs[job_id])
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB por leitura
+
+# (caminho absoluto) -> ((tamanho, mtime_ns), sha256)
+_hash_memo: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_memo_lock = threading.Lock()
+
+
+def _stat_signature(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """
+    SHA-256 do conteúdo do arquivo.
+    O resultado fica memorizado por (tamanho, mtime); se o arquivo mudar, o hash é recalculado.
+    """
+    path = Path(path).resolve()
+    signature = _stat_signature(path)
+    key = str(path)
+
+    with _memo_lock:
+        cached = _hash_memo.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _memo_lock:
+        _hash_memo[key] = (signature, digest)
+    return digest
+
+
+def remember_file_hash(path: Union[str, Path], digest: str) -> None:
+    """Registra um hash já calculado (ex.: durante o upload) para não reler o arquivo."""
+    path = Path(path).resolve()
+    with _memo_lock:
+        _hash_memo[str(path)] = (_stat_signature(path), digest)
+
+
+def forget_file_hash(path: Union[str, Path]) -> None:
+    with _memo_lock:
+        _hash_memo.pop(str(Path(path).resolve()), None)
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
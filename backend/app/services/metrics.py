@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Métricas no formato texto do Prometheus (servidas em GET /metrics), sem
+# dependência extra: contadores, gauges e histogramas com labels.
+#
+# Os valores são por processo: com vários workers do uvicorn, cada um expõe os
+# seus (o Prometheus soma pelas labels de instância).
+
+# Buckets padrão (segundos): de 5 ms a 10 min, cobrindo de parse de CSV a fit
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperadas {self.labelnames}, recebidas {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels_text(self.labelnames, k)} {_number(v)}" for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """+1 enquanto o bloco roda (ex.: treinos em andamento)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # por combinação de labels: [contagem por bucket..., soma, total]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, le)} {_number(count)}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {_number(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas as métricas no formato texto de exposição do Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# =========================
+# Métricas da API
+# =========================
+
+http_requests = registry.counter(
+    "vora_http_requests_total", "Requisições HTTP atendidas.", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "vora_http_request_duration_seconds", "Duração das requisições HTTP (inclui serialização).", ("method", "route")
+)
+stage_seconds = registry.histogram(
+    "vora_stage_duration_seconds", "Duração de cada etapa dos pipelines.", ("pipeline", "stage")
+)
+stage_runs = registry.counter(
+    "vora_stage_runs_total", "Execuções de cada etapa dos pipelines.", ("pipeline", "stage")
+)
+trainings_in_flight = registry.gauge(
+    "vora_trainings_in_flight", "Treinos de forecast em andamento neste processo."
+)
+job_cancellations = registry.counter(
+    "vora_forecast_job_cancellations_total",
+    "Jobs de forecast cancelados (pedido explícito ou cliente do stream desconectou).",
+    ("reason",),
+)
+upload_bytes = registry.counter("vora_upload_bytes_total", "Bytes recebidos em uploads.")
+uploads = registry.counter("vora_uploads_total", "Uploads concluídos.", ("status",))
+
+# séries sem labels aparecem desde o início (com 0)
+trainings_in_flight.set(0)
+upload_bytes.inc(0)
+
+
+# =========================
+# Cronômetro de etapas
+# =========================
+
+class StageTimer:
+    """
+    Mede etapas de um pipeline:
+
+        timer = StageTimer("forecast")
+        with timer.stage("read_dataset"):
+            ...
+        timer.as_dict()   # {"read_dataset": 0.123, ...} (segundos)
+        timer.observe()   # manda as durações para os histogramas de /metrics
+
+    Não depende de nada da API: roda também nos workers de treino, que só
+    devolvem as durações (as_dict) para o processo da API observar.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Soma a duração à etapa (a mesma etapa pode rodar mais de uma vez)."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def update(self, durations: Optional[Dict[str, float]]) -> None:
+        """Incorpora durações medidas em outro lugar (ex.: no worker de treino)."""
+        for name, seconds in (durations or {}).items():
+            self.add(name, float(seconds))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self.durations.items()}
+
+    def observe(self) -> None:
+        for name, seconds in self.durations.items():
+            stage_seconds.observe(seconds, pipeline=self.pipeline, stage=name)
+            stage_runs.inc(pipeline=self.pipeline, stage=name)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from passlib.context import CryptContext
+
+# Hash/verificação de senha (bcrypt) fora do event loop.
+# bcrypt é lento de propósito (~centenas de ms); rodando direto numa rota
+# async ele trava todas as outras requisições do worker. Aqui ele roda num
+# pool de threads próprio (o bcrypt solta o GIL durante o hash), com limite
+# de fila: passando do limite a chamada falha na hora em vez de acumular.
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class ExecutorBusy(Exception):
+    """Fila do executor cheia: a requisição deve ser recusada (503)."""
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor com no máximo `max_workers` tarefas rodando e
+    `max_queue` esperando. A tarefa seguinte levanta ExecutorBusy.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "vora-executor"):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise ExecutorBusy()
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_executor = BoundedExecutor(
+    max_workers=int(os.getenv("VORA_PASSWORD_WORKERS", 2)),
+    max_queue=int(os.getenv("VORA_PASSWORD_QUEUE", 32)),
+    name="vora-bcrypt",
+)
+
+
+async def hash_password(senha: str) -> str:
+    return await password_executor.run(pwd_context.hash, senha)
+
+
+async def verify_password(senha: str, password_hash: str) -> bool:
+    return await password_executor.run(pwd_context.verify, senha, password_hash)
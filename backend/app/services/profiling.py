@@ -0,0 +1,491 @@
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+from pandas.tseries.api import guess_datetime_format
+
+from app.services.chunked_cleaning import ValueCounts
+from app.services.datasets import (
+    build_sidecar,
+    iter_batches,
+    sidecar_dir,
+    sidecar_is_fresh,
+    source_signature,
+)
+
+# Perfil do dataset: calculado uma vez (no upload / na limpeza) e guardado em
+# uploads/<usuario>/.vora/<arquivo>.profile.json, ao lado do sidecar Parquet.
+#
+#   rows, columns{nome: dtype, nulls, distinct_approx, min/max, median ou mode,
+#   time (se a coluna parece tempo)}, time_column (a coluna temporal detectada),
+#   dtypes (mapa compacto para leitura: texto com poucos valores -> category)
+#
+# A limpeza lê dele nulos/medianas/modas e o forecast o tipo da coluna temporal
+# e o mapa de dtypes, em vez de varrer as colunas de novo. Como o sidecar, o perfil guarda a
+# assinatura (tamanho, mtime) do arquivo e é ignorado quando ela não bate.
+#
+# O perfil é acumulado bloco a bloco (ProfileBuilder), com memória limitada: no
+# upload, dos mesmos blocos que vão para o sidecar, sem ler o arquivo de novo.
+
+PROFILE_VERSION = 2
+
+# KMV (k menores hashes distintos): exato até k distintos; acima, erro relativo ~ 1/sqrt(k)
+DISTINCT_K = 4096
+
+# Mediana / moda saem da contagem exata dos valores; colunas com mais distintos
+# que isso ficam sem elas no perfil (a limpeza calcula na hora)
+STATS_MAX_DISTINCT = int(os.getenv("VORA_PROFILE_STATS_MAX_DISTINCT", 200_000))
+
+# Texto vira category quando tem até CATEGORY_MAX_DISTINCT valores distintos e
+# eles se repetem (distintos <= CATEGORY_MAX_RATIO das linhas preenchidas)
+CATEGORY_MAX_DISTINCT = int(os.getenv("VORA_CATEGORY_MAX_DISTINCT", 1000))
+CATEGORY_MAX_RATIO = 0.5
+
+# Amostra usada para decidir se uma coluna de texto é data
+_DATE_SAMPLE = 200
+_DATE_MIN_PARSED = 0.95
+
+# Datas distintas guardadas para o passo mediano; acima disso usa o passo médio
+_DATES_MAX = 1_000_000
+
+# Passo mediano entre datas -> granularidade (aliases do pandas, como FREQUENCY)
+_GRANULARITIES = (
+    (pd.Timedelta(seconds=1), "s"),
+    (pd.Timedelta(minutes=1), "min"),
+    (pd.Timedelta(hours=1), "h"),
+    (pd.Timedelta(days=1), "D"),
+    (pd.Timedelta(days=7), "W"),
+    (pd.Timedelta(days=31), "M"),
+    (pd.Timedelta(days=92), "Q"),
+)
+
+
+def profile_path(path: Union[str, Path]) -> Path:
+    """uploads/<usuario>/dados.csv -> uploads/<usuario>/.vora/dados.csv.profile.json"""
+    path = Path(path)
+    return sidecar_dir(path) / f"{path.name}.profile.json"
+
+
+def _scalar(value: Any) -> Any:
+    """Valor do pandas/numpy -> tipo JSON (NaN/NaT viram None)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _granularity_of_step(step: pd.Timedelta) -> str:
+    for limit, alias in _GRANULARITIES:
+        if step <= limit:
+            return alias
+    return "Y"
+
+
+# =========================
+# Estatísticas por coluna
+# =========================
+
+class _DistinctSketch:
+    """
+    Os DISTINCT_K menores hashes distintos de uma coluna, acumulados bloco a
+    bloco (o resultado não depende de como o arquivo foi dividido). Estimador
+    KMV: distintos ~ (k - 1) / (k-ésimo / 2^64); com até k distintos, é exato.
+    """
+
+    def __init__(self):
+        self.smallest = np.empty(0, dtype="uint64")
+        self.truncated = False
+        self.count = 0
+
+    def update(self, values: pd.Series) -> None:
+        if values.empty:
+            return
+        self.count += len(values)
+        hashes = np.unique(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        self.smallest = np.union1d(self.smallest, hashes[:DISTINCT_K])
+        if len(self.smallest) > DISTINCT_K or len(hashes) > DISTINCT_K:
+            self.smallest = self.smallest[:DISTINCT_K]
+            self.truncated = True
+
+    def estimate(self) -> int:
+        if not self.truncated or len(self.smallest) < DISTINCT_K:
+            return int(len(self.smallest))
+        estimate = (DISTINCT_K - 1) * 2.0 ** 64 / float(self.smallest[-1])
+        return int(min(round(estimate), self.count))
+
+
+def _values_kind(col: pd.Series, values: pd.Series) -> str:
+    """Tipo dos valores não nulos de um bloco: number | bool | datetime | text."""
+    if is_bool_dtype(col) or (col.dtype == object and infer_dtype(values, skipna=True) == "boolean"):
+        return "bool"
+    if is_datetime64_any_dtype(col):
+        return "datetime"
+    if is_numeric_dtype(col):
+        return "number"
+    return "text"
+
+
+class _ColumnStats:
+    """
+    Estatísticas de uma coluna acumuladas bloco a bloco: nulos, distintos (KMV),
+    min/max, contagem de valores (mediana / moda) e, se a coluna parece tempo,
+    datas distintas para a granularidade.
+    """
+
+    def __init__(self):
+        self.dtypes: List[str] = []       # dtypes dos blocos com algum valor
+        self.empty_dtype: Optional[str] = None
+        self.kind: Optional[str] = None   # number | bool | datetime | text | mixed
+        self.nulls = 0
+        self.distinct = _DistinctSketch()
+        self.min: Any = None
+        self.max: Any = None
+        self.counts: Optional[ValueCounts] = ValueCounts()
+
+        # tempo: anos (number em 1900..2100), ou formato detectado na amostra (text)
+        self.years: Optional[set] = set()
+        self.time_state = "pending"       # pending | yes | no (text)
+        self.time_format: Optional[str] = None
+        self.pending: List[pd.Series] = []
+        self.pending_count = 0
+        self.dates: Optional[np.ndarray] = np.empty(0, dtype="datetime64[us]")
+        self.date_min: Optional[np.datetime64] = None
+        self.date_max: Optional[np.datetime64] = None
+        self.tz = None
+
+    # ---------- acumulação ----------
+
+    def update(self, col: pd.Series) -> None:
+        values = col.dropna()
+        self.nulls += len(col) - len(values)
+        if values.empty:
+            self.empty_dtype = self.empty_dtype or str(col.dtype)
+            return
+        if str(col.dtype) not in self.dtypes:
+            self.dtypes.append(str(col.dtype))
+
+        kind = _values_kind(col, values)
+        if self.kind is None:
+            self.kind = kind
+        elif self.kind != kind:
+            # blocos com tipos diferentes (ex.: CSV sem sidecar): só nulos e distintos
+            self.kind = "mixed"
+            self.counts = None
+        if self.kind == "mixed":
+            self.distinct.update(values.astype(str))
+            return
+
+        if kind == "number":
+            self.min = values.min() if self.min is None else min(self.min, values.min())
+            self.max = values.max() if self.max is None else max(self.max, values.max())
+            values = values.astype("float64")
+            self._track_years(values)
+        elif kind == "bool":
+            values = values.astype(bool)
+        elif kind == "datetime":
+            self._add_dates(values)
+        else:
+            self._track_text_time(values)
+
+        self.distinct.update(values)
+        if kind in ("number", "text") and self.counts is not None:
+            self.counts.update(values)
+            if self.counts.size_hint() > STATS_MAX_DISTINCT and self.counts.distinct() > STATS_MAX_DISTINCT:
+                self.counts = None
+
+    def _track_years(self, values: pd.Series) -> None:
+        if self.years is None:
+            return
+        if values.min() < 1900 or values.max() > 2100:
+            self.years = None
+            return
+        self.years.update(np.unique(values.astype(int)).tolist())
+
+    def _track_text_time(self, values: pd.Series) -> None:
+        if self.time_state == "pending":
+            self.pending.append(values)
+            self.pending_count += len(values)
+            if self.pending_count >= _DATE_SAMPLE:
+                self._decide_time()
+        elif self.time_state == "yes":
+            self._add_dates(pd.to_datetime(values.astype(str), format=self.time_format, errors="coerce"))
+
+    def _decide_time(self) -> None:
+        """Com a amostra (primeiros _DATE_SAMPLE valores), decide se o texto é data."""
+        values = pd.concat(self.pending) if self.pending else pd.Series(dtype=str)
+        self.pending = []
+        self.time_state = "no"
+        if values.empty:
+            return
+        sample = values.head(_DATE_SAMPLE).astype(str)
+        fmt = guess_datetime_format(sample.iloc[0])
+        if fmt is None:
+            return
+        parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+        if parsed.notna().mean() < _DATE_MIN_PARSED:
+            return
+        self.time_state = "yes"
+        self.time_format = fmt
+        self._add_dates(pd.to_datetime(values.astype(str), format=fmt, errors="coerce"))
+
+    def _add_dates(self, dates: pd.Series) -> None:
+        dates = dates.dropna()
+        if dates.empty:
+            return
+        if dates.dt.tz is not None:
+            self.tz = dates.dt.tz
+            dates = dates.dt.tz_convert(None)
+        unique = np.unique(dates.to_numpy(dtype="datetime64[us]"))
+        self.date_min = unique[0] if self.date_min is None else min(self.date_min, unique[0])
+        self.date_max = unique[-1] if self.date_max is None else max(self.date_max, unique[-1])
+        if self.dates is not None:
+            self.dates = np.union1d(self.dates, unique)
+            if len(self.dates) > _DATES_MAX:
+                self.dates = None
+
+    # ---------- resultado ----------
+
+    def dtype(self) -> str:
+        """dtype que o pandas daria à coluna inteira."""
+        dtypes = self.dtypes or [self.empty_dtype or "float64"]
+        if len(set(dtypes)) == 1:
+            dtype = dtypes[0]
+        elif set(dtypes) <= {"int64", "float64"}:
+            dtype = "float64"
+        else:
+            dtype = "object"
+        if self.nulls and dtype == "int64":
+            return "float64"
+        if self.nulls and dtype == "bool":
+            return "object"
+        return dtype
+
+    def _time(self, kind: Optional[str]) -> Optional[Dict[str, Any]]:
+        """{"kind", "format", "granularity", "min", "max"}, se a coluna parece tempo (ver parse_time_column)."""
+        if kind == "number" and self.years:
+            years = np.array([f"{y:04d}" for y in sorted(self.years)], dtype="datetime64[us]")
+            time_kind, first, last, dates = "year", years[0], years[-1], years
+        elif kind == "datetime" or (kind == "text" and self.time_state == "yes"):
+            time_kind, first, last, dates = "datetime", self.date_min, self.date_max, self.dates
+        else:
+            return None
+        if self.tz is not None and first is not None:
+            # datas guardadas em UTC: min/max voltam no fuso da coluna
+            first = pd.Timestamp(first, tz="UTC").tz_convert(self.tz)
+            last = pd.Timestamp(last, tz="UTC").tz_convert(self.tz)
+
+        granularity = None
+        if dates is not None and len(dates) > 1:
+            steps = np.diff(dates.astype("int64"))
+            granularity = _granularity_of_step(pd.Timedelta(float(np.median(steps)), unit="us"))
+        elif dates is None and first is not None and self.distinct.estimate() > 1:
+            # datas distintas demais para guardar: passo médio
+            granularity = _granularity_of_step(pd.Timedelta(last - first) / (self.distinct.estimate() - 1))
+
+        return {
+            "kind": time_kind,
+            "format": self.time_format,
+            "granularity": granularity,
+            "min": _scalar(first),
+            "max": _scalar(last),
+        }
+
+    def result(self) -> Dict[str, Any]:
+        if self.time_state == "pending" and self.pending:
+            self._decide_time()
+
+        dtype = self.dtype()
+        kind = self.kind
+        if kind is None:
+            # coluna toda vazia: como o pandas, numérica se o dtype for numérico
+            kind = "number" if dtype in ("int64", "float64") else "text"
+
+        info: Dict[str, Any] = {
+            "dtype": dtype,
+            "nulls": int(self.nulls),
+            "distinct_approx": self.distinct.estimate(),
+        }
+        if kind == "number":
+            info["min"] = _scalar(self.min)
+            info["max"] = _scalar(self.max)
+            # mesma estatística que a limpeza usa para preencher vazios
+            if self.counts is not None:
+                info["median"] = _scalar(self.counts.median())
+        elif kind == "text" and self.counts is not None and self.counts.distinct():
+            mode = self.counts.mode()
+            if isinstance(mode, str):
+                info["mode"] = mode
+
+        time = self._time(kind)
+        if time is not None:
+            info["time"] = time
+        return info
+
+
+class ProfileBuilder:
+    """
+    Perfil acumulado bloco a bloco:
+
+        builder = ProfileBuilder()
+        for chunk in blocos:
+            builder.update(chunk)
+        builder.result()
+
+    update(None) descarta o que foi acumulado (a leitura recomeçou). O resultado
+    é o mesmo com o DataFrame inteiro num bloco só (ver profile_dataframe).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.rows = 0
+        self.columns: Dict[str, _ColumnStats] = {}
+
+    def update(self, df: Optional[pd.DataFrame]) -> None:
+        if df is None:
+            self.reset()
+            return
+        self.rows += len(df)
+        for name in df.columns:
+            self.columns.setdefault(str(name), _ColumnStats()).update(df[name])
+
+    def result(self) -> Dict[str, Any]:
+        columns = {name: stats.result() for name, stats in self.columns.items()}
+
+        # coluna temporal: datas de verdade antes de anos numéricos
+        time_column = None
+        for kind in ("datetime", "year"):
+            for name, info in columns.items():
+                if info.get("time", {}).get("kind") == kind:
+                    time_column = {"name": name, **info["time"]}
+                    break
+            if time_column is not None:
+                break
+
+        # colunas de texto repetitivas (ex.: experience_level, company_size) viram
+        # category na leitura; a coluna temporal fica como está para parse_time_column
+        dtypes = {}
+        for name, info in columns.items():
+            filled = self.rows - info["nulls"]
+            if (
+                info["dtype"] in ("str", "string", "object")
+                and "time" not in info
+                and 0 < info["distinct_approx"] <= CATEGORY_MAX_DISTINCT
+                and info["distinct_approx"] <= CATEGORY_MAX_RATIO * filled
+            ):
+                dtypes[name] = "category"
+
+        return {
+            "version": PROFILE_VERSION,
+            "rows": int(self.rows),
+            "nulls": int(sum(c["nulls"] for c in columns.values())),
+            "columns": columns,
+            "time_column": time_column,
+            "dtypes": dtypes,
+        }
+
+
+def profile_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """Perfil de um DataFrame já carregado (sem assinatura do arquivo)."""
+    builder = ProfileBuilder()
+    builder.update(df)
+    return builder.result()
+
+
+# =========================
+# Sidecar do perfil
+# =========================
+
+def _save_profile(path: Path, profile: Dict[str, Any]) -> Dict[str, Any]:
+    profile["source"] = source_signature(path)
+
+    target = profile_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_text(json.dumps(profile), encoding="utf-8")
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return profile
+
+
+def write_profile(path: Union[str, Path], df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """Calcula o perfil de df (conteúdo de `path`, já na memória) e grava ao lado do arquivo."""
+    path = Path(path)
+    try:
+        profile = profile_dataframe(df)
+    except Exception as e:
+        print("Não foi possível calcular o perfil:", path.name, repr(e))
+        return None
+    return _save_profile(path, profile)
+
+
+def read_profile(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Perfil gravado, se estiver em dia com o arquivo; senão None."""
+    path = Path(path)
+    target = profile_path(path)
+    if not target.exists() or not path.exists():
+        return None
+    try:
+        profile = json.loads(target.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if profile.get("version") != PROFILE_VERSION or profile.get("source") != source_signature(path):
+        return None
+    return profile
+
+
+def build_profile(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Calcula e grava o perfil lendo o dataset em blocos. Sem sidecar em dia, o
+    sidecar é gravado na mesma passada: o arquivo original é lido uma vez só.
+    """
+    path = Path(path)
+    builder = ProfileBuilder()
+    try:
+        if sidecar_is_fresh(path) or build_sidecar(path, on_batch=builder.update) is None:
+            builder.reset()
+            for chunk in iter_batches(path):
+                builder.update(chunk)
+        profile = builder.result()
+    except Exception as e:
+        print("Não foi possível calcular o perfil:", path.name, repr(e))
+        return None
+    return _save_profile(path, profile)
+
+
+def time_hint(profile: Optional[Dict[str, Any]], column: str) -> Optional[Dict[str, Any]]:
+    """Como interpretar `column` como tempo segundo o perfil (ver parse_time_column)."""
+    if not profile:
+        return None
+    info = profile.get("columns", {}).get(column)
+    if info is None:
+        return None
+    return info.get("time") or {"kind": "none"}
+
+
+def dataset_dtypes(
+    profile: Optional[Dict[str, Any]], float32_columns: Sequence[str] = ()
+) -> Dict[str, str]:
+    """
+    Mapa de dtypes para read_dataset: as colunas category do perfil + float32
+    nas colunas numéricas do modelo (que vai para float32 de qualquer forma).
+    """
+    dtypes = dict((profile or {}).get("dtypes") or {})
+    dtypes.update(dict.fromkeys(float32_columns, "float32"))
+    return dtypes
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.services.metrics import StageTimer
+
+# orjson e brotli são opcionais: sem eles as respostas saem com o json da
+# biblioteca padrão e só gzip é oferecido
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+# Respostas menores que isso não compensam a compressão
+COMPRESS_MIN_BYTES = int(os.getenv("VORA_COMPRESS_MIN_BYTES", 1024))
+
+# Níveis rápidos: a resposta é gerada a cada requisição, não é arquivo estático
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def dumps(content: Any) -> bytes:
+    """
+    JSON compacto em bytes. Com orjson, arrays NumPy e floats saem direto;
+    sem ele, json.dumps com as mesmas opções da JSONResponse do Starlette.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """Accept-Encoding -> {codificação: q} (q=0 = recusada)."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Melhor compressão aceita pelo cliente: br (se instalado), depois gzip."""
+    accepted = _accepted(accept_encoding or "")
+    for name in ("br", "gzip"):
+        if name == "br" and brotli is None:
+            continue
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def json_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """
+    Resposta JSON (encoder rápido) comprimida conforme o Accept-Encoding da
+    requisição. Devolve um Response pronto: o FastAPI não passa pelo
+    response_model da rota, então `content` já deve estar no formato final
+    (dict / lista, ou um modelo pydantic).
+
+    Os tempos de encode (JSON) e compress vão para /metrics (pipeline "response")
+    e para o header Server-Timing.
+    """
+    timer = StageTimer("response")
+    with timer.stage("encode"):
+        if isinstance(content, BaseModel):
+            content = content.model_dump(mode="json")
+        body = dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+
+    encoding = choose_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding is not None:
+        with timer.stage("compress"):
+            if encoding == "br":
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = encoding
+
+    timer.observe()
+    headers["Server-Timing"] = ", ".join(
+        f"{name};dur={seconds * 1000:.2f}" for name, seconds in timer.durations.items()
+    )
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
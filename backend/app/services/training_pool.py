@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+import importlib
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# on_epoch(época, total, logs)
+ProgressFn = Callable[[int, int, Dict[str, float]], None]
+# should_stop() -> True quando o treino foi cancelado (checado a cada batch)
+StopFn = Callable[[], bool]
+
+# De quanto em quanto tempo run() confere se quem chamou pediu cancelamento
+CANCEL_POLL_SECONDS = 0.2
+
+# Tempo máximo de uma tarefa (fila + treino); 0 = sem limite
+TASK_TIMEOUT_SECONDS = float(os.getenv("VORA_TRAINING_TIMEOUT_SECONDS", 3600))
+
+
+class TrainingWorkerError(Exception):
+    """Falha de um job dentro do worker (a mensagem vem do processo filho)."""
+
+
+class TrainingCancelled(Exception):
+    """Treino interrompido a pedido (cliente saiu ou cancelou o job)."""
+
+
+def resolve_target(target: str) -> Callable[..., Any]:
+    """'pacote.modulo:funcao' -> função. Assim o processo da API não precisa importar o módulo."""
+    module_name, _, func_name = target.partition(":")
+    if not module_name or not func_name:
+        raise ValueError(f"Target inválido (use 'modulo:funcao'): {target}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def current_rss_mb() -> float:
+    """Memória residente atual do processo, em MB (Linux: /proc; fallback: pico via resource)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except (ImportError, OSError):
+        return 0.0
+
+
+# =========================
+# Processo worker
+# =========================
+
+def _configure_worker_runtime(settings: Dict[str, Any]) -> None:
+    """
+    Configura o runtime do worker ANTES de qualquer treino:
+      - threads do TensorFlow (intra/inter op) próprias deste processo
+      - seed própria do worker
+    """
+    intra = int(settings.get("tf_intra_threads") or 0)
+    inter = int(settings.get("tf_inter_threads") or 0)
+    if intra > 0:
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra)
+        os.environ["OMP_NUM_THREADS"] = str(intra)
+    if inter > 0:
+        os.environ["TF_NUM_INTEROP_THREADS"] = str(inter)
+
+    seed = settings.get("seed")
+
+    import random
+    import numpy as np
+
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    if settings.get("preload_tensorflow", True):
+        import tensorflow as tf
+
+        if intra > 0:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter > 0:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+        if seed is not None:
+            tf.random.set_seed(seed)
+
+
+def _worker_main(worker_id: int, task_q, result_q, cancel_slot, current_slot, settings: Dict[str, Any]) -> None:
+    """
+    Loop do worker: pega tarefas da fila até ser reciclado ou receber None.
+    cancel_slot (inteiro compartilhado com a API) recebe o id da tarefa a cancelar;
+    current_slot guarda o id da tarefa que o worker pegou (0 = nenhuma), antes
+    mesmo do "started": se o processo morrer, a API sabe qual tarefa se perdeu.
+    """
+    _configure_worker_runtime(settings)
+
+    max_jobs = int(settings.get("max_jobs") or 0)
+    max_rss_mb = float(settings.get("max_rss_mb") or 0)
+    jobs_done = 0
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+
+        task_id, target, payload = task
+        current_slot.value = task_id
+        result_q.put(("started", worker_id, task_id))
+
+        def progress(epoch: int, epochs: int, logs: Dict[str, float], _task_id=task_id) -> None:
+            result_q.put(("progress", worker_id, _task_id, (epoch, epochs, logs)))
+
+        def should_stop(_task_id=task_id) -> bool:
+            return cancel_slot.value == _task_id
+
+        try:
+            value = resolve_target(target)(payload, progress, should_stop)
+            result_q.put(("done", worker_id, task_id, value))
+        except TrainingCancelled:
+            result_q.put(("cancelled", worker_id, task_id))
+        except BaseException as e:  # noqa: BLE001 - tudo volta para o processo pai
+            result_q.put(("error", worker_id, task_id, f"{e}"))
+        current_slot.value = 0
+
+        jobs_done += 1
+        rss = current_rss_mb()
+        if max_jobs and jobs_done >= max_jobs:
+            result_q.put(("retired", worker_id, f"{jobs_done} jobs"))
+            break
+        if max_rss_mb and rss > max_rss_mb:
+            result_q.put(("retired", worker_id, f"RSS {rss:.0f} MB > {max_rss_mb:.0f} MB"))
+            break
+
+
+# =========================
+# Pool (lado da API)
+# =========================
+
+class _PendingTask:
+    def __init__(self, on_epoch: Optional[ProgressFn]):
+        self.on_epoch = on_epoch
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.worker_id: Optional[int] = None
+        self.cancel_requested = False
+        self.cancelled = False
+
+
+class TrainingWorkerPool:
+    """
+    Pool de processos de treino isolados da API.
+
+    - cada worker é um processo "spawn" com runtime TensorFlow próprio
+      (threads, seed e memória só dele)
+    - um worker é reciclado depois de `max_jobs` treinos ou quando a memória
+      residente passa de `max_rss_mb`; outro é criado no lugar
+    - com n_workers=0 o treino roda no próprio processo (modo antigo)
+    - cancelamento: cada worker tem um inteiro compartilhado com o id da tarefa
+      a interromper; o treino confere a cada batch e o worker fica livre para
+      a próxima tarefa da fila
+    """
+
+    def __init__(
+        self,
+        n_workers: int = 1,
+        max_jobs: int = 10,
+        max_rss_mb: float = 2048,
+        tf_intra_threads: int = 0,
+        tf_inter_threads: int = 0,
+        base_seed: int = 42,
+        task_timeout: float = 0,
+    ):
+        self.n_workers = max(0, n_workers)
+        self.task_timeout = max(0.0, task_timeout)
+        self.settings = {
+            "max_jobs": max_jobs,
+            "max_rss_mb": max_rss_mb,
+            "tf_intra_threads": tf_intra_threads,
+            "tf_inter_threads": tf_inter_threads,
+        }
+        self.base_seed = base_seed
+
+        self._ctx = mp.get_context("spawn")
+        self._task_q = None
+        self._result_q = None
+        self._workers: Dict[int, Any] = {}
+        self._cancel_slots: Dict[int, Any] = {}
+        self._current_slots: Dict[int, Any] = {}
+        self._pending: Dict[int, _PendingTask] = {}
+        self._task_ids = itertools.count(1)
+        self._worker_ids = itertools.count(0)
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # ---------- ciclo de vida ----------
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._dispatcher is not None:
+                return
+            self._stopping = False
+            self._task_q = self._ctx.Queue()
+            self._result_q = self._ctx.Queue()
+            for _ in range(self.n_workers):
+                self._spawn_worker_locked()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop,
+                name="vora-training-dispatcher",
+                daemon=True,
+            )
+            self._dispatcher.start()
+
+    def _spawn_worker_locked(self) -> None:
+        worker_id = next(self._worker_ids)
+        settings = dict(self.settings, seed=self.base_seed + worker_id)
+        cancel_slot = self._ctx.Value("q", 0, lock=False)
+        current_slot = self._ctx.Value("q", 0, lock=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._task_q, self._result_q, cancel_slot, current_slot, settings),
+            name=f"vora-training-worker-{worker_id}",
+            daemon=True,
+        )
+        proc.start()
+        self._workers[worker_id] = proc
+        self._cancel_slots[worker_id] = cancel_slot
+        self._current_slots[worker_id] = current_slot
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            if self._dispatcher is None:
+                return
+            self._stopping = True
+            workers = list(self._workers.values())
+            for _ in workers:
+                self._task_q.put(None)
+
+        deadline = time.monotonic() + timeout
+        for proc in workers:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.terminate()
+
+        with self._lock:
+            for pending in self._pending.values():
+                pending.error = "Pool de treino encerrado."
+                pending.done.set()
+            self._pending.clear()
+            self._workers.clear()
+            self._cancel_slots.clear()
+            self._current_slots.clear()
+            self._dispatcher = None
+
+    # ---------- execução ----------
+
+    def run(
+        self,
+        target: str,
+        payload: Dict[str, Any],
+        on_epoch: Optional[ProgressFn] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Any:
+        """
+        Executa target(payload, progress, should_stop) num worker e bloqueia até o fim.
+        target é 'modulo:funcao'; payload e retorno precisam ser picklable.
+
+        cancel (opcional): quando setado, o treino é interrompido no próximo batch
+        e run() levanta TrainingCancelled. Tarefa que ainda nem começou sai na
+        hora (o worker que a pegar depois a descarta no primeiro batch).
+
+        Passado task_timeout (fila + treino), a tarefa é abandonada e interrompida
+        do mesmo jeito, e run() levanta TrainingWorkerError.
+        """
+        if self.n_workers == 0:
+            progress = on_epoch or (lambda *_: None)
+            should_stop = cancel.is_set if cancel is not None else (lambda: False)
+            return resolve_target(target)(payload, progress, should_stop)
+
+        self._ensure_started()
+        task_id = next(self._task_ids)
+        pending = _PendingTask(on_epoch)
+        with self._lock:
+            self._pending[task_id] = pending
+        self._task_q.put((task_id, target, payload))
+
+        deadline = time.monotonic() + self.task_timeout if self.task_timeout else None
+        while not pending.done.wait(CANCEL_POLL_SECONDS):
+            if cancel is not None and cancel.is_set() and not pending.cancel_requested:
+                if not self._request_cancel(task_id, pending):
+                    raise TrainingCancelled("Treino cancelado antes de começar.")
+            if deadline is not None and time.monotonic() > deadline:
+                self._abandon(task_id, pending)
+                raise TrainingWorkerError(
+                    f"Treino passou do tempo limite ({self.task_timeout:.0f} s)."
+                )
+
+        if pending.cancelled:
+            raise TrainingCancelled("Treino cancelado.")
+        if pending.error is not None:
+            raise TrainingWorkerError(pending.error)
+        return pending.value
+
+    def _request_cancel(self, task_id: int, pending: _PendingTask) -> bool:
+        """Pede ao worker da tarefa que pare. False se ela ainda está na fila."""
+        with self._lock:
+            pending.cancel_requested = True
+            pending.on_epoch = None
+            slot = self._cancel_slots.get(pending.worker_id)
+            if slot is None:
+                return False
+            slot.value = task_id
+            return True
+
+    def _abandon(self, task_id: int, pending: _PendingTask) -> None:
+        """Esquece a tarefa; se ela já está num worker, ele para no próximo batch."""
+        self._request_cancel(task_id, pending)
+        with self._lock:
+            self._pending.pop(task_id, None)
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+            try:
+                msg = self._result_q.get(timeout=1.0)
+            except queue.Empty:
+                self._reap_dead_workers()
+                continue
+            except (EOFError, OSError):
+                return
+            self._handle_message(msg)
+
+    def _handle_message(self, msg) -> None:
+        kind, worker_id, *rest = msg
+
+        if kind == "retired":
+            print(f"Worker de treino {worker_id} reciclado ({rest[0]}).")
+            with self._lock:
+                proc = self._workers.pop(worker_id, None)
+                self._cancel_slots.pop(worker_id, None)
+                self._current_slots.pop(worker_id, None)
+                # se proc é None, _reap_dead_workers já repôs este worker
+                if proc is not None and not self._stopping:
+                    self._spawn_worker_locked()
+            if proc is not None:
+                proc.join(timeout=10)
+            return
+
+        task_id = rest[0]
+        with self._lock:
+            pending = self._pending.get(task_id)
+            if pending is None:
+                if kind == "started" and worker_id in self._cancel_slots:
+                    # tarefa já abandonada (tempo limite / worker morto): não treina à toa
+                    self._cancel_slots[worker_id].value = task_id
+                return
+
+        if kind == "started":
+            with self._lock:
+                pending.worker_id = worker_id
+                if pending.cancel_requested and worker_id in self._cancel_slots:
+                    # cancelada enquanto esperava na fila: para no primeiro batch
+                    self._cancel_slots[worker_id].value = task_id
+        elif kind == "progress":
+            if pending.on_epoch is not None:
+                try:
+                    pending.on_epoch(*rest[1])
+                except Exception as e:
+                    print("Erro no callback de progresso:", repr(e))
+        elif kind in ("done", "error", "cancelled"):
+            if kind == "done":
+                pending.value = rest[1]
+            elif kind == "error":
+                pending.error = rest[1]
+            else:
+                pending.cancelled = True
+            with self._lock:
+                self._pending.pop(task_id, None)
+            pending.done.set()
+
+    def _reap_dead_workers(self) -> None:
+        """
+        Worker que morreu sem avisar (ex.: OOM): falha o job dele e cria outro.
+        Antes, processa as mensagens que ainda estão em result_q ("started",
+        "done"...), para não falhar uma tarefa que já terminou. Se o "started"
+        não chegou, a tarefa perdida é a do current_slot do worker; morto antes de
+        pegar alguma (ex.: ao importar o TensorFlow), nenhuma tarefa falha: elas
+        continuam na fila para o worker novo.
+        """
+        while True:
+            try:
+                msg = self._result_q.get_nowait()
+            except queue.Empty:
+                break
+            except (EOFError, OSError):
+                return
+            self._handle_message(msg)
+
+        with self._lock:
+            dead = [wid for wid, proc in self._workers.items() if not proc.is_alive()]
+            for wid in dead:
+                proc = self._workers.pop(wid)
+                self._cancel_slots.pop(wid, None)
+                current_slot = self._current_slots.pop(wid, None)
+                # exitcode 0 = reciclagem normal cuja mensagem "retired" ainda não chegou
+                if proc.exitcode != 0:
+                    lost = [tid for tid, p in self._pending.items() if p.worker_id == wid]
+                    if not lost and current_slot is not None and current_slot.value in self._pending:
+                        lost = [current_slot.value]
+                    for task_id in lost:
+                        pending = self._pending.pop(task_id)
+                        pending.error = "O processo de treino terminou inesperadamente."
+                        pending.done.set()
+                if not self._stopping:
+                    self._spawn_worker_locked()
+
+
+training_pool = TrainingWorkerPool(
+    n_workers=int(os.getenv("VORA_TRAINING_WORKERS", 1)),
+    max_jobs=int(os.getenv("VORA_WORKER_MAX_JOBS", 10)),
+    max_rss_mb=float(os.getenv("VORA_WORKER_MAX_RSS_MB", 2048)),
+    tf_intra_threads=int(os.getenv("VORA_WORKER_TF_INTRA_THREADS", 0)),
+    tf_inter_threads=int(os.getenv("VORA_WORKER_TF_INTER_THREADS", 0)),
+    base_seed=int(os.getenv("VORA_WORKER_SEED", 42)),
+    task_timeout=TASK_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,102 @@
+"""
+Benchmark: leitura de datasets com pd.read_csv padrão x leitor compartilhado.
+
+Para cada tamanho, grava um CSV sintético no esquema de data_salaries_dirty.csv
+e mede tempo, pico de RSS e memória do DataFrame resultante em:
+
+  read_csv C (antigo)        pd.read_csv(path) com as opções padrão
+  read_csv_fast (pyarrow)    parse do CSV pelo engine do pyarrow (mesmo resultado)
+  profile (1x por arquivo)   perfil + mapa de dtypes, calculado uma vez e cacheado
+  sidecar, todas as colunas  read_dataset(path) (o que a limpeza usa)
+  sidecar + dtypes           idem, com category nas colunas de texto repetitivas
+  modelo, float64            read_dataset só das colunas do modelo (antigo)
+  modelo + dtypes            idem, com category no grupo e float32 nos numéricos
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_dataset_reader
+    python -m benchmarks.bench_dataset_reader --sizes 100000,1000000,5000000 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+import pandas as pd
+
+from app.services.datasets import read_csv_fast, read_dataset, sidecar_is_fresh, write_sidecar
+from app.services.profiling import build_profile, dataset_dtypes
+from benchmarks.bench_pipeline import PeakRSS, synthetic_salaries
+
+MODEL_COLUMNS = ["work_year", "salary_in_usd", "salary", "job_title"]
+MODEL_NUMERIC = ["salary_in_usd", "salary"]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Tuple[float, float, Any]:
+    """Retorna (melhor tempo em s, maior acréscimo de RSS em MB, último resultado)."""
+    best = float("inf")
+    delta_mb = 0.0
+    value = None
+    for _ in range(repeat):
+        value = None
+        with PeakRSS() as mem:
+            t0 = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - t0
+        best = min(best, elapsed)
+        delta_mb = max(delta_mb, mem.peak_mb - mem.start_mb)
+    return best, delta_mb, value
+
+
+def frame_mb(value: Any) -> float:
+    if isinstance(value, pd.DataFrame):
+        return value.memory_usage(deep=True).sum() / 1024 ** 2
+    return float("nan")
+
+
+def run_size(rows: int, args: argparse.Namespace, workdir: Path) -> None:
+    path = workdir / f"salaries_{rows}.csv"
+    synthetic_salaries(rows, seed=args.seed).to_csv(path, index=False)
+
+    # confere que o engine pyarrow dá o mesmo DataFrame que o engine C
+    pd.testing.assert_frame_equal(pd.read_csv(path), read_csv_fast(path))
+
+    write_sidecar(path, read_csv_fast(path))
+    assert sidecar_is_fresh(path), "sidecar não foi gravado (pyarrow instalado?)"
+    profile = build_profile(path)
+    all_dtypes = dataset_dtypes(profile)
+    model_dtypes = dataset_dtypes(profile, MODEL_NUMERIC)
+
+    cases = [
+        ("read_csv C (antigo)", lambda: pd.read_csv(path)),
+        ("read_csv_fast (pyarrow)", lambda: read_csv_fast(path)),
+        ("profile (1x por arquivo)", lambda: build_profile(path)),
+        ("sidecar, todas as colunas", lambda: read_dataset(path)),
+        ("sidecar + dtypes", lambda: read_dataset(path, dtypes=all_dtypes)),
+        ("modelo, float64", lambda: read_dataset(path, columns=MODEL_COLUMNS)),
+        ("modelo + dtypes", lambda: read_dataset(path, columns=MODEL_COLUMNS, dtypes=model_dtypes)),
+    ]
+
+    for name, fn in cases:
+        seconds, delta_mb, value = measure(fn, args.repeat)
+        print(f"{rows:>10}  {name:<28}{seconds:>10.3f}{delta_mb:>10.0f}{frame_mb(value):>12.1f}")
+    print(f"{'':>10}  category: {', '.join(sorted(all_dtypes)) or '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="tamanhos separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10}  {'leitura':<28}{'tempo (s)':>10}{'+MB':>10}{'frame MB':>12}")
+    with tempfile.TemporaryDirectory(prefix="vora-bench-reader-") as workdir:
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            run_size(size, args, Path(workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: tempo e memória de `import app.main` (startup de um worker da API).
+
+Cada medição roda num processo Python novo, para não aproveitar módulos já
+carregados. Compara o import atual (sem TensorFlow) com o import que a API
+fazia antes, quando routers.forecast puxava o vora_lstm_forecaster e com ele
+TensorFlow/Keras.
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_import_app
+    python -m benchmarks.bench_import_app --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Código executado no processo filho: importa os módulos e devolve as medidas em JSON
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - t0
+from app.services.training_pool import current_rss_mb
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": current_rss_mb(),
+    "tensorflow": "tensorflow" in sys.modules,
+}}))
+"""
+
+CASES = [
+    ("app.main (atual, TF sob demanda)", ["app.main"]),
+    ("app.main + forecaster (como antes)", ["app.main", "app.ml.vora_lstm_forecaster"]),
+]
+
+
+def measure(modules: List[str]) -> Dict[str, object]:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(modules=modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # a última linha é o JSON (TensorFlow pode escrever logs antes)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'cenário':<38}{'import (s)':>12}{'RSS (MB)':>12}{'TF carregado':>15}")
+    for name, modules in CASES:
+        runs = [measure(modules) for _ in range(args.repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        tf_loaded = "sim" if any(r["tensorflow"] for r in runs) else "não"
+        print(f"{name:<38}{seconds:>12.2f}{rss:>12.0f}{tf_loaded:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: latência do event loop com N logins simultâneos.
+
+Compara bcrypt chamado direto na rota async (antigo) com bcrypt no executor
+limitado de app.services.passwords. Enquanto os logins rodam, um "ticker"
+dorme 10 ms em loop e mede o atraso de cada acordada: é o tempo que qualquer
+outra requisição (upload, health check...) ficaria esperando.
+
+Não usa Oracle: o hash é gerado uma vez e a "consulta" é só o verify.
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_login_event_loop
+    python -m benchmarks.bench_login_event_loop --logins 32 --workers 4 --queue 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+from app.services.passwords import BoundedExecutor, ExecutorBusy, pwd_context
+
+TICK_S = 0.010
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> List[float]:
+    """Atraso (ms) de cada acordada de um sleep de TICK_S."""
+    lags: List[float] = []
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append((time.perf_counter() - t0 - TICK_S) * 1000)
+    return lags
+
+
+async def run_case(n_logins: int, login: Callable[[], Awaitable[bool]]):
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)  # deixa o ticker começar
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(n_logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    lags = await ticker
+    ok = sum(1 for r in results if r is True)
+    busy = sum(1 for r in results if isinstance(r, ExecutorBusy))
+    return elapsed, lags, ok, busy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=32)
+    args = parser.parse_args()
+
+    senha = "senha-de-teste-123"
+    password_hash = pwd_context.hash(senha)
+    executor = BoundedExecutor(args.workers, args.queue, name="bench-bcrypt")
+
+    async def login_inline() -> bool:
+        # como era: verify síncrono dentro da rota async
+        return pwd_context.verify(senha, password_hash)
+
+    async def login_executor() -> bool:
+        return await executor.run(pwd_context.verify, senha, password_hash)
+
+    cases = [
+        ("bcrypt no event loop (antigo)", login_inline),
+        (f"executor ({args.workers} threads, fila {args.queue})", login_executor),
+    ]
+
+    print(f"logins simultâneos={args.logins}  tick={TICK_S * 1000:.0f} ms")
+    print(f"{'implementação':<36}{'total (s)':>10}{'lag p50':>10}{'lag p99':>10}{'lag máx':>10}{'ok':>6}{'503':>6}")
+    for name, login in cases:
+        elapsed, lags, ok, busy = asyncio.run(run_case(args.logins, login))
+        lag = np.array(lags or [0.0])
+        print(
+            f"{name:<36}{elapsed:>10.2f}{np.percentile(lag, 50):>10.1f}"
+            f"{np.percentile(lag, 99):>10.1f}{lag.max():>10.1f}{ok:>6}{busy:>6}"
+        )
+    print("(lag em ms: atraso extra de uma tarefa qualquer do event loop)")
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: tempo por época do treino da LSTM em cada modo de desempenho.
+
+Treina o modelo do config_vora_lstm.env no dataset de exemplo variando só os
+modos opcionais (JIT_COMPILE, PRECISION, DROPOUT_RECURRENT / FUSED_LSTM).
+Cada modo roda num processo Python novo (a política de precisão do Keras é
+global). A 1ª época inclui o tracing/compilação e aparece separada; a coluna
+"época (s)" é a melhor das demais (menos sensível a ruído de CPU compartilhada).
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_lstm_modes
+    python -m benchmarks.bench_lstm_modes --epochs 6 --csv uploads/teste/data_salaries_dirty_cleaned.csv
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any, Dict
+
+# Código executado no processo filho: treina e devolve os tempos de cada época em JSON
+_CHILD = """
+import json, time
+from app.ml.config import ForecastConfig
+from app.ml.vora_lstm_forecaster import run_forecast_pipeline
+
+config = ForecastConfig.from_env_file("config_vora_lstm.env").with_overrides(
+    csv_path={csv!r}, save_model_path="", save_forecast_csv_path="",
+    epochs={epochs}, use_early_stopping=False, **{overrides!r}
+)
+marks = [time.perf_counter()]
+run_forecast_pipeline(config, on_epoch=lambda epoch, total, logs: marks.append(time.perf_counter()))
+print(json.dumps({{"epochs": [b - a for a, b in zip(marks, marks[1:])]}}))
+"""
+
+MODES = [
+    ("padrão (float32)", {}),
+    ("DROPOUT_RECURRENT=0.2 (genérico)", {"dropout_recurrent": 0.2}),
+    ("  + FUSED_LSTM=auto", {"dropout_recurrent": 0.2, "fused_lstm": "auto"}),
+    ("JIT_COMPILE", {"jit_compile": True}),
+    ("PRECISION=mixed_bfloat16", {"precision": "mixed_bfloat16"}),
+    ("JIT_COMPILE + mixed_bfloat16", {"jit_compile": True, "precision": "mixed_bfloat16"}),
+]
+
+
+def measure(csv: str, epochs: int, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    code = _CHILD.format(csv=csv, epochs=epochs, overrides=overrides)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    # a última linha é o JSON (TensorFlow/Keras escrevem logs antes)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="uploads/luccasaraivaborges/data_salaries_dirty_cleaned.csv")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"dataset={args.csv}  épocas={args.epochs}")
+    print(f"{'modo':<36}{'1ª época (s)':>14}{'época (s)':>12}{'vs padrão':>11}")
+    baseline = None
+    for name, overrides in MODES:
+        times = measure(args.csv, args.epochs, overrides)["epochs"]
+        best = min(times[1:] or times)
+        baseline = baseline or best
+        print(f"{name:<36}{times[0]:>14.2f}{best:>12.2f}{baseline / best:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Benchmark: pipeline completo ingestão -> limpeza -> forecast, etapa por etapa.
+
+Gera datasets sintéticos com o esquema de data_salaries_dirty.csv (com sujeira:
+vazios, duplicados, espaços) em vários tamanhos e mede, para cada tamanho:
+
+  write_csv                 gravação do CSV sintético (só referência)
+  load_dataframe_cold       cleaning.load_dataframe sem sidecar (parse + sidecar)
+  load_dataframe_warm       cleaning.load_dataframe com o sidecar Parquet
+  clean_dataset             rota POST /clean/dataset (em blocos se o CSV for grande)
+  prepare_time_series_data  conversão de datas, numéricos, fill e escala
+  create_sequences          janelas (views) sobre a série escalada
+  model_fit                 model.fit nas últimas --fit-rows linhas (--epochs)
+  model_predict             model.predict de um lote de janelas
+  bundle_predict            BundleModel.predict (NumPy, sem TensorFlow)
+  forecast_response         rota POST /forecast/lstm com o modelo já no cache
+                            (leitura do histórico, downsampling e serialização)
+
+Cada etapa registra tempo e pico de RSS (amostrado numa thread enquanto a
+etapa roda). O resultado vai para um JSON (--out) que pode ser comparado com
+uma rodada anterior (--compare).
+
+Os arquivos temporários ficam em uploads/vora-bench/ e são apagados no fim.
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 10000,100000,1000000,10000000
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline_20260101-120000.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.training_pool import current_rss_mb
+
+BASE_DIR = Path(__file__).resolve().parents[1]  # pasta backend/
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+BENCH_USER = "vora-bench@local"  # -> uploads/vora-bench/
+
+# Esquema e valores no estilo de data_salaries_dirty.csv
+JOB_TITLES = [
+    "Data Engineer", "Data Scientist", "Data Analyst", "Machine Learning Engineer",
+    "Analytics Engineer", "Research Scientist", "Data Architect", "BI Developer",
+]
+EXPERIENCE_LEVELS = ["Entry-level", "Mid-level", "Senior-level", "Executive-level"]
+EMPLOYMENT_TYPES = ["Full-time", "Part-time", "Contract", "Freelance"]
+WORK_MODELS = ["Remote", "Hybrid", "On-site"]
+COUNTRIES = ["United States", "United Kingdom", "Canada", "Germany", "Spain", "India", "France", "Brazil"]
+CURRENCIES = {"United States": "USD", "United Kingdom": "GBP", "Canada": "CAD", "India": "INR", "Brazil": "BRL"}
+COMPANY_SIZES = ["Small", "Medium", "Large"]
+YEARS = np.arange(2020, 2025)
+
+
+# =========================
+# Dataset sintético
+# =========================
+
+def synthetic_salaries(rows: int, seed: int = 42, dirty: float = 0.02) -> pd.DataFrame:
+    """
+    DataFrame com as colunas de data_salaries_dirty.csv. Uma fração `dirty`
+    das células vira vazio / ganha espaços, e ~1% das linhas são duplicadas.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pick(values: List[str]) -> np.ndarray:
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+    residence = pick(COUNTRIES)
+    location = np.where(rng.random(rows) < 0.9, residence, pick(COUNTRIES))
+    experience = rng.integers(0, len(EXPERIENCE_LEVELS), rows)
+    salary_usd = np.round(rng.lognormal(11.3, 0.45, rows) * (1 + 0.25 * experience), 0)
+    currency = np.array([CURRENCIES.get(c, "EUR") for c in residence], dtype=object)
+    rate = np.where(currency == "USD", 1.0, rng.uniform(0.7, 1.3, rows).round(2))
+
+    df = pd.DataFrame(
+        {
+            "job_title": pick(JOB_TITLES),
+            "experience_level": np.asarray(EXPERIENCE_LEVELS, dtype=object)[experience],
+            "employment_type": pick(EMPLOYMENT_TYPES),
+            "work_models": pick(WORK_MODELS),
+            "work_year": np.sort(YEARS[rng.integers(0, len(YEARS), rows)]).astype("float64"),
+            "employee_residence": residence,
+            "salary": np.round(salary_usd * rate, 0),
+            "salary_currency": currency,
+            "salary_in_usd": salary_usd,
+            "company_location": location,
+            "company_size": pick(COMPANY_SIZES),
+        }
+    )
+
+    # sujeira: vazios em qualquer coluna menos a data, espaços nas strings
+    for col in df.columns.drop("work_year"):
+        mask = rng.random(rows) < dirty
+        df.loc[mask, col] = np.nan
+    for col in ("job_title", "company_location"):
+        mask = rng.random(rows) < dirty
+        df.loc[mask, col] = " " + df.loc[mask, col].astype(str) + " "
+
+    # ~1% de linhas duplicadas, no meio do arquivo
+    dup = rng.integers(0, rows, max(1, rows // 100))
+    df = pd.concat([df, df.iloc[dup]], ignore_index=True)
+    return df.sort_values("work_year", kind="stable").reset_index(drop=True)
+
+
+# =========================
+# Medição
+# =========================
+
+class PeakRSS:
+    """Amostra o RSS do processo numa thread enquanto o bloco roda."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRSS":
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+class StageRecorder:
+    def __init__(self):
+        self.results: List[Dict[str, Any]] = []
+
+    def run(self, rows: int, stage: str, fn: Callable[[], Any], **detail: Any) -> Any:
+        with PeakRSS() as mem:
+            t0 = time.perf_counter()
+            value = fn()
+            seconds = time.perf_counter() - t0
+        record = {
+            "rows": rows,
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "peak_rss_mb": round(mem.peak_mb, 1),
+            "rss_delta_mb": round(mem.peak_mb - mem.start_mb, 1),
+        }
+        if detail:
+            record["detail"] = detail
+        self.results.append(record)
+        print(f"{rows:>10}  {stage:<26}{seconds:>10.3f}{mem.peak_mb:>10.0f}{mem.peak_mb - mem.start_mb:>10.0f}")
+        return value
+
+    def annotate(self, **detail: Any) -> None:
+        """Acrescenta detalhes à última etapa registrada."""
+        self.results[-1].setdefault("detail", {}).update(detail)
+
+
+# =========================
+# Etapas
+# =========================
+
+def run_size(rows: int, args: argparse.Namespace, rec: StageRecorder) -> None:
+    # import tardio: carrega TensorFlow só depois do parse dos argumentos
+    from fastapi import Request
+
+    from app.ml.bundle import BundleModel
+    from app.ml.forecast_cache import forecast_cache
+    from app.ml.input_pipeline import training_inputs, training_series
+    from app.ml.vora_lstm_forecaster import (
+        build_lstm_from_config,
+        create_sequences,
+        fit_model,
+        prepare_time_series_data,
+        train_and_forecast,
+    )
+    from app.routers import cleaning, forecast
+    from app.services.chunked_cleaning import should_stream
+
+    user_dir = cleaning.get_user_dir(BENCH_USER)
+    raw_path = user_dir / f"salaries_{rows}.csv"
+
+    df = synthetic_salaries(rows, seed=args.seed)
+    rec.run(rows, "write_csv", functools.partial(df.to_csv, raw_path, index=False))
+    rec.annotate(bytes=raw_path.stat().st_size)
+    del df
+
+    rec.run(rows, "load_dataframe_cold", lambda: cleaning.load_dataframe(raw_path))
+    rec.run(rows, "load_dataframe_warm", lambda: cleaning.load_dataframe(raw_path))
+
+    request = cleaning.CleanRequest(filename=raw_path.name, user_email=BENCH_USER)
+    report = rec.run(rows, "clean_dataset", lambda: asyncio.run(cleaning.clean_dataset(request)))
+    rec.annotate(streaming=should_stream(raw_path), rows_after=report.get("rows_after"))
+    cleaned_path = Path(report["cleaned_path"])
+
+    config = forecast.load_base_config().with_overrides(
+        csv_path=str(cleaned_path),
+        save_model_path="",
+        save_forecast_csv_path="",
+        epochs=args.epochs,
+        use_early_stopping=False,
+    )
+    df_clean = cleaning.load_dataframe(cleaned_path)[[config.datetime_column] + config.numeric_columns]
+
+    _, data_scaled, _ = rec.run(rows, "prepare_time_series_data", lambda: prepare_time_series_data(df_clean, config))
+    rec.run(
+        rows,
+        "create_sequences",
+        lambda: create_sequences(data_scaled, config.history_window, config.forecast_horizon, config.window_step),
+    )
+
+    # modelo: só a cauda da série (o custo do fit cresce com as janelas, não com o arquivo)
+    fit_data = data_scaled[-args.fit_rows:]
+    n_windows = len(fit_data) - config.history_window - config.forecast_horizon + 1
+    starts = np.arange(max(n_windows, 0), dtype="int64")
+    model = build_lstm_from_config(config.history_window, fit_data.shape[1], config.forecast_horizon, config)
+
+    def fit() -> None:
+        with training_series(fit_data, config) as series:
+            fit_model(model, training_inputs(series, starts, config), None, config)
+
+    rec.run(rows, "model_fit", fit, windows=int(len(starts)), epochs=args.epochs)
+
+    batch = np.ascontiguousarray(create_sequences(fit_data, config.history_window, config.forecast_horizon)[0][-256:])
+    rec.run(rows, "model_predict", lambda: model.predict(batch, verbose=0), windows=int(len(batch)))
+
+    # resposta da rota com cache quente: grava no cache o resultado de um treino curto
+    forecast_request = forecast.ForecastRequest(
+        filename=cleaned_path.name, user_email=BENCH_USER, max_points=args.max_points
+    )
+    # a rota recebe a Request para negociar a compressão (Accept-Encoding de um navegador)
+    http_request = Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/api/forecast/lstm",
+        "headers": [(b"accept-encoding", b"gzip, deflate, br")],
+    })
+    route_config = forecast.load_base_config().with_overrides(csv_path=str(cleaned_path))
+    cache_key = forecast_cache.make_key(cleaned_path, route_config)
+    tail = df_clean.iloc[-args.fit_rows:]
+    result = train_and_forecast(tail, config)
+    forecast_cache.put(cache_key, cleaned_path, route_config, result)
+    try:
+        bundle = BundleModel(forecast_cache.bundle_dir(cache_key))
+        rec.run(rows, "bundle_predict", lambda: bundle.predict(batch, [bundle.last_date] * len(batch)), windows=int(len(batch)))
+        rec.run(rows, "forecast_response", lambda: forecast.run_lstm_forecast(forecast_request, http_request), max_points=args.max_points)
+    finally:
+        forecast_cache.invalidate(cache_key)
+
+
+# =========================
+# Resultado / comparação
+# =========================
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    import tensorflow as tf
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "tensorflow": tf.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sizes": args.sizes,
+        "fit_rows": args.fit_rows,
+        "epochs": args.epochs,
+        "max_points": args.max_points,
+        "seed": args.seed,
+    }
+
+
+def compare(previous_path: Path, results: List[Dict[str, Any]]) -> None:
+    previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    old = {(r["rows"], r["stage"]): r for r in previous.get("results", [])}
+    print(f"\ncomparação com {previous_path.name} (commit {previous.get('meta', {}).get('git_commit')})")
+    print(f"{'linhas':>10}  {'etapa':<26}{'antes (s)':>10}{'agora (s)':>10}{'razão':>8}{'RSS antes':>11}{'RSS agora':>11}")
+    for r in results:
+        before = old.get((r["rows"], r["stage"]))
+        if before is None:
+            continue
+        ratio = r["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+        print(
+            f"{r['rows']:>10}  {r['stage']:<26}{before['seconds']:>10.3f}{r['seconds']:>10.3f}"
+            f"{ratio:>7.2f}x{before['peak_rss_mb']:>11.0f}{r['peak_rss_mb']:>11.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="tamanhos separados por vírgula (até 10000000)")
+    parser.add_argument("--fit-rows", type=int, default=20_000, help="linhas usadas no model.fit")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--max-points", type=int, default=400, help="max_points da resposta do forecast")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=None, help="JSON de saída (padrão: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de uma rodada anterior")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    out = args.out or RESULTS_DIR / f"pipeline_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    rec = StageRecorder()
+
+    print(f"{'linhas':>10}  {'etapa':<26}{'tempo (s)':>10}{'pico MB':>10}{'+MB':>10}")
+    try:
+        for rows in args.sizes:
+            run_size(rows, args, rec)
+    finally:
+        from app.routers import cleaning
+
+        shutil.rmtree(cleaning.get_user_dir(BENCH_USER), ignore_errors=True)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_text(json.dumps({"meta": run_metadata(args), "results": rec.results}, indent=2), encoding="utf-8")
+        os.replace(tmp, out)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    print(f"\nresultado gravado em {out}")
+
+    if args.compare is not None:
+        compare(args.compare, rec.results)
+
+
+if __name__ == "__main__":
+    main()
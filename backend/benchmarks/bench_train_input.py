@@ -0,0 +1,92 @@
+"""
+Benchmark: memória extra da entrada de treino (TRAIN_PIPELINE).
+
+Para uma série sintética escalada, monta a entrada do model.fit em cada modo
+e percorre uma época inteira de batches (sem treinar a rede, só a entrada):
+  arrays  X [n_janelas, janela, features] e y inteiros na memória (antigo)
+  tfdata  série num tensor, janelas montadas por batch com tf.gather
+  memmap  série num .npy mapeado em memória, lida por batch
+
+Cada modo roda num processo Python novo; a coluna "pico extra" é o pico de
+RSS menos o RSS logo antes de montar a entrada (TensorFlow já carregado).
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_train_input
+    python -m benchmarks.bench_train_input --rows 400000 --window 96 --features 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict
+
+# Código executado no processo filho: monta a entrada e devolve as medidas em JSON
+_CHILD = """
+import json, resource, time
+import numpy as np
+import tensorflow as tf
+from app.ml.config import ForecastConfig
+from app.ml.input_pipeline import training_inputs, training_series
+from app.ml.windowing import count_windows
+from app.services.training_pool import current_rss_mb
+
+rows, window, horizon, features, batch = {rows}, {window}, {horizon}, {features}, {batch}
+cfg = ForecastConfig(
+    datetime_column="t", target_column="y", history_window=window,
+    forecast_horizon=horizon, batch_size=batch, train_pipeline={mode!r},
+)
+data = np.random.default_rng(0).random((rows, features), dtype="float32")
+starts = np.arange(count_windows(rows, window, horizon), dtype="int64")
+
+base = current_rss_mb()
+t0 = time.perf_counter()
+with training_series(data, cfg) as series:
+    inputs = training_inputs(series, starts, cfg)
+    n = 0
+    if isinstance(inputs, tf.data.Dataset):
+        for X, y in inputs:
+            n += int(X.shape[0])
+    else:
+        n = len(inputs[1])
+elapsed = time.perf_counter() - t0
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": elapsed, "extra_mb": peak - base, "windows": n}}))
+"""
+
+MODES = ("arrays", "tfdata", "memmap")
+
+
+def measure(mode: str, args: argparse.Namespace) -> Dict[str, float]:
+    code = _CHILD.format(
+        rows=args.rows, window=args.window, horizon=args.horizon,
+        features=args.features, batch=args.batch, mode=mode,
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    # a última linha é o JSON (TensorFlow pode escrever logs antes)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--window", type=int, default=96)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--features", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    series_mb = args.rows * args.features * 4 / 1024 ** 2
+    print(
+        f"linhas={args.rows}  janela={args.window}  horizonte={args.horizon}  "
+        f"features={args.features}  série={series_mb:.1f} MB"
+    )
+    print(f"{'modo':<10}{'janelas':>12}{'época (s)':>12}{'pico extra (MB)':>18}")
+    for mode in MODES:
+        r = measure(mode, args)
+        print(f"{mode:<10}{r['windows']:>12}{r['seconds']:>12.2f}{r['extra_mb']:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
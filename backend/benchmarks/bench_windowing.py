@@ -0,0 +1,99 @@
+"""
+Benchmark: janelas com loop Python (create_sequences antigo) x views com strides.
+
+Rode a partir da pasta backend:
+    python -m benchmarks.bench_windowing
+    python -m benchmarks.bench_windowing --rows 200000 --window 60 --horizon 30
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+
+from app.ml.windowing import sliding_windows, iter_window_batches
+
+
+def create_sequences_loop(
+    data: np.ndarray,
+    window: int,
+    horizon: int,
+    step: int = 1,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Implementação antiga (loop + listas + np.array), mantida só para comparação."""
+    X, y = [], []
+    n_samples = len(data)
+
+    max_start = n_samples - window - horizon + 1
+    for start in range(0, max_start, step):
+        end = start + window
+        X.append(data[start:end, :])
+        y.append(data[end : end + horizon, 0])
+
+    return np.array(X, dtype="float32"), np.array(y, dtype="float32")
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """Retorna (melhor tempo em s, pico de memória em MB) de `repeat` execuções."""
+    best = float("inf")
+    peak_mb = 0.0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = min(best, elapsed)
+        peak_mb = max(peak_mb, peak / 1024 ** 2)
+    return best, peak_mb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--features", type=int, default=2)
+    parser.add_argument("--window", type=int, default=24)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    data = rng.random((args.rows, args.features), dtype="float32")
+
+    # confere que as duas implementações geram as mesmas janelas
+    X_old, y_old = create_sequences_loop(data, args.window, args.horizon, args.step)
+    X_new, y_new = sliding_windows(data, args.window, args.horizon, args.step)
+    assert np.array_equal(X_old, X_new) and np.array_equal(y_old, y_new), "janelas divergentes"
+    n_windows = len(X_new)
+    del X_old, y_old
+
+    def run_batches() -> None:
+        X, y = sliding_windows(data, args.window, args.horizon, args.step)
+        for _ in iter_window_batches(X, y, args.batch_size):
+            pass
+
+    cases = [
+        ("loop + np.array (antigo)", lambda: create_sequences_loop(data, args.window, args.horizon, args.step)),
+        ("sliding_windows (views)", lambda: sliding_windows(data, args.window, args.horizon, args.step)),
+        ("views + batches sob demanda", run_batches),
+    ]
+
+    print(
+        f"rows={args.rows} features={args.features} window={args.window} "
+        f"horizon={args.horizon} step={args.step} -> {n_windows} janelas"
+    )
+    print(f"{'implementação':<30}{'tempo (ms)':>12}{'janelas/s':>16}{'pico mem (MB)':>16}")
+    for name, fn in cases:
+        seconds, peak_mb = measure(fn, args.repeat)
+        rate = n_windows / seconds if seconds > 0 else float("inf")
+        print(f"{name:<30}{seconds * 1000:>12.2f}{rate:>16,.0f}{peak_mb:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()